@@ -0,0 +1,215 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Request arguments that only affect the HTTP call and can't go into a batch request body
+_CLIENT_ONLY_PARAMS = ("timeout", "extra_headers", "extra_query", "extra_body")
+
+
+class BatchRequestError(RuntimeError):
+    """
+    Raised for a request that the Batch API answered with an error, or didn't answer at all.
+    """
+
+
+class BatchRunner:
+    def __init__(self, client, poll_interval=60.0, completion_window="24h", work_dir=None, sleep=time.sleep,
+                 log=None):
+        """
+        Runs chat completion requests through the OpenAI Batch API: writes them to a JSONL file, uploads and
+        submits it, polls until the batch is done and reads the results back.
+        Args:
+            client: The OpenAI client (or a stub with the same files and batches endpoints).
+            poll_interval: Seconds between status checks.
+            completion_window: The batch completion window.
+            work_dir: Optional; the directory to write the JSONL input files to. Defaults to a temporary directory.
+            sleep: The function used to wait between status checks.
+            log: Optional; a function called with a line of text on each status change.
+        """
+        self.client = client
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        self.work_dir = work_dir
+        self.sleep = sleep
+        self.log = log
+
+    def write_input(self, requests):
+        """
+        Writes (custom_id, request arguments) pairs as a Batch API input file.
+        Returns:
+            The path of the JSONL file.
+        """
+        work_dir = self.work_dir or tempfile.gettempdir()
+        os.makedirs(work_dir, exist_ok=True)
+        handle, path = tempfile.mkstemp(prefix="resume_batch_", suffix=".jsonl", dir=work_dir)
+        with os.fdopen(handle, "w", encoding="utf-8") as file:
+            for custom_id, request in requests:
+                body = {name: value for name, value in request.items() if name not in _CLIENT_ONLY_PARAMS}
+                file.write(json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT,
+                                       "body": body}) + "\n")
+        return path
+
+    def submit(self, requests):
+        """
+        Uploads and submits a batch.
+        Returns:
+            The Batch object.
+        """
+        path = self.write_input(requests)
+        with open(path, "rb") as file:
+            uploaded = self.client.files.create(file=file, purpose="batch")
+        batch = self.client.batches.create(input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT,
+                                           completion_window=self.completion_window)
+        self._log(f"Submitted batch {batch.id} with {len(requests)} requests ({path})")
+        return batch
+
+    def wait(self, batch):
+        """
+        Polls a batch until it reaches a final status.
+        Returns:
+            The final Batch object.
+        """
+        status = batch.status
+        while batch.status not in FINAL_STATUSES:
+            self.sleep(self.poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+            if batch.status != status:
+                status = batch.status
+                counts = getattr(batch, "request_counts", None)
+                progress = f" ({counts.completed}/{counts.total} done)" if counts is not None else ""
+                self._log(f"Batch {batch.id} is {status}{progress}")
+        return batch
+
+    def results(self, batch):
+        """
+        Reads the results of a finished batch.
+        Returns:
+            A dict mapping each answered custom_id to a ChatCompletion or a BatchRequestError.
+        """
+        from openai.types.chat import ChatCompletion
+
+        results = {}
+        for file_id in (getattr(batch, "output_file_id", None), getattr(batch, "error_file_id", None)):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    error = record.get("error") or response.get("body", {}).get("error") or response
+                    results[record["custom_id"]] = BatchRequestError(f"{record['custom_id']}: {error}")
+                else:
+                    results[record["custom_id"]] = ChatCompletion.model_validate(response["body"])
+        return results
+
+    def run(self, requests):
+        """
+        Submits requests as one batch and waits for their results.
+        Args:
+            requests: A list of (custom_id, chat.completions.create arguments) pairs.
+        Returns:
+            A dict mapping every custom_id to a ChatCompletion or a BatchRequestError.
+        """
+        batch = self.wait(self.submit(requests))
+        results = self.results(batch)
+        for custom_id, _ in requests:
+            if custom_id not in results:
+                results[custom_id] = BatchRequestError(f"{custom_id}: no result (batch {batch.id} {batch.status})")
+        return results
+
+    def _log(self, text):
+        if self.log is not None:
+            self.log(text)
+
+
+class BatchedClient:
+    # Tells metrics.InstrumentedClient that the calls are billed at the Batch API's prices
+    batch_pricing = True
+
+    def __init__(self, runner):
+        """
+        A client whose chat.completions.create calls are collected from many threads and sent as one Batch API
+        batch. Each call blocks until the batch holding it is done, so the regular (sequential) processing code can
+        run unchanged on one thread per job; a batch is submitted as soon as every request expected to be in flight
+        is waiting. Call expect() with the number of requests that will be in flight at once (one per job, plus one
+        for each request a job sends alongside its own, like a speculative review) and release() as each ends.
+        Args:
+            runner: The BatchRunner to submit the batches with.
+        """
+        self.runner = runner
+        self.chat = _BatchedChat(self)
+        self.batches_submitted = 0
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._pending = []
+        self._counter = 0
+
+    def expect(self, requests=1):
+        """
+        Adds to the number of requests expected to be in flight at once.
+        """
+        with self._condition:
+            self._in_flight += requests
+
+    def release(self, requests=1):
+        """
+        Takes back requests counted by expect(), once the jobs or threads sending them are done, and submits the
+        pending requests if the rest are all waiting.
+        """
+        with self._condition:
+            self._in_flight -= requests
+            ready = self._take_ready()
+        self._run(ready)
+
+    def _take_ready(self):
+        # Called with the condition held; hands the pending requests to the caller once every expected one waits
+        if not self._pending or len(self._pending) < self._in_flight:
+            return []
+        ready, self._pending = self._pending, []
+        return ready
+
+    def _run(self, ready):
+        if not ready:
+            return
+        self.batches_submitted += 1
+        try:
+            results = self.runner.run([(entry.custom_id, entry.request) for entry in ready])
+        except Exception as exc:
+            results = {entry.custom_id: exc for entry in ready}
+        for entry in ready:
+            entry.result = results[entry.custom_id]
+            entry.done.set()
+
+    def create(self, **kwargs):
+        if kwargs.get("stream"):
+            raise ValueError("Streaming requests can't be sent through the Batch API")
+        with self._condition:
+            self._counter += 1
+            entry = _PendingRequest(f"request-{self._counter}", kwargs)
+            self._pending.append(entry)
+            ready = self._take_ready()
+        self._run(ready)
+        entry.done.wait()
+        if isinstance(entry.result, Exception):
+            raise entry.result
+        return entry.result
+
+
+class _BatchedChat:
+    def __init__(self, owner):
+        self.completions = owner
+
+
+class _PendingRequest:
+    def __init__(self, custom_id, request):
+        self.custom_id = custom_id
+        self.request = request
+        self.result = None
+        self.done = threading.Event()
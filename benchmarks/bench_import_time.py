@@ -0,0 +1,71 @@
+"""
+Import-time benchmark for the headless entry points.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters, reports the cumulative import time of each
+module (best of --repeat runs) with its slowest dependencies, and fails if a module goes over the budget or pulls
+in a dependency that should only load on first use (openai, python-docx, tiktoken, numpy, PyQt5).
+
+Usage:
+    python benchmarks/bench_import_time.py [--budget-ms 150] [--repeat 5] [--modules cli resume_app_class_only]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ("cli", "resume_app_class_only", "worker_service")
+
+# Top-level packages the CLI/class path must not import until they are used
+LAZY_PACKAGES = ("openai", "docx", "tiktoken", "numpy", "scipy", "PyQt5", "httpx")
+
+
+def import_times(module):
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+    Returns:
+        A dict mapping every imported module to its cumulative import time in microseconds.
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                               capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="maximum cold import time per module")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=5, help="number of slowest dependencies to list")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda times: times[module])
+        total_ms = best[module] / 1000
+        print(f"{module}: {total_ms:.1f}ms (best of {args.repeat}, budget {args.budget_ms:.0f}ms)")
+        slowest = sorted(((name, us) for name, us in best.items() if name != module), key=lambda item: -item[1])
+        for name, us in slowest[:args.top]:
+            print(f"    {name}: {us / 1000:.1f}ms")
+
+        if total_ms > args.budget_ms:
+            failures.append(f"{module} took {total_ms:.1f}ms to import (budget {args.budget_ms:.0f}ms)")
+        eager = sorted({name.split(".")[0] for name in best} & set(LAZY_PACKAGES))
+        if eager:
+            failures.append(f"{module} imports {', '.join(eager)} at import time")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark for resume section extraction on long synthetic documents.
+
+Compares the streaming extractor in resume_parser with the original GUI implementation, which grew strings
+with += and re-ran .replace(...).strip() over the accumulated text on every paragraph.
+
+Usage:
+    python benchmarks/bench_section_extractor.py [--pages 50] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resume_parser import extract_sections  # noqa: E402
+from synthetic import make_resume  # noqa: E402
+
+
+def legacy_extract(doc):
+    # The load_resume_sections loop from resume_fix_app.py before the shared extractor, kept as the baseline
+    key_skills_text = ''
+    work_experience_text = ''
+    capture_skills = False
+    capture_experience = False
+    end_of_experience_markers = ["Education", "Certifications", "Publications", "References"]
+
+    for para in doc.paragraphs:
+        is_underlined = any(run.underline for run in para.runs if run.underline)
+
+        if para.style.name.startswith('Heading') or is_underlined:
+            if 'Key Skills' in para.text:
+                capture_skills = True
+                key_skills_text += para.text + '\n'
+            elif 'Work Experience' in para.text:
+                capture_experience = True
+                capture_skills = False
+            elif any(marker in para.text for marker in end_of_experience_markers):
+                capture_experience = False
+
+        if capture_skills and para.text.strip() != '':
+            key_skills_text += para.text + '\n'
+        if capture_experience and para.text.strip() != '':
+            work_experience_text += para.text + '\n'
+
+        key_skills_text = key_skills_text.replace('Key Skills', '').strip()
+        work_experience_text = work_experience_text.replace('Work Experience', '').strip()
+
+    return key_skills_text, work_experience_text
+
+
+def streaming_extract(doc):
+    return extract_sections(doc)
+
+
+def best_of(func, doc, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(doc)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'paragraphs':>11} {'legacy (ms)':>12} {'streaming (ms)':>15} {'speedup':>8}")
+    for pages in args.pages:
+        doc = make_resume(pages)
+        paragraphs = len(doc.paragraphs)
+        legacy = best_of(legacy_extract, doc, args.repeat)
+        streaming = best_of(streaming_extract, doc, args.repeat)
+        print(f"{pages:>6} {paragraphs:>11} {legacy * 1000:>12.1f} {streaming * 1000:>15.1f} {legacy / streaming:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Offline end-to-end throughput benchmark, run against the local fake OpenAI server (no API key or spend).
+
+For each scenario it tailors a synthetic .docx resume against a corpus of synthetic job descriptions with
+ResumeProcessor.process_batch over real HTTP, and reports jobs/sec, p50/p99 job latency, p50/p99 latency per
+stage and the share of prompt tokens served from the (simulated) provider prompt cache. It also times the docx parse
+and its peak memory for resumes of several sizes. With --baseline it compares against an earlier run saved with
+--save-baseline and fails if a metric got worse by more than --tolerance. With --stream it also streams a review per
+job description through the GUI's client chain (cache, rate limiter, metrics) and then replays the same requests from
+the response cache, reporting the time to first token and to the last chunk of both.
+
+Usage:
+    python benchmarks/bench_throughput.py [--jobs 20 100] [--pages 2 10] [--workers 8] [--latency 0.05]
+                                          [--failure-rate 0.02] [--baseline base.json] [--save-baseline base.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_openai import FakeOpenAIServer  # noqa: E402
+from metrics import MetricsRegistry, InstrumentedClient  # noqa: E402
+from prompt_templates import REVIEW_RESUME  # noqa: E402
+from rate_limiting import RateLimiter, RateLimitedClient, make_openai_client  # noqa: E402
+from resume_app_class_only import ResumeProcessor  # noqa: E402
+from resume_parser import parse_resume  # noqa: E402
+from response_cache import ResponseCache, CachedClient  # noqa: E402
+from synthetic import make_job_description, save_resume  # noqa: E402
+
+# Metrics where a larger value is better; for every other metric a smaller value is better
+HIGHER_IS_BETTER = ("jobs_per_sec", "prompt_cache_hit_rate")
+
+
+class RecordingMetrics(MetricsRegistry):
+    """
+    A MetricsRegistry that also keeps every call latency, for exact percentiles instead of bucket bounds.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.latencies = {}
+
+    def record_call(self, stage, model, seconds, usage=None, error=None, time_to_first_token=None, batch=False):
+        super().record_call(stage, model, seconds, usage, error, time_to_first_token, batch)
+        with self._lock:
+            self.latencies.setdefault(stage, []).append(seconds)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+def run_scenario(server, resume_file_path, job_count, workers, review, structured, seed, speculative=False):
+    """
+    Tailors the resume against job_count fresh job descriptions and measures the run.
+    """
+    metrics = RecordingMetrics()
+    # A speculative review keeps a second request in flight per job
+    client = make_openai_client("fake", base_url=server.base_url, max_connections=workers * (2 if speculative else 1))
+    # No per-minute limits (the fake has none), and retries back off in milliseconds so failures cost little time
+    processor = ResumeProcessor(client, cache=ResponseCache(), metrics=metrics, structured_outputs=structured,
+                                speculative_review=speculative,
+                                rate_limiter=RateLimiter(rate_limits={}, base_delay=0.01, max_delay=0.1))
+    job_descriptions = [make_job_description(seed * 100000 + index, skills=10) for index in range(job_count)]
+
+    start = time.perf_counter()
+    results = list(processor.process_batch(job_descriptions, resume_file_path, workers, review))
+    elapsed = time.perf_counter() - start
+
+    job_latencies = [result.elapsed for result in results]
+    scenario = {
+        "jobs": job_count, "failed": sum(not result.ok for result in results),
+        "jobs_per_sec": round(job_count / elapsed, 3),
+        "job_p50_ms": round(percentile(job_latencies, 0.5) * 1000, 1),
+        "job_p99_ms": round(percentile(job_latencies, 0.99) * 1000, 1),
+        "retries": processor.rate_limiter.retries,
+        "prompt_cache_hit_rate": metrics.snapshot()["totals"]["prompt_cache_hit_rate"],
+    }
+    for stage, latencies in sorted(metrics.latencies.items()):
+        scenario[f"{stage}_p50_ms"] = round(percentile(latencies, 0.5) * 1000, 1)
+        scenario[f"{stage}_p99_ms"] = round(percentile(latencies, 0.99) * 1000, 1)
+    return scenario
+
+
+def run_stream_scenario(server, resume_text, job_count, workers, seed):
+    """
+    Streams a review of the resume against job_count fresh job descriptions, then replays them from the cache.
+    """
+    client = CachedClient(RateLimitedClient(InstrumentedClient(
+        make_openai_client("fake", base_url=server.base_url, max_connections=workers), MetricsRegistry()),
+        RateLimiter(rate_limits={}, base_delay=0.01, max_delay=0.1)), ResponseCache())
+    requests = [REVIEW_RESUME.messages(resume=resume_text,
+                                       job_description=make_job_description(seed * 100000 + index, skills=10))
+                for index in range(job_count)]
+
+    def stream(messages):
+        start = time.perf_counter()
+        first_token = None
+        for chunk in client.chat.completions.create(model="gpt-4-turbo-2024-04-09", messages=messages, stream=True,
+                                                    stream_options={"include_usage": True}):
+            if first_token is None and chunk.choices and chunk.choices[0].delta.content:
+                first_token = time.perf_counter() - start
+        return first_token, time.perf_counter() - start
+
+    scenario = {"jobs": job_count}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for name in ("stream", "replay"):
+            first_tokens, totals = zip(*executor.map(stream, requests))
+            scenario[f"{name}_ttft_p50_ms"] = round(percentile(first_tokens, 0.5) * 1000, 1)
+            scenario[f"{name}_ttft_p99_ms"] = round(percentile(first_tokens, 0.99) * 1000, 1)
+            scenario[f"{name}_p50_ms"] = round(percentile(totals, 0.5) * 1000, 1)
+    return scenario
+
+
+def measure_parse(directory, pages, repeat):
+    """
+    Times parse_resume on fresh files (so the content-hash memo never hits) and measures its peak memory.
+    """
+    timings = []
+    for attempt in range(repeat):
+        path = os.path.join(directory, f"parse_{pages}_{attempt}.docx")
+        save_resume(path, pages, seed=attempt)
+        start = time.perf_counter()
+        parse_resume(path)
+        timings.append(time.perf_counter() - start)
+
+    path = os.path.join(directory, f"parse_{pages}_memory.docx")
+    save_resume(path, pages, seed=repeat)
+    tracemalloc.start()
+    parse_resume(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"parse_ms": round(statistics.median(timings) * 1000, 1), "parse_peak_kb": round(peak / 1024, 1)}
+
+
+def compare(results, baseline, tolerance):
+    """
+    Lists the metrics that regressed by more than tolerance (a fraction) against the baseline.
+    """
+    failures = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if not isinstance(base, (int, float)) or not base or metric in ("jobs", "failed", "retries"):
+                continue
+            if metric in HIGHER_IS_BETTER:
+                regressed = value < base * (1 - tolerance)
+            else:
+                regressed = value > base * (1 + tolerance)
+            if regressed:
+                failures.append(f"{name} {metric}: {value} (baseline {base}, tolerance {tolerance:.0%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[20, 100], help="job description corpus sizes")
+    parser.add_argument("--pages", type=int, nargs="+", default=[2, 10], help="resume sizes in pages")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--structured", action="store_true", help="run the stages with structured outputs")
+    parser.add_argument("--no-review", action="store_true")
+    parser.add_argument("--stream", action="store_true", help="also benchmark streamed requests and cached replays")
+    parser.add_argument("--speculative", action="store_true", help="run the review speculatively (speculative_review)")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake API latency per request in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="fake seconds per completion token")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--completion-tokens", type=int, help="fixed completion token count to report")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests failing with 429")
+    parser.add_argument("--parse-repeat", type=int, default=5)
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression as a fraction")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, \
+            FakeOpenAIServer(latency=args.latency, token_latency=args.token_latency, jitter=args.jitter,
+                             completion_tokens=args.completion_tokens, failure_rate=args.failure_rate,
+                             rate_limit_rate=args.rate_limit_rate) as server:
+        for pages in args.pages:
+            results[f"parse_{pages}p"] = measure_parse(directory, pages, args.parse_repeat)
+            print(f"parse {pages:>3} pages: {results[f'parse_{pages}p']}")
+
+        for pages in args.pages:
+            resume_file_path = os.path.join(directory, f"resume_{pages}.docx")
+            save_resume(resume_file_path, pages)
+            for job_count in args.jobs:
+                name = f"batch_{job_count}jd_{pages}p"
+                results[name] = run_scenario(server, resume_file_path, job_count, args.workers, not args.no_review,
+                                             args.structured, seed=len(results), speculative=args.speculative)
+                scenario = results[name]
+                print(f"{name}: {scenario['jobs_per_sec']} jobs/sec, job p50 {scenario['job_p50_ms']}ms, "
+                      f"p99 {scenario['job_p99_ms']}ms, {scenario['failed']} failed, {scenario['retries']} retries, "
+                      f"{scenario['prompt_cache_hit_rate']:.0%} of prompt tokens cached")
+                for metric, value in scenario.items():
+                    if metric.endswith("_ms") and not metric.startswith("job_"):
+                        print(f"    {metric}: {value}")
+                if args.stream:
+                    name = f"stream_{job_count}jd_{pages}p"
+                    results[name] = run_stream_scenario(server, parse_resume(resume_file_path).text, job_count,
+                                                        args.workers, seed=len(results))
+                    print(f"{name}: {results[name]}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    failures = [f"{name}: {scenario['failed']} jobs failed" for name, scenario in results.items()
+                if scenario.get("failed")]
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            failures.extend(compare(results, json.load(file), args.tolerance))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
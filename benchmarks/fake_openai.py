@@ -0,0 +1,437 @@
+"""
+A local fake of the OpenAI chat completions endpoint for offline benchmarks.
+
+Answers POST /v1/chat/completions with replies shaped like each pipeline stage expects (keywords, a delimited
+processed resume, a scored review, a fixed resume, or the JSON of the structured_outputs schemas), with
+configurable latency, token counts and injected failures. Requests with stream=true get server-sent event chunks,
+plus a final usage chunk when they ask for stream_options={"include_usage": true}.
+
+Also fakes the Batch API endpoints batch_api.BatchRunner uses (POST /v1/files, POST /v1/batches,
+GET /v1/batches/<id> and GET /v1/files/<id>/content): a batch's requests are answered like regular ones, with
+injected failures going to the batch's error file, and the batch completes batch_latency seconds after it's created.
+
+Usage:
+    python benchmarks/fake_openai.py [--port 8089] [--latency 0.2] [--failure-rate 0.05]
+then point a client at it, e.g. python cli.py --base-url http://127.0.0.1:8089/v1 --api-key fake tailor ...
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic import SKILLS
+
+
+class FakeOpenAIServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.05, token_latency=0.0, jitter=0.0, completion_tokens=None,
+                 failure_rate=0.0, rate_limit_rate=0.0, prompt_cache=True, seed=0, batch_latency=None):
+        """
+        Serves fake chat completions on a background thread.
+        Args:
+            host: The interface to listen on.
+            port: The port to listen on; 0 picks a free one (see base_url).
+            latency: Seconds every request takes before the first byte.
+            token_latency: Extra seconds per completion token, to model generation time. Streamed replies send their
+                           first chunk after latency and spread the generation time over the chunks.
+            jitter: Up to this many seconds are added to each request at random.
+            completion_tokens: Optional; the completion token count to report. Defaults to about a quarter of the
+                               reply's characters.
+            failure_rate: The fraction of requests answered with a 500 error.
+            rate_limit_rate: The fraction of requests answered with a 429 error (with Retry-After: 0).
+            prompt_cache: A boolean that determines if prompt caching is simulated: the longest prompt prefix seen
+                          before is reported in usage.prompt_tokens_details.cached_tokens, in 128-token steps from
+                          1024 tokens, like OpenAI's automatic prompt caching.
+            seed: Seeds the jitter and failure injection.
+            batch_latency: Seconds a batch takes to complete. Defaults to latency.
+        """
+        self.latency = latency
+        self.token_latency = token_latency
+        self.jitter = jitter
+        self.completion_tokens = completion_tokens
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.prompt_cache = prompt_cache
+        self.batch_latency = latency if batch_latency is None else batch_latency
+        self.files = {}
+        self.batches = {}
+        self._prefixes = set()
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        handler = type("BoundFakeOpenAIHandler", (FakeOpenAIHandler,), {"server_state": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def serve_forever(self):
+        """
+        Serves on the calling thread until interrupted.
+        """
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def draw(self):
+        """
+        Decides the fate of one request.
+        Returns:
+            (HTTP status, extra seconds of jitter)
+        """
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            jitter = self._random.random() * self.jitter
+            if roll < self.failure_rate:
+                status = 500
+            elif roll < self.failure_rate + self.rate_limit_rate:
+                status = 429
+            else:
+                status = 200
+            if status != 200:
+                self.failures += 1
+        return status, jitter
+
+    def add_file(self, content, filename, purpose):
+        """
+        Stores an uploaded (or generated) file.
+        Returns:
+            The File object.
+        """
+        with self._lock:
+            file_id = f"file-fake-{len(self.files) + 1}"
+            self.files[file_id] = (content, {
+                "id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed",
+            })
+        return self.files[file_id][1]
+
+    def create_batch(self, request):
+        """
+        Answers every request in a batch input file right away; the batch reports them once batch_latency has passed.
+        Returns:
+            The Batch object, or None if the input file doesn't exist.
+        """
+        if request.get("input_file_id") not in self.files:
+            return None
+        output, errors = [], []
+        for line in self.files[request["input_file_id"]][0].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            status, _ = self.draw()
+            if status != 200:
+                errors.append({"id": f"batch_req_{entry['custom_id']}", "custom_id": entry["custom_id"],
+                               "response": {"status_code": status, "request_id": "fake",
+                                            "body": {"error": {"message": "injected failure",
+                                                               "type": "server_error"}}},
+                               "error": None})
+                continue
+            output.append({"id": f"batch_req_{entry['custom_id']}", "custom_id": entry["custom_id"],
+                           "response": {"status_code": 200, "request_id": "fake",
+                                        "body": self.completion(entry["body"])},
+                           "error": None})
+        created = int(time.time())
+        batch_id = f"batch_fake_{uuid.uuid4().hex[:16]}"
+        batch = {
+            "id": batch_id, "object": "batch", "endpoint": request.get("endpoint"), "errors": None,
+            "input_file_id": request["input_file_id"], "completion_window": request.get("completion_window"),
+            "status": "in_progress", "output_file_id": None, "error_file_id": None, "created_at": created,
+            "request_counts": {"total": len(output) + len(errors), "completed": 0, "failed": 0},
+        }
+        results = {
+            "output_file_id": self._results_file(batch_id, "output", output),
+            "error_file_id": self._results_file(batch_id, "errors", errors),
+            "request_counts": {"total": len(output) + len(errors), "completed": len(output), "failed": len(errors)},
+        }
+        with self._lock:
+            self.batches[batch_id] = (batch, results, time.monotonic() + self.batch_latency)
+        return batch
+
+    def retrieve_batch(self, batch_id):
+        """
+        Returns the Batch object, completed once its batch_latency has passed, or None if there is no such batch.
+        """
+        with self._lock:
+            if batch_id not in self.batches:
+                return None
+            batch, results, done_at = self.batches[batch_id]
+        if time.monotonic() < done_at:
+            return batch
+        return dict(batch, status="completed", completed_at=int(time.time()), **results)
+
+    def completion(self, request):
+        """
+        Builds the chat.completion body the endpoint answers a (non-streamed) request with.
+        """
+        content = fake_reply(request)
+        prompt_tokens = sum(len(message.get("content") or "") for message in request["messages"]) // 4
+        cached_tokens = min(self.cached_tokens(request), prompt_tokens)
+        completion_tokens = self.completion_tokens or max(1, len(content) // 4)
+        return {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+            "model": request["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens,
+                      "prompt_tokens_details": {"cached_tokens": cached_tokens}},
+        }
+
+    def _results_file(self, batch_id, kind, records):
+        if not records:
+            return None
+        content = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+        return self.add_file(content, f"{batch_id}_{kind}.jsonl", "batch_output")["id"]
+
+    def cached_tokens(self, request):
+        """
+        Returns how many leading prompt tokens an earlier request already sent, and remembers this prompt's prefixes.
+        Tokens are counted as 4 characters, as in the reported usage.
+        """
+        if not self.prompt_cache:
+            return 0
+        text = "".join(f"{message['role']}:{message.get('content') or ''}\n" for message in request["messages"])
+        digest = hashlib.sha256()
+        cached = 0
+        prefixes = []
+        start = 0
+        for end in range(4 * 1024, len(text) + 1, 4 * 128):
+            digest.update(text[start:end].encode("utf-8"))
+            prefixes.append(digest.copy().digest())
+            start = end
+        with self._lock:
+            for steps, prefix in enumerate(prefixes):
+                if prefix not in self._prefixes:
+                    break
+                cached = 1024 + steps * 128
+            self._prefixes.update(prefixes)
+        return cached
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive replies wait out the delayed ACK
+    disable_nagle_algorithm = True
+    server_state = None
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        state = self.server_state
+        path = self.path.split("?")[0].rstrip("/")
+        if path.endswith("/files"):
+            self._upload(body)
+            return
+        if path.endswith("/batches"):
+            batch = state.create_batch(json.loads(body))
+            if batch is None:
+                self._send(404, {"error": {"message": "no such input file"}})
+            else:
+                self._send(200, batch)
+            return
+        if not path.endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(body)
+        status, jitter = state.draw()
+        if status != 200:
+            time.sleep(state.latency + jitter)
+            headers = {"Retry-After": "0"} if status == 429 else {}
+            self._send(status, {"error": {"message": "injected failure", "type": "server_error"}}, headers)
+            return
+
+        completion = state.completion(request)
+        content = completion["choices"][0]["message"]["content"]
+        completion_tokens = completion["usage"]["completion_tokens"]
+        if request.get("stream"):
+            time.sleep(state.latency + jitter)
+            self._stream(request, content, completion["usage"], completion_tokens * state.token_latency)
+            return
+        time.sleep(state.latency + jitter + completion_tokens * state.token_latency)
+        self._send(200, completion)
+
+    def do_GET(self):
+        state = self.server_state
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if len(parts) >= 3 and parts[-2] == "batches":
+            batch = state.retrieve_batch(parts[-1])
+            if batch is not None:
+                self._send(200, batch)
+                return
+        elif len(parts) >= 4 and parts[-3] == "files" and parts[-1] == "content" and parts[-2] in state.files:
+            content = state.files[parts[-2]][0]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+        self._send(404, {"error": {"message": "not found"}})
+
+    def _upload(self, body):
+        """
+        Stores a multipart/form-data file upload, as sent by client.files.create.
+        """
+        header = f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode("latin-1")
+        form = BytesParser(policy=HTTP).parsebytes(header + body)
+        fields = {}
+        filename = None
+        for part in form.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            fields[name] = part.get_payload(decode=True)
+            if name == "file":
+                filename = part.get_filename()
+        if "file" not in fields:
+            self._send(400, {"error": {"message": "no file uploaded"}})
+            return
+        purpose = (fields.get("purpose") or b"").decode("utf-8")
+        self._send(200, self.server_state.add_file(fields["file"], filename or "upload.jsonl", purpose))
+
+    def _stream(self, request, content, usage, generation_time):
+        """
+        Sends a reply as server-sent events over chunked transfer encoding, a few words per chunk like the real
+        endpoint, ending with the finish_reason chunk, the usage chunk if requested, and [DONE].
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        base = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": request["model"]}
+        pieces = re.findall(r"\S*\s*", content)[:-1] or [""]
+        pieces = ["".join(pieces[start:start + 4]) for start in range(0, len(pieces), 4)]
+        for number, piece in enumerate(pieces):
+            delta = {"role": "assistant", "content": piece} if number == 0 else {"content": piece}
+            self._event(dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": None}]))
+            if number < len(pieces) - 1:
+                time.sleep(generation_time / len(pieces))
+        self._event(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self._event(dict(base, choices=[], usage=usage))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _event(self, data):
+        self._write_chunk(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send(self, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_LABELS = re.compile(r"(?:^|\n\n)(my resume|keywords|job description|experiences not on resume|resume items|"
+                     r"recommendations|earlier review|keyword changes):[ \n]")
+
+
+def _fields(user):
+    """
+    Splits a user message built from a prompt_templates layout into {label: value}, whatever the field order.
+    """
+    matches = list(_LABELS.finditer(user))
+    return {match.group(1): user[match.end():following.start() if following else len(user)]
+            for match, following in zip(matches, matches[1:] + [None])}
+
+
+def fake_reply(request):
+    """
+    Builds a plausible reply for the stage a request comes from, recognized by the fields of its user message.
+    """
+    user = request["messages"][-1]["content"]
+    fields = _fields(user)
+    structured = request.get("response_format") is not None
+    found = [skill for skill in SKILLS if re.search(r"(?<!\w)" + re.escape(skill.casefold()) + r"(?!\w)", user.casefold())]
+
+    if "resume items" in fields:
+        items = json.loads(fields["resume items"])
+        return json.dumps({"items": [{"id": item["id"], "text": item["text"]} for item in items]})
+    if "experiences not on resume" in fields:
+        resume = fields.get("my resume", "") + "\n" + fields["experiences not on resume"]
+        return json.dumps({"resume": resume}) if structured else resume
+    if "job description" in fields and "my resume" in fields:
+        resume = fields["my resume"].casefold()
+        wanted = [skill for skill in found if skill.casefold() in fields["job description"].casefold()]
+        missing = [skill for skill in wanted if skill.casefold() not in resume]
+        score = round(100 * (len(wanted) - len(missing)) / len(wanted)) if wanted else 50
+        explanation = f"The resume covers {len(wanted) - len(missing)} of {len(wanted)} required skills."
+        suggestions = [f"Add experience with {skill}" for skill in missing]
+        if structured:
+            return json.dumps({"score": score, "explanation": explanation, "missing_skills": missing,
+                               "suggestions": suggestions})
+        return f"Score: {score}/100\n{explanation}\nMissing: {', '.join(missing) or 'none'}\n" + "\n".join(suggestions)
+    if "keywords" in fields and "my resume" in fields:
+        lines = [line for line in fields["my resume"].splitlines() if line.strip()]
+        if structured:
+            return json.dumps({"key_skills": found, "work_experience": [line for line in lines
+                                                                         if "Key Skills" not in line][:40]})
+        return "Here is your tailored resume:\n```\n" + "\n".join(lines) + "\n```"
+    if structured:
+        return json.dumps({"keywords": found})
+    return ", ".join(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fake OpenAI chat completions locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--no-prompt-cache", action="store_true", help="don't simulate prompt caching")
+    parser.add_argument("--batch-latency", type=float, help="seconds a Batch API batch takes (defaults to --latency)")
+    args = parser.parse_args()
+    server = FakeOpenAIServer(args.host, args.port, args.latency, args.token_latency, args.jitter,
+                              args.completion_tokens, args.failure_rate, args.rate_limit_rate,
+                              not args.no_prompt_cache, batch_latency=args.batch_latency)
+    print(f"Serving fake chat completions on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Generators for synthetic resumes and job descriptions used by the benchmarks.
+"""
+import random
+import docx
+
+PARAGRAPHS_PER_PAGE = 40
+
+SKILLS = ["Python", "SQL", "Tableau", "Excel", "Looker", "dbt", "Airflow", "Spark", "AWS", "GCP", "Docker",
+          "Kubernetes", "Terraform", "Pandas", "NumPy", "scikit-learn", "PyTorch", "A/B Testing", "ETL",
+          "Data Modeling", "Stakeholder Management", "Agile", "JIRA", "Power BI", "Snowflake", "Redshift",
+          "Machine Learning", "Statistics", "Git", "REST APIs", "Java", "JavaScript", "React", "Node.js"]
+
+VERBS = ["Built", "Designed", "Led", "Automated", "Migrated", "Optimized", "Launched", "Analyzed", "Maintained",
+         "Owned", "Scaled", "Reduced", "Improved", "Delivered"]
+
+OBJECTS = ["reporting dashboards", "data pipelines", "customer churn models", "pricing experiments",
+           "internal tooling", "ETL jobs", "a metrics layer", "forecasting models", "onboarding flows",
+           "the analytics warehouse", "executive KPI reviews", "survey analysis workflows"]
+
+
+def make_resume(pages=2, seed=0):
+    """
+    Builds a synthetic resume document with Key Skills, Work Experience and Education sections.
+    Employer lines are underlined, like in the resumes the GUI was written for.
+    Args:
+        pages: The approximate length of the document in pages.
+        seed: The random seed, so the same arguments always build the same document.
+    Returns:
+        A docx.Document.
+    """
+    rng = random.Random(seed)
+    doc = docx.Document()
+    doc.add_paragraph("Jordan Example")
+    doc.add_paragraph("jordan@example.com | Boston, MA")
+    doc.add_paragraph("Key Skills")
+    doc.add_paragraph(" • ".join(rng.sample(SKILLS, 12)))
+    doc.add_paragraph("Work Experience")
+
+    paragraphs = pages * PARAGRAPHS_PER_PAGE
+    written = 0
+    job = 0
+    while written < paragraphs:
+        employer = doc.add_paragraph()
+        employer.add_run(f"Company {job}, Boston, MA (Remote)").underline = True
+        doc.add_paragraph(f"Senior Analyst {job}")
+        for _ in range(rng.randint(4, 8)):
+            doc.add_paragraph(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)} and "
+                              f"{rng.choice(SKILLS)}, improving turnaround by {rng.randint(5, 60)}%")
+            written += 1
+        written += 2
+        job += 1
+
+    doc.add_paragraph("Education")
+    doc.add_paragraph("B.S. Statistics, State University")
+    return doc
+
+
+def save_resume(path, pages=2, seed=0):
+    """
+    Builds a synthetic resume with make_resume and saves it to path.
+    """
+    make_resume(pages, seed).save(path)
+    return path
+
+
+def make_job_description(seed=0, skills=8):
+    """
+    Builds a synthetic job description mentioning a random sample of skills.
+    Args:
+        seed: The random seed.
+        skills: The number of skills the posting asks for.
+    Returns:
+        The job description text.
+    """
+    rng = random.Random(seed)
+    wanted = rng.sample(SKILLS, skills)
+    lines = [f"Data Analyst {seed}", "We are hiring an analyst to join our growing data team.", "Requirements:"]
+    lines.extend(f"- Experience with {skill}" for skill in wanted)
+    lines.append(f"- {rng.randint(2, 8)}+ years of experience {rng.choice(VERBS).lower()} {rng.choice(OBJECTS)}")
+    return "\n".join(lines)
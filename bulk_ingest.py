@@ -0,0 +1,157 @@
+import hashlib
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from resume_parser import ParsedResume, extract_sections
+from uploads import save_upload
+
+
+class IngestedResume:
+    def __init__(self, source, parsed=None, error=None, resume_file_path=None):
+        """
+        The outcome of parsing one document during bulk ingestion.
+        Args:
+            source: The document's path relative to the ingested directory, or its name inside the zip archive.
+            parsed: The ParsedResume, or None if parsing failed.
+            error: The error message if parsing failed, or None.
+            resume_file_path: A path the document can be opened from later (e.g. by process_resume), or None for
+                              zip members that weren't extracted.
+        """
+        self.source = source
+        self.parsed = parsed
+        self.error = error
+        self.resume_file_path = resume_file_path
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = "ok" if self.ok else f"error={self.error!r}"
+        return f"IngestedResume({self.source!r}, {status})"
+
+
+def iter_documents(source):
+    """
+    Lists the .docx documents in a directory tree or a zip archive, without reading them.
+    Word's "~$" lock files and hidden files are skipped.
+    Args:
+        source: A directory or .zip path.
+    Yields:
+        (name, path) for directory entries or (name, None) for zip members, in sorted order.
+    """
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in sorted(archive.infolist(), key=lambda info: info.filename):
+                if not info.is_dir() and _is_document(info.filename):
+                    yield info.filename, None
+        return
+    for directory, subdirectories, files in os.walk(source):
+        subdirectories[:] = sorted(name for name in subdirectories if not name.startswith("."))
+        for name in sorted(files):
+            if _is_document(name):
+                path = os.path.join(directory, name)
+                yield os.path.relpath(path, source), path
+
+
+def _is_document(name):
+    base = os.path.basename(name)
+    return base.lower().endswith(".docx") and not base.startswith(("~$", "."))
+
+
+def _parse_document(name, path, data, headings):
+    """
+    Parses one document in a worker process. Only plain data crosses the process boundary.
+    Returns:
+        (name, ParsedResume.to_dict() or None, error message or None)
+    """
+    import docx  # imported in the workers only; python-docx is slow to import
+
+    try:
+        if data is None:
+            with open(path, "rb") as file:
+                data = file.read()
+        parsed = extract_sections(docx.Document(io.BytesIO(data)), hashlib.sha256(data).hexdigest(), headings)
+        return name, parsed.to_dict(), None
+    except Exception as exc:  # a corrupt or non-Word file shouldn't end the run
+        return name, None, f"{type(exc).__name__}: {exc}"
+
+
+def ingest(source, workers=None, max_in_flight=None, headings=None, extract_dir=None):
+    """
+    Parses every .docx resume in a directory tree or zip archive in a process pool (python-docx parsing is
+    CPU-bound, so threads would serialize on the GIL). Documents are submitted as earlier ones finish, so at most
+    max_in_flight are read into memory or waiting in the pool at once, however large the source is.
+    Args:
+        source: A directory or .zip path.
+        workers: The number of worker processes. Defaults to the number of CPUs.
+        max_in_flight: The maximum number of documents submitted and not yet yielded. Defaults to 4 per worker.
+        headings: Optional; the section headings to split on (see resume_parser.heading_lookup).
+        extract_dir: Optional; for zip archives, a directory to save each member to (under its content hash) so
+                     it can be sent through process_resume later.
+    Yields:
+        An IngestedResume per document, in the order they finish parsing.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    archive = zipfile.ZipFile(source) if zipfile.is_zipfile(source) else None
+    documents = iter_documents(source)
+    paths = {}
+    pending = set()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                for name, path in documents:
+                    data = None
+                    if archive is not None:
+                        data = archive.read(name)
+                        if extract_dir is not None:
+                            path = save_upload(data, extract_dir)
+                    paths[name] = path
+                    pending.add(executor.submit(_parse_document, name, path if data is None else None, data,
+                                                  headings))
+                    if len(pending) >= max_in_flight:
+                        break
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, parsed, error = future.result()
+                    yield IngestedResume(name, ParsedResume.from_dict(parsed) if parsed is not None else None, error,
+                                         paths.pop(name))
+    finally:
+        if archive is not None:
+            archive.close()
+
+
+def ingest_to_index(index, source, workers=None, max_in_flight=None, headings=None, extract_dir=None,
+                    batch_size=500):
+    """
+    Ingests a directory tree or zip archive of resumes into a match_index.MatchIndex, writing the parsed records
+    in batches of batch_size (one SQLite transaction each). Candidate ids are the documents' relative paths or
+    zip member names.
+    Args:
+        index: The MatchIndex to store the resumes in.
+        batch_size: The number of records written per transaction.
+        The other arguments are passed to ingest.
+    Returns:
+        A dict with the number of documents ingested and failed, and the failures as {source: error}.
+    """
+    batch = []
+    ingested = 0
+    failures = {}
+    for record in ingest(source, workers, max_in_flight, headings, extract_dir):
+        if not record.ok:
+            failures[record.source] = record.error
+            continue
+        batch.append((record.source, record.parsed, record.resume_file_path))
+        if len(batch) >= batch_size:
+            index.add_parsed_resumes(batch)
+            ingested += len(batch)
+            batch = []
+    if batch:
+        index.add_parsed_resumes(batch)
+        ingested += len(batch)
+    return {"ingested": ingested, "failed": len(failures), "failures": failures}
@@ -0,0 +1,198 @@
+"""
+Headless command-line entry point for tailoring resumes, without the PyQt5 GUI.
+
+Usage:
+    python cli.py tailor --resume resume.docx --jd job.txt [--no-review] [--json]
+    python cli.py batch --resume resume.docx job1.txt job2.txt ... [--workers 8] [--top-k 5 | --dedup | --batch-api]
+    python cli.py serve --port 8080 [--workers 4]
+    python cli.py ingest resumes/ (or resumes.zip) --index candidates.sqlite3 [--workers 8]
+
+Every command takes --keyword-mode, --structured, --cascade, --compact, --incremental, --speculative-review and the
+client options; see --help.
+The API key (not needed by ingest) is read from --api-key, the OPENAI_API_KEY environment variable or config.py, in that order.
+"""
+import argparse
+import json
+import sys
+
+from resume_app_class_only import ResumeProcessor, KEYWORD_MODES
+from response_cache import ResponseCache, DEFAULT_CACHE_PATH
+from rate_limiting import RateLimiter, RATE_LIMITS, load_api_key, make_openai_client
+
+
+def build_processor(args):
+    """
+    Builds the ResumeProcessor (client, cache, rate limiter and options) a command runs on.
+    """
+    cascade = None
+    if args.cascade:
+        from model_cascade import CascadeRouter
+        cascade = CascadeRouter()
+    try:
+        api_key = args.api_key or load_api_key()
+    except RuntimeError as exc:
+        raise SystemExit(str(exc)) from None
+    client = make_openai_client(api_key, base_url=args.base_url, timeout=args.timeout,
+                                max_connections=args.max_connections)
+    cache = ResponseCache(None if args.no_cache_file else args.cache)
+    log_sink = None
+    if args.log_file:
+        from conversation_log import JsonlLogSink
+        log_sink = JsonlLogSink(args.log_file)
+    return ResumeProcessor(client, cache=cache, log_sink=log_sink, keyword_mode=args.keyword_mode, compact_prompts=args.compact,
+                           token_budget=args.token_budget, structured_outputs=args.structured,
+                           rate_limiter=RateLimiter(RATE_LIMITS if args.throttle else None, timeout=args.timeout),
+                           cascade=cascade,
+                           incremental=args.incremental, speculative_review=args.speculative_review)
+
+
+def read_text(path):
+    if path == "-":
+        return sys.stdin.read()
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def tailor(processor, args):
+    result = processor.process_job(read_text(args.jd), args.resume, review=not args.no_review)
+    if args.json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        print("Keywords Extracted:\n" + ", ".join(result.keywords or []))
+        print("\nProcessed Resume:\n" + (result.processed_resume or ""))
+        if result.review_response:
+            print("\nReview Response:\n" + result.review_response)
+        if not result.ok:
+            print(f"\nFailed: {result.error!r}", file=sys.stderr)
+    return 0 if result.ok else 1
+
+
+def batch(processor, args):
+    job_descriptions = [read_text(path) for path in args.jds]
+    if args.dedup:
+        results = processor.process_deduplicated(job_descriptions, args.resume, args.workers, not args.no_review,
+                                                 args.dedup_threshold)
+    elif args.batch_api:
+        results = processor.process_batch_api(job_descriptions, args.resume, not args.no_review, args.poll_interval)
+    elif args.top_k:
+        results = processor.process_top_matches(job_descriptions, args.resume, args.top_k, args.workers,
+                                                not args.no_review)
+    else:
+        results = processor.process_batch(job_descriptions, args.resume, args.workers, not args.no_review)
+    failed = 0
+    for result in results:
+        failed += not result.ok
+        print(json.dumps(dict(result.to_dict(), file=args.jds[result.index])), flush=True)
+    if processor.dedup_report is not None:
+        print(processor.dedup_report.summary(), file=sys.stderr)
+    return 1 if failed else 0
+
+
+def serve(processor, args):
+    from worker_service import TailoringService, make_server
+
+    service = TailoringService(processor, workers=args.workers, max_queued=args.max_queued,
+                               resume_dir=args.resume_dir).start()
+    server = make_server(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_port} with {args.workers} workers", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+    return 0
+
+
+def ingest(args):
+    from bulk_ingest import ingest_to_index
+    from match_index import MatchIndex
+
+    index = MatchIndex(args.index)
+    try:
+        summary = ingest_to_index(index, args.source, args.workers, args.max_in_flight, extract_dir=args.extract_dir)
+    finally:
+        index.close()
+    for source, error in summary["failures"].items():
+        print(f"{source}: {error}", file=sys.stderr)
+    print(f"Ingested {summary['ingested']} resumes into {args.index} ({summary['failed']} failed)", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Tailor a resume to job descriptions without the GUI.")
+    parser.add_argument("--api-key", help="OpenAI API key (defaults to OPENAI_API_KEY, then config.py)")
+    parser.add_argument("--base-url", help="API base URL, e.g. of a local fake server")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--max-connections", type=int, default=20, help="size of the HTTP connection pool")
+    parser.add_argument("--throttle", action="store_true",
+                        help="throttle to OpenAI's usage tier 1 rate limits (rate_limiting.RATE_LIMITS)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="response cache file")
+    parser.add_argument("--no-cache-file", action="store_true", help="only cache responses in memory")
+    parser.add_argument("--keyword-mode", choices=KEYWORD_MODES, default="llm")
+    parser.add_argument("--structured", action="store_true", help="ask every stage for JSON replies")
+    parser.add_argument("--cascade", action="store_true", help="try the cheap model first and escalate on failure")
+    parser.add_argument("--compact", action="store_true", help="compact the prompts")
+    parser.add_argument("--token-budget", type=int, help="token budget for compacted prompts")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-send resume items and experiences that changed since the last run")
+    parser.add_argument("--speculative-review", action="store_true",
+                        help="review the original resume while it is being tailored, then reuse or update the review")
+    parser.add_argument("--log-file", help="append the conversation log to this rotating JSONL file")
+    parser.add_argument("--metrics", choices=("json", "prometheus"), help="print the metrics to stderr at the end")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    tailor_parser = commands.add_parser("tailor", help="tailor the resume to one job description")
+    tailor_parser.add_argument("--resume", required=True, help=".docx resume")
+    tailor_parser.add_argument("--jd", required=True, help="job description text file, or - for stdin")
+    tailor_parser.add_argument("--no-review", action="store_true")
+    tailor_parser.add_argument("--json", action="store_true", help="print the result as JSON")
+
+    batch_parser = commands.add_parser("batch", help="tailor the resume to many job descriptions, one JSON line each")
+    batch_parser.add_argument("--resume", required=True, help=".docx resume")
+    batch_parser.add_argument("jds", nargs="+", help="job description text files")
+    batch_parser.add_argument("--workers", type=int, default=8)
+    selection = batch_parser.add_mutually_exclusive_group()
+    selection.add_argument("--top-k", type=int, help="only process the top-k local matches")
+    selection.add_argument("--dedup", action="store_true",
+                           help="process near-identical job descriptions once and share the result")
+    selection.add_argument("--batch-api", action="store_true",
+                           help="send the requests through the OpenAI Batch API: half the cost, results within 24h")
+    batch_parser.add_argument("--poll-interval", type=float, default=60.0,
+                              help="seconds between Batch API status checks")
+    batch_parser.add_argument("--dedup-threshold", type=float, default=0.8,
+                              help="word-shingle Jaccard similarity at which job descriptions count as duplicates")
+    batch_parser.add_argument("--no-review", action="store_true")
+
+    serve_parser = commands.add_parser("serve", help="run the HTTP worker service")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument("--workers", type=int, default=4)
+    serve_parser.add_argument("--max-queued", type=int, default=100)
+    serve_parser.add_argument("--resume-dir",
+                              help="directory requests may name resumes in with resume_path (uploads only otherwise)")
+
+    ingest_parser = commands.add_parser("ingest", help="parse a directory or zip of .docx resumes into a match index")
+    ingest_parser.add_argument("source", help="directory or .zip archive of .docx resumes")
+    ingest_parser.add_argument("--index", required=True, help="SQLite match index file to write to")
+    ingest_parser.add_argument("--workers", type=int, help="parser processes (defaults to the number of CPUs)")
+    ingest_parser.add_argument("--max-in-flight", type=int, help="documents parsed or queued at once")
+    ingest_parser.add_argument("--extract-dir", help="save zip members here so they can be tailored later")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "ingest":
+        return ingest(args)
+    processor = build_processor(args)
+    command = {"tailor": tailor, "batch": batch, "serve": serve}[args.command]
+    status = command(processor, args)
+    if args.metrics:
+        print(processor.export_metrics(args.metrics), file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+DEFAULT_LOG_PATH = os.path.join(os.path.expanduser("~"), ".resume_fix_app", "conversation_log.jsonl")
+
+
+class LogRecord:
+    def __init__(self, text, stage="unlabeled", timestamp=None, session=None):
+        """
+        One conversation log entry.
+        Args:
+            text: The logged text.
+            stage: The processing step that wrote it.
+            timestamp: Optional; seconds since the epoch. Defaults to now.
+            session: Optional; the id of the ConversationLog that wrote it.
+        """
+        self.text = text
+        self.stage = stage
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.session = session
+
+    @property
+    def size(self):
+        return len(self.text)
+
+    def to_dict(self):
+        return {"timestamp": self.timestamp, "session": self.session, "stage": self.stage, "size": self.size,
+                "text": self.text}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["text"], data.get("stage", "unlabeled"), data.get("timestamp"), data.get("session"))
+
+
+class JsonlLogSink:
+    def __init__(self, path=DEFAULT_LOG_PATH, max_bytes=10 * 1024 * 1024, backups=3):
+        """
+        Appends log records to a JSONL file as they are written, rotating it (path -> path.1 -> ... -> path.N)
+        when it grows past max_bytes, so the log on disk stays bounded too.
+        Args:
+            path: The log file path.
+            max_bytes: The size at which the file is rotated.
+            backups: The number of rotated files kept.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        line = json.dumps(record.to_dict()) + "\n"
+        with self._lock:
+            if self._file.tell() + len(line) > self.max_bytes and self._file.tell():
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else f"{self.path}.{index - 1}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index}")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def read(self, session=None):
+        """
+        Yields the stored records oldest first, optionally only those of one session, without loading the files
+        into memory.
+        """
+        with self._lock:
+            self._file.flush()
+            paths = [f"{self.path}.{index}" for index in range(self.backups, 0, -1)] + [self.path]
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = LogRecord.from_dict(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue  # a line cut short by a crash
+                    if session is None or record.session == session:
+                        yield record
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ConversationLog:
+    def __init__(self, sink=None, max_records=1000, session=None):
+        """
+        A bounded conversation log. The latest max_records records are kept in memory (for views such as the GUI
+        and for a job's result); every record is also written through to the sink, if any, as it is logged.
+        Iterating yields the texts of the records in memory, so the log can be used like the list it replaces.
+        Args:
+            sink: Optional; a JsonlLogSink (or any object with write(record) and read(session)) to store the full
+                  log in.
+            max_records: The size of the in-memory ring buffer.
+            session: Optional; the id stamped on this log's records. Defaults to a new random id.
+        """
+        self.sink = sink
+        self.session = session or uuid.uuid4().hex[:12]
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def append(self, text, stage="unlabeled"):
+        record = LogRecord(text, stage, session=self.session)
+        with self._lock:
+            self._records.append(record)
+        if self.sink is not None:
+            self.sink.write(record)
+        return record
+
+    def records(self, complete=False):
+        """
+        Returns the records of this log, oldest first: the in-memory ones, or with complete=True every record of
+        this session in the sink (as a generator).
+        """
+        if complete and self.sink is not None:
+            return self.sink.read(self.session)
+        with self._lock:
+            return list(self._records)
+
+    def write_to(self, file, complete=True):
+        """
+        Writes the log texts to an open text file one record at a time.
+        """
+        for index, record in enumerate(self.records(complete)):
+            if index:
+                file.write("\n")
+            file.write(record.text)
+
+    def __deepcopy__(self, memo):
+        # The copy keeps its own in-memory records but shares the sink (an open file) and the session
+        copied = ConversationLog(self.sink, self._records.maxlen, self.session)
+        copied._records.extend(self.records())
+        return copied
+
+    def __iter__(self):
+        return iter([record.text for record in self.records()])
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
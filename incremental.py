@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+
+from keyword_extractor import merge_keywords
+from resume_parser import WORK_EXPERIENCE
+from response_cache import ResponseCache
+
+# Bump whenever the item prompt or the stored output layout change, so outputs stored by older versions are ignored.
+ITEM_PROMPT_VERSION = 1
+
+# The number of prior fix_resume outputs kept per job description and processed resume
+MAX_FIX_HISTORY = 5
+
+# The store's file name when it is kept next to a response cache file (see IncrementalStore.beside)
+STORE_FILE_NAME = "incremental_outputs.sqlite3"
+
+
+class ResumeItem:
+    def __init__(self, item_id, kind, text, employer=None):
+        """
+        One independently tailorable piece of a resume.
+        Args:
+            item_id: The item's id in prompts and replies.
+            kind: "skill" or "bullet".
+            text: The item text.
+            employer: For bullets, the employer/title line the bullet sits under, sent along as context.
+        """
+        self.id = item_id
+        self.kind = kind
+        self.text = text
+        self.employer = employer
+
+    def to_prompt(self):
+        item = {"id": self.id, "kind": self.kind, "text": self.text}
+        if self.employer:
+            item["employer"] = self.employer
+        return item
+
+
+def resume_items(parsed):
+    """
+    Splits a parsed resume into its skills and Work Experience bullets.
+    Returns:
+        A list of ResumeItem objects in document order, and the Work Experience lines as (employer line, bullets)
+        blocks for putting the tailored resume back together.
+    """
+    items = [ResumeItem(f"s{index}", "skill", skill) for index, skill in enumerate(parsed.skills)]
+    blocks = []
+    employer = None
+    for line in parsed.sections.get(WORK_EXPERIENCE, []):
+        if line in parsed.subheadings:
+            employer = line
+            blocks.append((line, []))
+            continue
+        if not blocks:
+            blocks.append((None, []))
+        item = ResumeItem(f"b{len(items)}", "bullet", line, employer)
+        items.append(item)
+        blocks[-1][1].append(item)
+    return items, blocks
+
+
+def item_key(item, keywords, model):
+    """
+    The store key of an item's tailored output: a hash of everything the output depends on.
+    """
+    payload = json.dumps([ITEM_PROMPT_VERSION, model, item.kind, item.text, item.employer,
+                          [keyword.casefold() for keyword in keywords]])
+    return "item:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IncrementalStore:
+    def __init__(self, path=None, max_memory_entries=4096, max_disk_entries=100000):
+        """
+        Keeps prior tailoring outputs per resume item and per fix_resume input, so a re-run only sends what changed.
+        The outputs live in their own two-tier store rather than the response cache, so they neither evict cached
+        completions nor count in its hit rate. Entries don't expire; the least recently used go first.
+        Args:
+            path: Optional; a SQLite file to keep the outputs in across sessions. When None, they only live in memory.
+            max_memory_entries: The maximum number of outputs kept in memory.
+            max_disk_entries: The maximum number of outputs kept in the file.
+        """
+        self.path = path
+        self.cache = ResponseCache(path, max_memory_entries, max_disk_entries, ttl=None)
+
+    @classmethod
+    def beside(cls, cache, **limits):
+        """
+        Creates a store in the same directory as a response cache's file, or in memory if the cache has no file.
+        """
+        path = None if cache.path is None else os.path.join(os.path.dirname(cache.path), STORE_FILE_NAME)
+        return cls(path, **limits)
+
+    def stats(self):
+        return self.cache.stats()
+
+    def close(self):
+        self.cache.close()
+
+    def split(self, items, keywords, model):
+        """
+        Separates the items whose output is stored from those that have to be sent.
+        Returns:
+            A dict mapping the ids of stored items to their output, and the list of items to send.
+        """
+        keywords = merge_keywords(keywords) if not isinstance(keywords, str) else [keywords]
+        stored = {}
+        changed = []
+        for item in items:
+            output = self.cache.get(item_key(item, keywords, model))
+            if output is None:
+                changed.append(item)
+            else:
+                stored[item.id] = output
+        return stored, changed
+
+    def store(self, items, outputs, keywords, model):
+        keywords = merge_keywords(keywords) if not isinstance(keywords, str) else [keywords]
+        for item in items:
+            if item.id in outputs:
+                self.cache.set(item_key(item, keywords, model), outputs[item.id])
+
+    def _fix_key(self, job_description, processed_resume, model):
+        payload = json.dumps([ITEM_PROMPT_VERSION, model, job_description, processed_resume])
+        return "fix:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def prior_fix(self, job_description, processed_resume, new_experiences, model):
+        """
+        Finds the stored fix_resume output that already covers the most of the given experiences.
+        Returns:
+            (fixed resume, the experience lines it doesn't cover yet), or (None, all experience lines).
+        """
+        lines = experience_lines(new_experiences)
+        history = json.loads(self.cache.get(self._fix_key(job_description, processed_resume, model)) or "[]")
+        best = None
+        for entry in history:
+            covered = set(entry["experiences"])
+            if covered.issubset(lines) and (best is None or len(covered) > len(best["experiences"])):
+                best = entry
+        if best is None:
+            return None, lines
+        return best["fixed"], [line for line in lines if line not in set(best["experiences"])]
+
+    def store_fix(self, job_description, processed_resume, new_experiences, model, fixed_resume):
+        key = self._fix_key(job_description, processed_resume, model)
+        history = json.loads(self.cache.get(key) or "[]")
+        lines = experience_lines(new_experiences)
+        history = [entry for entry in history if entry["experiences"] != lines]
+        history.append({"experiences": lines, "fixed": fixed_resume})
+        self.cache.set(key, json.dumps(history[-MAX_FIX_HISTORY:]))
+
+
+def experience_lines(new_experiences):
+    return [line.strip() for line in (new_experiences or "").splitlines() if line.strip()]
+
+
+def render_items(items, blocks, outputs):
+    """
+    Puts a tailored resume back together from per-item outputs, in document order. Removed items (empty outputs)
+    are left out, and so are employer lines with no bullets left.
+    """
+    skills = [outputs.get(item.id, item.text) for item in items if item.kind == "skill"]
+    lines = []
+    for employer, bullets in blocks:
+        kept = [outputs.get(item.id, item.text) for item in bullets]
+        kept = [text for text in kept if text]
+        if kept:
+            lines.extend(([employer] if employer else []) + kept)
+    return "Key Skills:\n" + "\n".join(skill for skill in skills if skill) + "\n\nWork Experience:\n" + "\n".join(lines)
@@ -0,0 +1,175 @@
+import hashlib
+import re
+
+import numpy as np
+
+# Multiply-shift hashing over 64-bit words: h(x) = ((a * x + b) mod 2**64) >> 32, with a odd
+_MASK = (1 << 64) - 1
+
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text, size=5):
+    """
+    Splits a text into its set of overlapping word n-grams, ignoring case, punctuation and whitespace.
+    Texts shorter than size words become a single shingle.
+    """
+    words = _WORD.findall(text.casefold())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[start:start + size]) for start in range(len(words) - size + 1)}
+
+
+def jaccard(first, second):
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+class MinHasher:
+    def __init__(self, num_perm=128, seed=1):
+        """
+        Computes MinHash signatures of shingle sets; the fraction of equal signature entries of two sets estimates
+        their Jaccard similarity.
+        Args:
+            num_perm: The signature length.
+            seed: Seeds the hash functions, so signatures are comparable across runs.
+        """
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set):
+        values = np.array([int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+                           for shingle in shingle_set], dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            hashed = (self._a[:, None] * values[None, :] + self._b[:, None]) >> np.uint64(32)
+        return hashed.min(axis=1)
+
+
+class LSHIndex:
+    def __init__(self, bands=32, rows=4):
+        """
+        Buckets MinHash signatures band by band, so near-duplicates are found without comparing every pair.
+        Two sets with Jaccard similarity s share a bucket with probability 1 - (1 - s**rows)**bands.
+        Args:
+            bands: The number of bands; bands * rows has to equal the signature length.
+            rows: The signature entries per band.
+        """
+        self.bands = bands
+        self.rows = rows
+        self._buckets = [{} for _ in range(bands)]
+
+    def insert(self, key, signature):
+        """
+        Adds a signature to the index.
+        Returns:
+            The keys already in the index that share at least one bucket with it.
+        """
+        candidates = set()
+        for band, buckets in enumerate(self._buckets):
+            bucket = buckets.setdefault(signature[band * self.rows:(band + 1) * self.rows].tobytes(), [])
+            candidates.update(bucket)
+            bucket.append(key)
+        return candidates
+
+
+class JobCluster:
+    def __init__(self, representative, members, similarity):
+        """
+        A group of near-duplicate job descriptions.
+        Args:
+            representative: The index of the job description sent through the pipeline for the whole cluster
+                            (the first one in input order).
+            members: The indexes of every job description in the cluster, representative first.
+            similarity: The lowest Jaccard similarity between a member and the member it was matched to.
+        """
+        self.representative = representative
+        self.members = members
+        self.similarity = similarity
+
+    @property
+    def duplicates(self):
+        return self.members[1:]
+
+    def __repr__(self):
+        return f"JobCluster(representative={self.representative}, members={self.members})"
+
+
+class DedupReport:
+    def __init__(self, total, clusters, api_calls, calls_saved):
+        """
+        Summarizes a deduplicated run.
+        Args:
+            total: The number of job descriptions given.
+            clusters: The number of clusters, i.e. the job descriptions actually processed.
+            api_calls: The API calls the representatives made.
+            calls_saved: The API calls the duplicates would have made, estimated from the representatives' average.
+        """
+        self.total = total
+        self.clusters = clusters
+        self.api_calls = api_calls
+        self.calls_saved = calls_saved
+
+    @property
+    def duplicates(self):
+        return self.total - self.clusters
+
+    @property
+    def dedup_ratio(self):
+        """
+        The fraction of job descriptions that didn't need their own run.
+        """
+        return self.duplicates / self.total if self.total else 0.0
+
+    def to_dict(self):
+        return {"job_descriptions": self.total, "clusters": self.clusters, "duplicates": self.duplicates,
+                "dedup_ratio": round(self.dedup_ratio, 4), "api_calls": self.api_calls,
+                "api_calls_saved": self.calls_saved}
+
+    def summary(self):
+        return (f"Deduplication: {self.total} job descriptions in {self.clusters} clusters "
+                f"({self.dedup_ratio:.0%} duplicates), {self.api_calls} API calls made, "
+                f"~{self.calls_saved} saved")
+
+
+def cluster_job_descriptions(job_descriptions, threshold=0.8, shingle_size=5, num_perm=128, bands=32):
+    """
+    Groups near-identical job descriptions (reposts, the same role in several cities, agency copies).
+    MinHash/LSH proposes candidate pairs and their exact shingle Jaccard similarity confirms them, so the cost grows
+    with the number of job descriptions rather than the number of pairs.
+    Args:
+        job_descriptions: A list of job description strings.
+        threshold: The Jaccard similarity of word shingles at which two job descriptions count as duplicates.
+        shingle_size: The number of words per shingle.
+        num_perm: The MinHash signature length.
+        bands: The number of LSH bands (num_perm has to be divisible by it).
+    Returns:
+        A list of JobCluster objects ordered by their representative's index; every index appears in exactly one.
+    """
+    hasher = MinHasher(num_perm)
+    index = LSHIndex(bands, num_perm // bands)
+    shingle_sets = [shingles(job_description, shingle_size) for job_description in job_descriptions]
+    parents = list(range(len(shingle_sets)))
+    similarities = {}
+
+    def find(item):
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    for position, shingle_set in enumerate(shingle_sets):
+        for candidate in sorted(index.insert(position, hasher.signature(shingle_set))):
+            similarity = jaccard(shingle_set, shingle_sets[candidate])
+            if similarity >= threshold:
+                root, other = sorted((find(candidate), find(position)))
+                parents[other] = root
+                similarities[position] = min(similarities.get(position, 1.0), similarity)
+
+    groups = {}
+    for position in range(len(shingle_sets)):
+        groups.setdefault(find(position), []).append(position)
+    return [JobCluster(members[0], members, min((similarities.get(member, 1.0) for member in members), default=1.0))
+            for _, members in sorted(groups.items())]
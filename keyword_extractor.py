@@ -0,0 +1,167 @@
+import os
+import threading
+from collections import deque
+
+VOCABULARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ats_terms.txt")
+
+_default_extractor = None
+_default_lock = threading.Lock()
+
+
+def load_vocabulary(path=VOCABULARY_PATH):
+    """
+    Reads a vocabulary file of ATS terms.
+    Each non-empty, non-comment line is a term; "alias => Term" lines map an alias to a canonical term.
+    Args:
+        path: A string path to the vocabulary file. Defaults to the bundled ats_terms.txt.
+    Returns:
+        A dict mapping every term and alias to its canonical term.
+    """
+    vocabulary = {}
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            alias, _, canonical = line.partition("=>")
+            alias = alias.strip()
+            vocabulary[alias] = canonical.strip() or alias
+    return vocabulary
+
+
+class KeywordExtractor:
+    def __init__(self, vocabulary=None):
+        """
+        Builds an Aho-Corasick automaton over a vocabulary of known ATS terms, for extracting keywords
+        from a job description locally in a single pass over the text.
+        Args:
+            vocabulary: Optional; an iterable of terms, or a dict mapping terms and aliases to canonical terms.
+                        Defaults to the bundled ats_terms.txt vocabulary.
+        """
+        if vocabulary is None:
+            vocabulary = load_vocabulary()
+        if not isinstance(vocabulary, dict):
+            vocabulary = {term: term for term in vocabulary}
+        self.vocabulary = vocabulary
+
+        # Trie nodes are dicts of character -> node index; output[i] holds (length, term) for patterns ending at i
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for alias, canonical in vocabulary.items():
+            self._add(alias.casefold(), canonical)
+        self._link()
+
+    def _add(self, pattern, term):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(pattern), term))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child].extend(self._output[self._fail[child]])
+
+    def find(self, text):
+        """
+        Finds every vocabulary term in a text, matched case-insensitively on word boundaries.
+        Overlapping matches are resolved leftmost-longest, so "Machine Learning" wins over "Learning".
+        Args:
+            text: The text to search.
+        Returns:
+            A list of (start, end, term) tuples in text order, where term is the canonical term.
+        """
+        folded = text.casefold()
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        matches = []
+        node = 0
+        for index, char in enumerate(folded):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, term in output[node]:
+                start = index - length + 1
+                end = index + 1
+                if _is_boundary(folded, start - 1) and _is_boundary(folded, end):
+                    matches.append((start, end, term))
+
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        selected = []
+        last_end = 0
+        for start, end, term in matches:
+            if start >= last_end:
+                selected.append((start, end, term))
+                last_end = end
+        return selected
+
+    def extract(self, text):
+        """
+        Extracts the known keywords present in a text.
+        Args:
+            text: The job description text.
+        Returns:
+            A list of canonical terms in order of first appearance, without duplicates.
+        """
+        seen = {}
+        for _, _, term in self.find(text):
+            seen.setdefault(term, None)
+        return list(seen)
+
+    def unmatched_lines(self, text):
+        """
+        Returns the non-empty lines of a text that contain no known term, i.e. what the local extractor
+        could not classify and an LLM might still find keywords in.
+        """
+        return [line.strip() for line in text.splitlines() if line.strip() and not self.find(line)]
+
+
+def _is_boundary(text, index):
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+def get_default_extractor():
+    """
+    Returns a shared KeywordExtractor over the bundled vocabulary, building it on first use.
+    """
+    global _default_extractor
+    with _default_lock:
+        if _default_extractor is None:
+            _default_extractor = KeywordExtractor()
+        return _default_extractor
+
+
+def normalize_keyword(keyword):
+    """
+    Normalizes a keyword as returned by the keyword extractors (LLM replies include stray spaces and bullets).
+    """
+    return " ".join(keyword.strip(" \t\r\n-•*.;:").split())
+
+
+def merge_keywords(*keyword_lists):
+    """
+    Merges keyword lists in order, normalizing each keyword and dropping case-insensitive duplicates and blanks.
+    """
+    merged = {}
+    for keywords in keyword_lists:
+        for keyword in keywords:
+            keyword = normalize_keyword(keyword)
+            if keyword:
+                merged.setdefault(keyword.casefold(), keyword)
+    return list(merged.values())
@@ -0,0 +1,342 @@
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from keyword_extractor import KeywordExtractor, merge_keywords
+from match_scoring import coverage_and_cosine, keyword_rows, term_counts, term_matrix
+from resume_parser import ParsedResume, parse_resume
+
+try:
+    from scipy import sparse
+except ImportError:  # SciPy is optional; dense NumPy matrices give the same scores for smaller stores
+    sparse = None
+
+
+class IndexedMatch:
+    def __init__(self, candidate_id, job_id, coverage, cosine, matched, missing):
+        """
+        Holds the local match score of one candidate's resume against one job description in a MatchIndex.
+        Args:
+            candidate_id: The candidate's id in the index.
+            job_id: The job description's id in the index.
+            coverage: Fraction of the job description's keywords found in the resume, from 0.0 to 1.0.
+            cosine: Cosine similarity between the job description's keyword vector and the resume's term counts.
+            matched: The job description keywords found in the resume.
+            missing: The job description keywords not found in the resume.
+        """
+        self.candidate_id = candidate_id
+        self.job_id = job_id
+        self.coverage = coverage
+        self.cosine = cosine
+        self.matched = matched
+        self.missing = missing
+
+    @property
+    def score(self):
+        """
+        The coverage as a 0-100 score, on the same scale review_resume asks the model for.
+        """
+        return round(self.coverage * 100)
+
+    def to_dict(self):
+        return {"candidate_id": self.candidate_id, "job_id": self.job_id, "score": self.score,
+                "coverage": round(self.coverage, 4), "cosine": round(self.cosine, 4), "missing": self.missing}
+
+    def __repr__(self):
+        return (f"IndexedMatch(candidate_id={self.candidate_id!r}, job_id={self.job_id!r}, score={self.score}, "
+                f"cosine={self.cosine:.3f}, missing={len(self.missing)})")
+
+
+class MatchIndex:
+    def __init__(self, path=None, section_headings=None):
+        """
+        An indexed store of many candidates' parsed resumes and many job descriptions' extracted keywords, for
+        scoring every candidate against every job description locally and retrieving the top-k matches either way.
+        Job descriptions are kept as an inverted keyword index (a sparse term-by-job matrix), and resumes as sparse
+        term-count vectors over the same keywords, so a whole block of candidates is scored with two sparse
+        matrix products.
+        Args:
+            path: Optional; a SQLite file to keep the resumes and keywords in, so the store survives restarts.
+                  When None, the store only lives in memory.
+            section_headings: Optional; the section headings to parse resumes with (see resume_parser).
+        """
+        self.path = path
+        self.section_headings = section_headings
+        self._resumes = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._matrices = None
+        self._resume_counts = {}
+        self._db = None
+
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS resumes ("
+                             "candidate_id TEXT PRIMARY KEY, resume_file_path TEXT, text TEXT NOT NULL, parsed TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS jobs ("
+                             "job_id TEXT PRIMARY KEY, job_description TEXT, keywords TEXT NOT NULL)")
+            # Indexes written before bulk ingestion have no parsed column
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(resumes)")]
+            if "parsed" not in columns:
+                self._db.execute("ALTER TABLE resumes ADD COLUMN parsed TEXT")
+            self._db.commit()
+            for candidate_id, resume_file_path, text in self._db.execute(
+                    "SELECT candidate_id, resume_file_path, text FROM resumes"):
+                self._resumes[candidate_id] = (resume_file_path, text)
+            for job_id, job_description, keywords in self._db.execute(
+                    "SELECT job_id, job_description, keywords FROM jobs"):
+                self._jobs[job_id] = (job_description, json.loads(keywords))
+
+    @property
+    def candidates(self):
+        with self._lock:
+            return list(self._resumes)
+
+    @property
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def resume_file_path(self, candidate_id):
+        with self._lock:
+            return self._resumes[candidate_id][0]
+
+    def job_description(self, job_id):
+        with self._lock:
+            return self._jobs[job_id][0]
+
+    def add_resume(self, candidate_id, resume_file_path):
+        """
+        Parses a .docx resume (memoized by content hash) and stores its text under a candidate id, replacing any
+        resume stored under that id.
+        """
+        parsed = parse_resume(resume_file_path, self.section_headings)
+        self.add_resume_text(candidate_id, parsed.text, resume_file_path)
+
+    def add_resume_text(self, candidate_id, text, resume_file_path=None):
+        """
+        Stores an already extracted resume text under a candidate id. Without a resume_file_path the candidate
+        can be scored but not sent through process_resume.
+        """
+        self._add_resumes([(candidate_id, resume_file_path, text, None)])
+
+    def add_parsed_resumes(self, records):
+        """
+        Stores many parsed resumes in one transaction (see bulk_ingest). The parsed sections are kept in the SQLite
+        file, if any, and can be read back with parsed_resume.
+        Args:
+            records: An iterable of (candidate id, ParsedResume, resume file path or None) tuples.
+        """
+        self._add_resumes([(candidate_id, resume_file_path, parsed.text, json.dumps(parsed.to_dict()))
+                           for candidate_id, parsed, resume_file_path in records])
+
+    def parsed_resume(self, candidate_id):
+        """
+        Returns the ParsedResume stored with add_parsed_resumes (or parses the candidate's file), or None.
+        """
+        with self._lock:
+            resume_file_path = self._resumes[candidate_id][0]
+            row = None
+            if self._db is not None:
+                row = self._db.execute("SELECT parsed FROM resumes WHERE candidate_id = ?", (candidate_id,)).fetchone()
+        if row is not None and row[0] is not None:
+            return ParsedResume.from_dict(json.loads(row[0]))
+        if resume_file_path is not None:
+            return parse_resume(resume_file_path, self.section_headings)
+        return None
+
+    def _add_resumes(self, rows):
+        with self._lock:
+            for candidate_id, resume_file_path, text, _ in rows:
+                self._resumes[candidate_id] = (resume_file_path, text)
+                self._resume_counts.pop(candidate_id, None)
+            if self._matrices is not None:
+                # Replaced rather than changed in place, since queries may still be scoring with the old matrices
+                self._matrices = dict(self._matrices, resumes=None)
+            if self._db is not None:
+                self._db.executemany("INSERT OR REPLACE INTO resumes (candidate_id, resume_file_path, text, parsed) "
+                                     "VALUES (?, ?, ?, ?)", rows)
+                self._db.commit()
+
+    def add_job(self, job_id, keywords, job_description=None):
+        """
+        Stores a job description's extracted keywords under a job id, replacing any stored under that id.
+        Args:
+            job_id: The id to store the job description under.
+            keywords: The list of keywords extracted from it (e.g. by ResumeProcessor.process_job_description).
+            job_description: Optional; the job description text, needed to send matches through the pipeline.
+        """
+        keywords = merge_keywords(keywords)
+        with self._lock:
+            self._jobs[job_id] = (job_description, keywords)
+            # New keywords change the term columns, so every resume is rescanned on the next query
+            self._matrices = None
+            self._resume_counts.clear()
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO jobs (job_id, job_description, keywords) VALUES (?, ?, ?)",
+                                 (job_id, job_description, json.dumps(keywords)))
+                self._db.commit()
+
+    def top_jobs(self, candidate_id, k=20):
+        """
+        Returns the k best-matching job descriptions for one candidate as IndexedMatch objects, best first.
+        """
+        return self.top_jobs_for_all(k, [candidate_id])[candidate_id]
+
+    def top_candidates(self, job_id, k=20):
+        """
+        Returns the k best-matching candidates for one job description as IndexedMatch objects, best first.
+        """
+        return self.top_candidates_for_all(k, [job_id])[job_id]
+
+    def top_jobs_for_all(self, k=20, candidate_ids=None, block_size=512):
+        """
+        Retrieves the top-k job descriptions for every candidate (or the given ones), scoring blocks of candidates
+        against all job descriptions at once so memory stays bounded by block_size x number of jobs.
+        Returns:
+            A dict mapping each candidate id to its list of IndexedMatch objects, best first (by coverage, then
+            cosine similarity).
+        """
+        matrices = self._build()
+        rows = [matrices["candidate_rows"][candidate_id] for candidate_id in (candidate_ids or matrices["candidates"])]
+        results = {}
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            coverage, cosine = self._score(matrices, block, None)
+            for position, row in enumerate(block):
+                results[matrices["candidates"][row]] = [
+                    self._match(matrices, row, column, coverage[position, column], cosine[position, column])
+                    for column in _top_k(coverage[position], cosine[position], k)]
+        return results
+
+    def top_candidates_for_all(self, k=20, job_ids=None, block_size=512):
+        """
+        Retrieves the top-k candidates for every job description (or the given ones).
+        Returns:
+            A dict mapping each job id to its list of IndexedMatch objects, best first.
+        """
+        matrices = self._build()
+        columns = [matrices["job_columns"][job_id] for job_id in (job_ids or matrices["jobs"])]
+        results = {}
+        for start in range(0, len(columns), block_size):
+            block = columns[start:start + block_size]
+            coverage, cosine = self._score(matrices, None, block)
+            for position, column in enumerate(block):
+                results[matrices["jobs"][column]] = [
+                    self._match(matrices, row, column, coverage[row, position], cosine[row, position])
+                    for row in _top_k(coverage[:, position], cosine[:, position], k)]
+        return results
+
+    def shortlist(self, k=20, by="candidate"):
+        """
+        The candidate and job description pairs worth sending through the LLM pipeline: each candidate's top-k job
+        descriptions (by="candidate") or each job description's top-k candidates (by="job").
+        Returns:
+            A list of IndexedMatch objects.
+        """
+        if by == "candidate":
+            ranked = self.top_jobs_for_all(k)
+        elif by == "job":
+            ranked = self.top_candidates_for_all(k)
+        else:
+            raise ValueError(f"by must be 'candidate' or 'job', not {by!r}")
+        return [match for matches in ranked.values() for match in matches]
+
+    def close(self):
+        """
+        Closes the SQLite connection, if any.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _build(self):
+        """
+        Builds (or completes) the job and resume matrices for the current store contents.
+        Returns:
+            A snapshot of the matrices and resume term counts that later writes leave untouched, so queries can
+            score it without holding the lock.
+        """
+        with self._lock:
+            if self._matrices is None:
+                self._matrices = self._build_jobs()
+            matrices = self._matrices
+            if matrices["resumes"] is None:
+                matrices = dict(matrices)
+                candidates = list(self._resumes)
+                for candidate_id in candidates:
+                    if candidate_id not in self._resume_counts:
+                        self._resume_counts[candidate_id] = self._count_terms(matrices, self._resumes[candidate_id][1])
+                matrices["candidates"] = candidates
+                matrices["candidate_rows"] = {candidate_id: row for row, candidate_id in enumerate(candidates)}
+                matrices["resume_counts"] = [self._resume_counts[candidate_id] for candidate_id in candidates]
+                matrices["resumes"] = term_matrix(matrices["resume_counts"], len(matrices["terms"]))
+                counts = matrices["resumes"]
+                matrices["presence"] = (counts > 0).astype(np.float64) if sparse is None else counts.sign()
+                squared = counts.multiply(counts) if sparse is not None else counts * counts
+                matrices["resume_norms"] = np.sqrt(np.asarray(squared.sum(axis=1)).ravel())
+                self._matrices = matrices
+            return matrices
+
+    def _build_jobs(self):
+        jobs = list(self._jobs)
+        terms, term_index, job_terms = keyword_rows([self._jobs[job_id][1] for job_id in jobs])
+        job_matrix = term_matrix(job_terms, len(terms))
+        keyword_counts = np.array([len(columns) for columns in job_terms], dtype=np.float64)
+        return {"jobs": jobs, "job_columns": {job_id: column for column, job_id in enumerate(jobs)},
+                "terms": terms, "term_index": term_index, "job_terms": [list(columns) for columns in job_terms],
+                # The inverted index: for each keyword, the job descriptions asking for it
+                "postings": job_matrix.T.tocsr() if sparse is not None else job_matrix.T,
+                "keyword_counts": keyword_counts,
+                "extractor": KeywordExtractor({term: term for term in terms}) if terms else None,
+                "resumes": None}
+
+    def _count_terms(self, matrices, text):
+        return term_counts(matrices["extractor"], matrices["term_index"], text)
+
+    def _score(self, matrices, rows, columns):
+        """
+        Scores the given candidate rows (or all) against the given job columns (or all).
+        Returns:
+            Dense coverage and cosine arrays of shape (candidates, jobs).
+        """
+        counts, presence, norms = matrices["resumes"], matrices["presence"], matrices["resume_norms"]
+        postings, keyword_counts = matrices["postings"], matrices["keyword_counts"]
+        if rows is not None:
+            counts, presence, norms = counts[rows], presence[rows], norms[rows]
+        if columns is not None:
+            postings, keyword_counts = postings[:, columns], keyword_counts[columns]
+        return coverage_and_cosine(_dense(presence @ postings), _dense(counts @ postings), keyword_counts,
+                                   norms[:, None])
+
+    def _match(self, matrices, row, column, coverage, cosine):
+        resume_counts = matrices["resume_counts"][row]
+        terms = matrices["terms"]
+        job_terms = matrices["job_terms"][column]
+        return IndexedMatch(matrices["candidates"][row], matrices["jobs"][column], float(coverage), float(cosine),
+                            [terms[term] for term in job_terms if term in resume_counts],
+                            [terms[term] for term in job_terms if term not in resume_counts])
+
+
+def _dense(matrix):
+    return matrix.toarray() if hasattr(matrix, "toarray") else np.asarray(matrix)
+
+
+def _top_k(coverage, cosine, k):
+    """
+    The indexes of the k highest (coverage, cosine) pairs, best first, without sorting the whole vector.
+    """
+    if k is None or k >= len(coverage):
+        candidates = np.arange(len(coverage))
+    else:
+        # Coverage ranks first; the cosine only breaks ties, so it is scaled below the smallest coverage step
+        candidates = np.argpartition(-(coverage + cosine * 1e-6), k - 1)[:k]
+    order = np.lexsort((-cosine[candidates], -coverage[candidates]))
+    return candidates[order].tolist()
@@ -0,0 +1,184 @@
+import numpy as np
+
+from keyword_extractor import KeywordExtractor, normalize_keyword
+
+try:
+    from scipy import sparse
+except ImportError:  # SciPy is optional; dense NumPy matrices give the same scores for small batches
+    sparse = None
+
+
+class MatchScore:
+    def __init__(self, index, coverage, cosine, matched, missing):
+        """
+        Holds the local match score of one resume against one job description.
+        Args:
+            index: Position of the job description in the scored batch.
+            coverage: Fraction of the job description's keywords found in the resume, from 0.0 to 1.0.
+            cosine: Cosine similarity between the job description's keyword vector and the resume's term counts.
+            matched: The job description keywords found in the resume.
+            missing: The job description keywords not found in the resume.
+        """
+        self.index = index
+        self.coverage = coverage
+        self.cosine = cosine
+        self.matched = matched
+        self.missing = missing
+
+    @property
+    def score(self):
+        """
+        The coverage as a 0-100 score, on the same scale review_resume asks the model for.
+        """
+        return round(self.coverage * 100)
+
+    def __repr__(self):
+        return (f"MatchScore(index={self.index}, score={self.score}, cosine={self.cosine:.3f}, "
+                f"missing={len(self.missing)})")
+
+
+class MatchScorer:
+    def __init__(self, keyword_lists):
+        """
+        Builds a sparse job-description-by-keyword matrix for scoring resumes against many job descriptions at once.
+        Args:
+            keyword_lists: A list with one list of keywords per job description.
+        """
+        self.terms, self._term_index, rows = keyword_rows(keyword_lists)
+        self.keyword_lists = [[self.terms[column] for column in row] for row in rows]
+        self.matrix = term_matrix(rows, len(self.terms))
+        self.keyword_counts = np.array([len(row) for row in rows], dtype=np.float64)
+        self._extractor = KeywordExtractor({term: term for term in self.terms}) if self.terms else None
+
+    def resume_vector(self, resume_text):
+        """
+        Counts how often each known keyword appears in a resume.
+        Args:
+            resume_text: The resume text.
+        Returns:
+            A NumPy vector of term counts aligned with self.terms.
+        """
+        vector = np.zeros(len(self.terms), dtype=np.float64)
+        for column, count in term_counts(self._extractor, self._term_index, resume_text).items():
+            vector[column] = count
+        return vector
+
+    def score(self, resume_text):
+        """
+        Scores a resume against every job description with two matrix-vector products.
+        Args:
+            resume_text: The resume text.
+        Returns:
+            A list of MatchScore objects, one per job description, in input order.
+        """
+        counts = self.resume_vector(resume_text)
+        present = (counts > 0).astype(np.float64)
+
+        hits = np.asarray(self.matrix @ present).ravel()
+        dots = np.asarray(self.matrix @ counts).ravel()
+        coverage, cosine = coverage_and_cosine(hits, dots, self.keyword_counts, np.linalg.norm(counts))
+
+        scores = []
+        for row, keywords in enumerate(self.keyword_lists):
+            matched = [keyword for keyword in keywords if present[self._term_index[keyword.casefold()]]]
+            missing = [keyword for keyword in keywords if not present[self._term_index[keyword.casefold()]]]
+            scores.append(MatchScore(row, float(coverage[row]), float(cosine[row]), matched, missing))
+        return scores
+
+
+def keyword_rows(keyword_lists):
+    """
+    Gives every distinct keyword (normalized, and compared case-insensitively) a column.
+    Args:
+        keyword_lists: A list with one list of keywords per job description.
+    Returns:
+        A (terms, term_index, rows) tuple: the keywords in column order, a dict mapping each casefolded keyword to
+        its column, and one {column: 1.0} dict per keyword list, in the list's order.
+    """
+    terms = []
+    term_index = {}
+    rows = []
+    for keywords in keyword_lists:
+        row = {}
+        for keyword in keywords:
+            keyword = normalize_keyword(keyword)
+            if not keyword:
+                continue
+            key = keyword.casefold()
+            if key not in term_index:
+                term_index[key] = len(terms)
+                terms.append(keyword)
+            row.setdefault(term_index[key], 1.0)
+        rows.append(row)
+    return terms, term_index, rows
+
+
+def term_matrix(rows, width):
+    """
+    Builds a (sparse when SciPy is installed) matrix from a list of {column: value} dicts.
+    """
+    indptr = [0]
+    indices = []
+    data = []
+    for row in rows:
+        indices.extend(row)
+        data.extend(row.values())
+        indptr.append(len(indices))
+    if sparse is not None:
+        return sparse.csr_matrix((np.array(data, dtype=np.float64), np.array(indices, dtype=np.int64),
+                                  np.array(indptr)), shape=(len(rows), width))
+    matrix = np.zeros((len(rows), width), dtype=np.float64)
+    for number, row in enumerate(rows):
+        matrix[number, list(row)] = list(row.values())
+    return matrix
+
+
+def term_counts(extractor, term_index, text):
+    """
+    Counts how often each keyword appears in a text.
+    Args:
+        extractor: A KeywordExtractor over the keywords, or None when there are none.
+        term_index: A dict mapping each casefolded keyword to its column.
+        text: The text, e.g. a resume.
+    Returns:
+        A dict mapping columns to counts, for the keywords that appear.
+    """
+    counts = {}
+    if extractor is not None:
+        for _, _, term in extractor.find(text):
+            column = term_index[term.casefold()]
+            counts[column] = counts.get(column, 0.0) + 1.0
+    return counts
+
+
+def coverage_and_cosine(hits, dots, keyword_counts, resume_norms):
+    """
+    Scores resumes against job descriptions from their keyword hits and dot products.
+    Args:
+        hits: How many of each job description's keywords each resume contains.
+        dots: The dot products of each job description's keyword vector with each resume's term counts.
+        keyword_counts: How many keywords each job description has.
+        resume_norms: The norm of each resume's term counts, shaped to broadcast against hits.
+    Returns:
+        A (coverage, cosine) pair of arrays shaped like hits.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage = np.where(keyword_counts > 0, hits / keyword_counts, 0.0)
+        scale = resume_norms * np.sqrt(keyword_counts)
+        cosine = np.where(scale > 0, dots / scale, 0.0)
+    return coverage, cosine
+
+
+def rank_matches(resume_text, keyword_lists, top_k=None):
+    """
+    Ranks job descriptions by how well a resume covers their keywords.
+    Args:
+        resume_text: The resume text.
+        keyword_lists: A list with one list of keywords per job description.
+        top_k: Optional; only return the best top_k matches.
+    Returns:
+        A list of MatchScore objects, best match first (by coverage, then cosine similarity).
+    """
+    scores = MatchScorer(keyword_lists).score(resume_text)
+    scores.sort(key=lambda match: (match.coverage, match.cosine), reverse=True)
+    return scores[:top_k] if top_k is not None else scores
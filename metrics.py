@@ -0,0 +1,426 @@
+import contextvars
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Estimated US dollars per 1M (prompt, completion) tokens. Models missing from the table are counted at zero cost.
+MODEL_PRICES = {
+    "gpt-3.5-turbo-0125": (0.50, 1.50),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4-turbo-2024-04-09": (10.00, 30.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+# Cached prompt tokens (see usage.prompt_tokens_details.cached_tokens) are billed at this fraction of the input price
+CACHED_PROMPT_PRICE = 0.5
+
+# Requests sent through the Batch API are billed at this fraction of the regular prices
+BATCH_PRICE = 0.5
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, math.inf)
+
+_current_stage = contextvars.ContextVar("resume_stage", default="unlabeled")
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens=0, batch=False):
+    """
+    Estimates the dollar cost of a call from its token counts.
+    Dated model names fall back to the price of their undated family (e.g. gpt-4o-2024-08-06 to gpt-4o).
+    cached_tokens, the part of prompt_tokens read from the provider's prompt cache, is billed at CACHED_PROMPT_PRICE.
+    A batch call, sent through the Batch API, is billed at BATCH_PRICE.
+    """
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        family = max((name for name in MODEL_PRICES if model.startswith(name)), key=len, default=None)
+        prices = MODEL_PRICES.get(family, (0.0, 0.0))
+    prompt_cost = (prompt_tokens - cached_tokens + cached_tokens * CACHED_PROMPT_PRICE) * prices[0]
+    cost = (prompt_cost + completion_tokens * prices[1]) / 1_000_000
+    return cost * BATCH_PRICE if batch else cost
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Counts observations into cumulative buckets, Prometheus style.
+        Args:
+            buckets: The ascending bucket upper bounds; the last one should be math.inf.
+        """
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def quantile(self, q):
+        """
+        Estimates a quantile as the upper bound of the bucket it falls into.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def to_dict(self):
+        return {"count": self.count, "sum": self.sum,
+                "buckets": {("+Inf" if bound == math.inf else bound): count
+                            for bound, count in zip(self.buckets, self.counts)}}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Aggregates latency, token and cost metrics for LLM calls (per stage and model) and for local stages
+        such as the docx parse.
+        """
+        self._lock = threading.Lock()
+        self.calls = {}
+        self.stages = {}
+        self.compaction = {}
+        self.cascade = {}
+        self.dedup = {"job_descriptions": 0, "clusters": 0, "api_calls_saved": 0}
+        self.speculation = {"reused": 0, "checked": 0, "refreshed": 0}
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Labels the LLM calls made inside the with block (in the current thread) with a stage name.
+        """
+        token = _current_stage.set(name)
+        try:
+            yield
+        finally:
+            _current_stage.reset(token)
+
+    @staticmethod
+    def current_stage():
+        return _current_stage.get()
+
+    @contextmanager
+    def time_stage(self, name):
+        """
+        Times the with block as a local (non-LLM) stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start)
+
+    def record_stage(self, name, seconds):
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = Histogram()
+            histogram.observe(seconds)
+
+    def record_compaction(self, stage, tokens_before, tokens_after):
+        """
+        Records how many prompt tokens compaction saved on one call.
+        """
+        with self._lock:
+            entry = self.compaction.setdefault(stage, {"calls": 0, "tokens_before": 0, "tokens_after": 0})
+            entry["calls"] += 1
+            entry["tokens_before"] += tokens_before
+            entry["tokens_after"] += tokens_after
+
+    def record_cascade(self, stage, model, escalations):
+        """
+        Records one cascaded request: the model whose reply was accepted and how many times it was escalated.
+        """
+        with self._lock:
+            entry = self.cascade.setdefault(stage, {"requests": 0, "escalated": 0, "escalations": 0, "models": {}})
+            entry["requests"] += 1
+            entry["escalated"] += 1 if escalations else 0
+            entry["escalations"] += escalations
+            entry["models"][model] = entry["models"].get(model, 0) + 1
+
+    def record_dedup(self, job_descriptions, clusters, api_calls_saved):
+        """
+        Records one deduplicated job set: how many job descriptions came in, how many clusters were processed, and
+        the API calls the duplicates would have made.
+        """
+        with self._lock:
+            self.dedup["job_descriptions"] += job_descriptions
+            self.dedup["clusters"] += clusters
+            self.dedup["api_calls_saved"] += api_calls_saved
+
+    def record_speculation(self, outcome):
+        """
+        Records what happened to one speculative review: "reused" as it was, "checked" by a cheap delta check, or
+        "refreshed" by a full review of the processed resume.
+        """
+        with self._lock:
+            self.speculation[outcome] += 1
+
+    def record_call(self, stage, model, seconds, usage=None, error=None, time_to_first_token=None, batch=False):
+        """
+        Records one LLM call.
+        Args:
+            stage: The stage the call was made from.
+            model: The model the call was sent to.
+            seconds: The call latency; for streams, the time until the last chunk.
+            usage: Optional; the response's usage object (prompt_tokens, completion_tokens).
+            error: Optional; the exception the call failed with.
+            time_to_first_token: Optional; for streams, the seconds until the first content chunk.
+            batch: Whether the call went through the Batch API, which bills it at BATCH_PRICE.
+        """
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+        with self._lock:
+            entry = self.calls.get((stage, model))
+            if entry is None:
+                entry = self.calls[(stage, model)] = {
+                    "requests": 0, "errors": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0,
+                    "cost": 0.0,
+                    "latency": Histogram(), "time_to_first_token": Histogram(),
+                }
+            entry["requests"] += 1
+            if error is not None:
+                entry["errors"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["cached_prompt_tokens"] += cached_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["cost"] += estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens, batch)
+            entry["latency"].observe(seconds)
+            if time_to_first_token is not None:
+                entry["time_to_first_token"].observe(time_to_first_token)
+
+    def snapshot(self):
+        """
+        Returns every metric as a JSON-serializable dict.
+        """
+        with self._lock:
+            calls = [{"stage": stage, "model": model, "requests": entry["requests"], "errors": entry["errors"],
+                      "prompt_tokens": entry["prompt_tokens"], "cached_prompt_tokens": entry["cached_prompt_tokens"],
+                      "prompt_cache_hit_rate": _rate(entry["cached_prompt_tokens"], entry["prompt_tokens"]),
+                      "completion_tokens": entry["completion_tokens"],
+                      "cost": round(entry["cost"], 6), "latency": entry["latency"].to_dict(),
+                      "time_to_first_token": entry["time_to_first_token"].to_dict()}
+                     for (stage, model), entry in sorted(self.calls.items())]
+            stages = {name: histogram.to_dict() for name, histogram in sorted(self.stages.items())}
+            compaction = {stage: dict(entry, tokens_saved=entry["tokens_before"] - entry["tokens_after"])
+                          for stage, entry in sorted(self.compaction.items())}
+            cascade = {stage: dict(entry, models=dict(entry["models"]),
+                                   escalation_rate=round(entry["escalated"] / entry["requests"], 4))
+                       for stage, entry in sorted(self.cascade.items())}
+            dedup = dict(self.dedup)
+            speculation = dict(self.speculation)
+        speculation["reuse_rate"] = _rate(speculation["reused"], sum(speculation.values()))
+        dedup["dedup_ratio"] = round(1 - dedup["clusters"] / dedup["job_descriptions"], 4) if dedup["job_descriptions"] else 0.0
+        totals = {
+            "requests": sum(call["requests"] for call in calls),
+            "errors": sum(call["errors"] for call in calls),
+            "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+            "cached_prompt_tokens": sum(call["cached_prompt_tokens"] for call in calls),
+            "completion_tokens": sum(call["completion_tokens"] for call in calls),
+            "cost": round(sum(call["cost"] for call in calls), 6),
+        }
+        totals["prompt_cache_hit_rate"] = _rate(totals["cached_prompt_tokens"], totals["prompt_tokens"])
+        return {"totals": totals, "llm_calls": calls, "stages": stages, "compaction": compaction, "cascade": cascade,
+                "dedup": dedup, "speculation": speculation}
+
+    def to_json(self, indent=2):
+        """
+        Exports the metrics as a JSON document.
+        """
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self):
+        """
+        Exports the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            calls = sorted(self.calls.items())
+            stages = sorted(self.stages.items())
+            compaction = sorted(self.compaction.items())
+            cascade = [(stage, entry["requests"], entry["escalated"]) for stage, entry in sorted(self.cascade.items())]
+            dedup = dict(self.dedup)
+            speculation = sorted(self.speculation.items())
+
+        counters = (("resume_llm_requests_total", "requests", "LLM requests sent."),
+                    ("resume_llm_errors_total", "errors", "LLM requests that raised an error."),
+                    ("resume_llm_prompt_tokens_total", "prompt_tokens", "Prompt tokens sent."),
+                    ("resume_llm_cached_prompt_tokens_total", "cached_prompt_tokens",
+                     "Prompt tokens read from the provider's prompt cache."),
+                    ("resume_llm_completion_tokens_total", "completion_tokens", "Completion tokens received."),
+                    ("resume_llm_cost_dollars_total", "cost", "Estimated LLM cost in US dollars."))
+        for name, field, help_text in counters:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (stage, model), entry in calls:
+                lines.append(f'{name}{{stage="{stage}",model="{model}"}} {entry[field]}')
+
+        lines.append("# HELP resume_prompt_tokens_saved_total Prompt tokens removed by prompt compaction.")
+        lines.append("# TYPE resume_prompt_tokens_saved_total counter")
+        for stage, entry in compaction:
+            lines.append(f'resume_prompt_tokens_saved_total{{stage="{stage}"}} '
+                         f'{entry["tokens_before"] - entry["tokens_after"]}')
+
+        lines.append("# HELP resume_cascade_requests_total Requests sent through a model cascade.")
+        lines.append("# TYPE resume_cascade_requests_total counter")
+        for stage, requests, _ in cascade:
+            lines.append(f'resume_cascade_requests_total{{stage="{stage}"}} {requests}')
+        lines.append("# HELP resume_cascade_escalated_total Cascaded requests escalated past the first model.")
+        lines.append("# TYPE resume_cascade_escalated_total counter")
+        for stage, _, escalated in cascade:
+            lines.append(f'resume_cascade_escalated_total{{stage="{stage}"}} {escalated}')
+
+        dedup_counters = (("resume_dedup_job_descriptions_total", dedup["job_descriptions"],
+                           "Job descriptions given to deduplicated runs."),
+                          ("resume_dedup_duplicates_total", dedup["job_descriptions"] - dedup["clusters"],
+                           "Job descriptions answered from their cluster representative."),
+                          ("resume_dedup_api_calls_saved_total", dedup["api_calls_saved"],
+                           "Estimated API calls saved by deduplication."))
+        for name, value, help_text in dedup_counters:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+
+        lines.append("# HELP resume_speculative_reviews_total Speculative reviews by what happened to them.")
+        lines.append("# TYPE resume_speculative_reviews_total counter")
+        for outcome, count in speculation:
+            lines.append(f'resume_speculative_reviews_total{{outcome="{outcome}"}} {count}')
+
+        histograms = [("resume_llm_latency_seconds", "LLM request latency.",
+                       [(f'stage="{stage}",model="{model}"', entry["latency"]) for (stage, model), entry in calls]),
+                      ("resume_llm_time_to_first_token_seconds", "Time to the first streamed token.",
+                       [(f'stage="{stage}",model="{model}"', entry["time_to_first_token"])
+                        for (stage, model), entry in calls if entry["time_to_first_token"].count]),
+                      ("resume_stage_duration_seconds", "Duration of local stages such as the docx parse.",
+                       [(f'stage="{stage}"', histogram) for stage, histogram in stages])]
+        for name, help_text, series in histograms:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in series:
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    le = "+Inf" if bound == math.inf else repr(bound)
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """
+        Formats a short human-readable summary, one line per stage and model.
+        """
+        snapshot = self.snapshot()
+        totals = snapshot["totals"]
+        lines = [f"Metrics: {totals['requests']} LLM requests ({totals['errors']} failed), "
+                 f"{totals['prompt_tokens']} prompt ({totals['prompt_cache_hit_rate']:.0%} cached) + "
+                 f"{totals['completion_tokens']} completion tokens, est. ${totals['cost']:.4f}"]
+        with self._lock:
+            calls = sorted(self.calls.items())
+            stages = sorted(self.stages.items())
+        for (stage, model), entry in calls:
+            latency = entry["latency"]
+            lines.append(f"  {stage} [{model}]: {entry['requests']} calls, mean {latency.sum / latency.count:.2f}s, "
+                         f"p99 <= {latency.quantile(0.99)}s, {entry['prompt_tokens']}+{entry['completion_tokens']} "
+                         f"tokens ({entry['cached_prompt_tokens']} cached), est. ${entry['cost']:.4f}")
+        for stage, histogram in stages:
+            lines.append(f"  {stage}: {histogram.count} runs, mean {histogram.sum / histogram.count * 1000:.1f}ms")
+        for stage, entry in snapshot["compaction"].items():
+            lines.append(f"  {stage} compaction: {entry['tokens_saved']} of {entry['tokens_before']} prompt tokens "
+                         f"saved over {entry['calls']} calls")
+        for stage, entry in snapshot["cascade"].items():
+            lines.append(f"  {stage} cascade: {entry['escalated']} of {entry['requests']} requests escalated "
+                         f"({entry['escalation_rate']:.0%})")
+        dedup = snapshot["dedup"]
+        if dedup["job_descriptions"]:
+            lines.append(f"  deduplication: {dedup['job_descriptions'] - dedup['clusters']} of "
+                         f"{dedup['job_descriptions']} job descriptions were duplicates, ~{dedup['api_calls_saved']} "
+                         f"API calls saved")
+        speculation = snapshot["speculation"]
+        if speculation["reused"] + speculation["checked"] + speculation["refreshed"]:
+            lines.append(f"  speculative reviews: {speculation['reused']} reused, {speculation['checked']} checked, "
+                         f"{speculation['refreshed']} refreshed")
+        return "\n".join(lines)
+
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else 0.0
+
+
+class InstrumentedClient:
+    def __init__(self, client, metrics):
+        """
+        Wraps an OpenAI client so every chat.completions.create call is recorded in a MetricsRegistry under the
+        current stage (see MetricsRegistry.stage). Every other attribute is passed through to the wrapped client.
+        The registry may be shared by many wrappers; requests counts the calls sent through this one alone.
+        Args:
+            client: The OpenAI client (or another wrapper with the same interface).
+            metrics: The MetricsRegistry to record into.
+        """
+        self.client = client
+        self.metrics = metrics
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.chat = _InstrumentedChat(self)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class _InstrumentedChat:
+    def __init__(self, owner):
+        self.completions = _InstrumentedCompletions(owner)
+
+
+class _InstrumentedCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        metrics = self._owner.metrics
+        stage = metrics.current_stage()
+        model = kwargs.get("model", "unknown")
+        with self._owner._lock:
+            self._owner.requests += 1
+        start = time.perf_counter()
+        try:
+            response = self._owner.client.chat.completions.create(**kwargs)
+        except Exception as exc:
+            metrics.record_call(stage, model, time.perf_counter() - start, error=exc)
+            raise
+        if kwargs.get("stream"):
+            return _instrument_stream(response, metrics, stage, model, start)
+        # Clients that send their requests through the Batch API (batch_api.BatchedClient) set batch_pricing
+        batch = getattr(self._owner.client, "batch_pricing", False) is True
+        metrics.record_call(stage, model, time.perf_counter() - start, getattr(response, "usage", None), batch=batch)
+        return response
+
+
+def _instrument_stream(stream, metrics, stage, model, start):
+    """
+    Passes a stream through and records it once it ends, with its time to first token.
+    Token usage is only available when the request asked for it with stream_options={"include_usage": True}.
+    """
+    usage = None
+    error = None
+    first_token = None
+    try:
+        for chunk in stream:
+            if first_token is None and chunk.choices and chunk.choices[0].delta.content:
+                first_token = time.perf_counter() - start
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            yield chunk
+    except Exception as exc:
+        error = exc
+        raise
+    finally:
+        metrics.record_call(stage, model, time.perf_counter() - start, usage, error, first_token)
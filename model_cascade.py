@@ -0,0 +1,116 @@
+import re
+
+from keyword_extractor import KeywordExtractor, merge_keywords
+
+CHEAP_MODEL = "gpt-3.5-turbo-0125"
+LARGE_MODEL = "gpt-4-turbo-2024-04-09"
+
+# The model each stage uses without a cascade, shared by ResumeProcessor and the GUI so both send the same requests
+STAGE_MODELS = {
+    "process_job_description": CHEAP_MODEL,
+    "process_resume": LARGE_MODEL,
+    "review_resume": LARGE_MODEL,
+    "fix_resume": LARGE_MODEL,
+}
+
+# The models each stage tries in order; a stage missing from the table keeps the model its method asks for
+DEFAULT_CASCADES = {
+    "process_job_description": (CHEAP_MODEL,),
+    "process_resume": (CHEAP_MODEL, LARGE_MODEL),
+    "review_resume": (CHEAP_MODEL, LARGE_MODEL),
+    "fix_resume": (CHEAP_MODEL, LARGE_MODEL),
+}
+
+# The score's numerator is group 1 and its denominator, if any, group 2. A number labelled as the score may be out of
+# anything; a bare fraction only counts on the usual rating scales, and only when nothing is labelled as the score
+_LABELLED_SCORE = re.compile(r"\bscore\b[^0-9\n]{0,20}(\d{1,3}(?:\.\d+)?)(?!\d)(?:\s*(?:/|out of)\s*(\d{1,3})\b)?",
+                             re.IGNORECASE)
+_FRACTION_SCORE = re.compile(r"\b(\d{1,3}(?:\.\d+)?)\s*(?:/|out of)\s*(100|10|5)\b", re.IGNORECASE)
+
+
+class CascadeRouter:
+    def __init__(self, cascades=None, min_keyword_coverage=0.8):
+        """
+        Configures which models each stage tries, cheapest first, and how strictly a cheaper model's reply is
+        checked before it is accepted. A reply that fails its stage's checks is thrown away and the request is
+        sent again to the next model in the stage's cascade; the last model's reply is always accepted.
+        Args:
+            cascades: Optional; a dict mapping stage names to the models to try in order. Defaults to
+                      DEFAULT_CASCADES.
+            min_keyword_coverage: The fraction of the job description keywords found in the original resume that a
+                                  processed resume has to keep.
+        """
+        self.cascades = cascades if cascades is not None else DEFAULT_CASCADES
+        self.min_keyword_coverage = min_keyword_coverage
+
+    def models_for(self, stage, default_model):
+        """
+        Returns the models to try for a stage, in order.
+        """
+        return tuple(self.cascades.get(stage) or (default_model,))
+
+    def check_processed_resume(self, reply, keywords, resume_text, delimited=True):
+        """
+        Checks a process_resume reply: it has to contain the '```' delimited section (unless delimited is False)
+        and keep enough of the keywords that the original resume matched.
+        Returns:
+            None if the reply is acceptable, otherwise the reason it was rejected.
+        """
+        if delimited:
+            if reply.count("```") < 2:
+                return "no '```' delimited section"
+            reply = reply.split("```")[1]
+        coverage = retained_keyword_coverage(reply, keywords, resume_text)
+        if coverage is not None and coverage < self.min_keyword_coverage:
+            return f"keeps {coverage:.0%} of the matching keywords (minimum {self.min_keyword_coverage:.0%})"
+        return None
+
+    def check_review(self, reply):
+        """
+        Checks a review_resume reply: it has to contain a 0-100 score.
+        """
+        return None if parse_score(reply) is not None else "no parseable 0-100 score"
+
+    def check_reply(self, reply):
+        """
+        Checks any other reply: it must not be empty.
+        """
+        return None if reply and reply.strip() else "empty reply"
+
+
+def parse_score(text):
+    """
+    Finds the 0-100 match score in a free-text review, e.g. "Score: 85/100" or "I would give it a score of 72".
+    Scores given on another scale ("Score: 8/10", "4 out of 5") are converted to 0-100.
+    Returns:
+        The score as an int, or None if there isn't one.
+    """
+    labelled = list(_LABELLED_SCORE.finditer(text))
+    # Other fractions in a review (e.g. "2 out of 5 certifications") aren't the score when one is labelled
+    for match in labelled or _FRACTION_SCORE.finditer(text):
+        score = float(match.group(1))
+        if match.group(2) is not None:
+            denominator = int(match.group(2))
+            if denominator == 0 or score > denominator:
+                continue
+            score = score * 100 / denominator
+        if 0 <= score <= 100:
+            return int(round(score))
+    return None
+
+
+def retained_keyword_coverage(text, keywords, resume_text):
+    """
+    Measures which fraction of the keywords present in the original resume a processed resume still mentions.
+    Returns:
+        A float from 0.0 to 1.0, or None if the original resume matches none of the keywords.
+    """
+    keywords = [] if isinstance(keywords, str) else merge_keywords(keywords)
+    if not keywords:
+        return None
+    extractor = KeywordExtractor({keyword: keyword for keyword in keywords})
+    present = set(extractor.extract(resume_text))
+    if not present:
+        return None
+    kept = present.intersection(extractor.extract(text))
+    return len(kept) / len(present)
@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class StageTimings:
+    def __init__(self):
+        """
+        Records when each stage of a tailoring session starts and stops, relative to when the timings were created.
+        """
+        self.origin = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def start(self, stage):
+        """
+        Marks a stage as started.
+        """
+        with self._lock:
+            self.stages[stage] = [time.perf_counter() - self.origin, None]
+
+    def stop(self, stage):
+        """
+        Marks a stage as finished. Stopping a stage that was never started is ignored.
+        """
+        with self._lock:
+            if stage in self.stages:
+                self.stages[stage][1] = time.perf_counter() - self.origin
+
+    @contextmanager
+    def measure(self, stage):
+        """
+        Times the body of a with block as a stage.
+        """
+        self.start(stage)
+        try:
+            yield
+        finally:
+            self.stop(stage)
+
+    def durations(self):
+        """
+        Returns a dict mapping each finished stage to its duration in seconds.
+        """
+        with self._lock:
+            return {stage: end - start for stage, (start, end) in self.stages.items() if end is not None}
+
+    def wall_clock(self):
+        """
+        Returns the seconds from the start of the first stage to the end of the last finished one.
+        """
+        with self._lock:
+            finished = [(start, end) for start, end in self.stages.values() if end is not None]
+        if not finished:
+            return 0.0
+        return max(end for _, end in finished) - min(start for start, _ in finished)
+
+    def summary(self):
+        """
+        Formats the per-stage timing breakdown. Stages that overlapped make the wall-clock time less than their sum.
+        """
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1][0])
+        lines = ["Stage timings:"]
+        for stage, (start, end) in stages:
+            if end is None:
+                lines.append(f"  {stage}: running (started at +{start:.2f}s)")
+            else:
+                lines.append(f"  {stage}: {end - start:.2f}s (+{start:.2f}s to +{end:.2f}s)")
+        durations = self.durations()
+        lines.append(f"  wall clock: {self.wall_clock():.2f}s, sum of stages: {sum(durations.values()):.2f}s")
+        return "\n".join(lines)
+
+
+class Pipeline:
+    def __init__(self, max_workers=4, timings=None):
+        """
+        Runs the stages of one tailoring session concurrently, each as soon as its inputs exist.
+        A stage that needs the output of other stages is submitted with their futures as after=..., so it only
+        waits on what it actually depends on.
+        Args:
+            max_workers: The maximum number of stages running at once. It must be at least the number of stages
+                         that can wait on each other at the same time.
+            timings: Optional; the StageTimings to record into. A new one is created by default.
+        """
+        self.timings = timings if timings is not None else StageTimings()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, stage, func, *args, after=(), **kwargs):
+        """
+        Starts a stage.
+        Args:
+            stage: The stage name used in the timing breakdown.
+            func: The callable to run.
+            args, kwargs: The arguments to call func with.
+            after: Futures of the stages this one depends on. The stage (and its timer) starts once they are done,
+                   and fails with their exception if one of them failed.
+        Returns:
+            A concurrent.futures.Future for the stage's result.
+        """
+        def run():
+            for future in after:
+                future.result()
+            with self.timings.measure(stage):
+                return func(*args, **kwargs)
+        return self._executor.submit(run)
+
+    def shutdown(self, wait=True):
+        """
+        Stops accepting stages and, by default, waits for the running ones.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown(wait=exc_info[0] is None)
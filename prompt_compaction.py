@@ -0,0 +1,172 @@
+from keyword_extractor import KeywordExtractor, merge_keywords
+from resume_parser import WORK_EXPERIENCE
+
+_encodings = {}
+_tiktoken = None
+
+
+def _load_tiktoken():
+    # tiktoken is optional (without it tokens are estimated from the text length) and slow to import, so it is
+    # only imported the first time tokens are counted
+    global _tiktoken
+    if _tiktoken is None:
+        try:
+            import tiktoken
+        except ImportError:
+            tiktoken = False
+        _tiktoken = tiktoken
+    return _tiktoken
+
+
+def count_tokens(text, model="gpt-4-turbo-2024-04-09"):
+    """
+    Counts the tokens a text takes up in a prompt, locally.
+    Uses the model's tiktoken encoding when tiktoken is installed, and otherwise estimates about four characters
+    per token, which is close for English prose.
+    Args:
+        text: The text to count.
+        model: The model the text will be sent to.
+    Returns:
+        The number of tokens.
+    """
+    tiktoken = _load_tiktoken()
+    if tiktoken:
+        encoding = _encodings.get(model)
+        if encoding is None:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            _encodings[model] = encoding
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def format_keywords(keywords):
+    """
+    Formats keywords as one de-duplicated, comma-separated line instead of a Python list repr.
+    A string (e.g. the verbose output of process_job_description) is returned unchanged.
+    """
+    if isinstance(keywords, str):
+        return keywords
+    return ", ".join(merge_keywords(keywords))
+
+
+class CompactionResult:
+    def __init__(self, text, tokens_after, dropped=()):
+        """
+        Holds a compacted piece of prompt content. The tokens saved are counted on the whole user message by the
+        caller (see ResumeProcessor._compacted), since the uncompacted prompt isn't laid out the same way.
+        Args:
+            text: The compacted text.
+            tokens_after: The token count of the compacted text.
+            dropped: The lines that were left out.
+        """
+        self.text = text
+        self.tokens_after = tokens_after
+        self.dropped = list(dropped)
+
+
+def _keyword_matcher(keywords):
+    keywords = [] if isinstance(keywords, str) else merge_keywords(keywords)
+    return KeywordExtractor({keyword: keyword for keyword in keywords}) if keywords else None
+
+
+def _trim_to_budget(lines, keep, overlaps, budget, model, render):
+    # Drop the optional lines with the least keyword overlap (latest first among ties) until the text fits
+    dropped = []
+    candidates = sorted((index for index in range(len(lines)) if not keep[index]),
+                        key=lambda index: (overlaps[index], -index))
+    included = [True] * len(lines)
+    text = render(lines, included)
+    for index in candidates:
+        if count_tokens(text, model) <= budget:
+            break
+        included[index] = False
+        dropped.append(lines[index])
+        text = render(lines, included)
+    return text, dropped
+
+
+def compact_resume(parsed, keywords, token_budget=None, model="gpt-4-turbo-2024-04-09"):
+    """
+    Builds the resume part of the process_resume prompt from a parsed resume, leaving out Work Experience bullets
+    that share no keyword with the job description. When a token budget is given, the remaining bullets with the
+    fewest keyword matches are dropped until the resume fits; skills and employer lines are always kept.
+    If no bullet matches any keyword (e.g. the keywords are phrased differently from the resume), all bullets are
+    kept rather than sending an empty work history.
+    Args:
+        parsed: A resume_parser.ParsedResume.
+        keywords: The keywords extracted from the job description.
+        token_budget: Optional; the maximum number of tokens for the resume text.
+        model: The model the prompt will be sent to, for counting tokens.
+    Returns:
+        A CompactionResult.
+    """
+    experience = parsed.sections.get(WORK_EXPERIENCE, [])
+    header = "Key Skills: " + " • ".join(parsed.skills) + "\n\nWork Experience:\n"
+
+    matcher = _keyword_matcher(keywords)
+    overlaps = [len(matcher.find(line)) if matcher is not None else 0 for line in experience]
+    keep = [line in parsed.subheadings for line in experience]
+    if not any(overlap for overlap, is_subheading in zip(overlaps, keep) if not is_subheading):
+        overlaps = [1] * len(experience)
+
+    relevant = [index for index, line in enumerate(experience) if keep[index] or overlaps[index]]
+    lines = [experience[index] for index in relevant]
+    dropped = [line for index, line in enumerate(experience) if not (keep[index] or overlaps[index])]
+
+    def render(lines_, included):
+        body = [line for line, include in zip(lines_, included) if include]
+        return header + "\n".join(_without_empty_employers(body, parsed.subheadings))
+
+    if token_budget is not None:
+        text, trimmed = _trim_to_budget(lines, [keep[index] for index in relevant],
+                                        [overlaps[index] for index in relevant], token_budget, model, render)
+        dropped.extend(trimmed)
+    else:
+        text = render(lines, [True] * len(lines))
+
+    return CompactionResult(text, count_tokens(text, model), dropped)
+
+
+def _without_empty_employers(lines, subheadings):
+    # Leave out employer/title lines whose bullets were all dropped
+    result = []
+    pending = []
+    for line in lines:
+        if line in subheadings:
+            pending.append(line)
+            continue
+        result.extend(pending)
+        pending = []
+        result.append(line)
+    return result
+
+
+def compact_job_description(job_description, keywords, token_budget=None, model="gpt-4-turbo-2024-04-09"):
+    """
+    Shortens a job description for prompts that only need its requirements, such as fix_resume. Lines are only
+    dropped to meet a token budget, those sharing the fewest keywords first (the title line is always kept).
+    Args:
+        job_description: The job description text.
+        keywords: The keywords extracted from the job description.
+        token_budget: Optional; the maximum number of tokens for the job description.
+        model: The model the prompt will be sent to, for counting tokens.
+    Returns:
+        A CompactionResult.
+    """
+    lines = [line.strip() for line in job_description.splitlines() if line.strip()]
+    tokens = count_tokens(job_description, model)
+    if token_budget is None or tokens <= token_budget:
+        return CompactionResult(job_description, tokens)
+
+    matcher = _keyword_matcher(keywords)
+    overlaps = [len(matcher.find(line)) if matcher is not None else 0 for line in lines]
+    keep = [index == 0 for index in range(len(lines))]
+
+    def render(lines_, included):
+        return "\n".join(line for line, include in zip(lines_, included) if include)
+
+    text, dropped = _trim_to_budget(lines, keep, overlaps, token_budget, model, render)
+    return CompactionResult(text, count_tokens(text, model), dropped)
@@ -0,0 +1,172 @@
+# Providers cache prompts by exact prefix (OpenAI from 1024 tokens, in 128-token steps), so every template puts the
+# system prompt first, then the content that repeats across calls, and the per-call content last. Only the original
+# resume sent by process_resume repeats across a batch's calls: processing it for many job descriptions re-sends the
+# same system prompt + resume prefix every time, and only the keywords are new input. The resume reviewed and fixed
+# is the one tailored to each job description, so it isn't stable.
+
+
+class PromptField:
+    def __init__(self, name, label=None, stable=False):
+        """
+        One part of a template's user message.
+        Args:
+            name: The keyword argument the value is passed as.
+            label: Optional; the text written before the value (e.g. "my resume:").
+            stable: True for content that repeats across the calls of a run (e.g. the resume in a batch) and
+                    belongs in the cached prefix.
+        """
+        self.name = name
+        self.label = label
+        self.stable = stable
+
+
+class PromptTemplate:
+    def __init__(self, name, system, fields, separator=" "):
+        """
+        A system prompt and the layout of its user message.
+        Args:
+            name: The template's name in PROMPTS.
+            system: The system prompt.
+            fields: The PromptFields of the user message in order; stable fields have to come first.
+            separator: What goes between a field's label and its value.
+        Raises:
+            ValueError: If a stable field follows a variable one, which would keep it out of the cached prefix.
+        """
+        seen_variable = False
+        for field in fields:
+            if field.stable and seen_variable:
+                raise ValueError(f"{name}: stable field {field.name!r} comes after variable content")
+            seen_variable = seen_variable or not field.stable
+        self.name = name
+        self.system = system
+        self.fields = fields
+        self.separator = separator
+
+    def user_content(self, **values):
+        """
+        Builds the user message from the field values, in the template's order.
+        """
+        parts = []
+        for field in self.fields:
+            value = values[field.name]
+            parts.append(f"{field.label}{self.separator}{value}" if field.label else f"{value}")
+        return "\n\n".join(parts)
+
+    def messages(self, **values):
+        return [{"role": "system", "content": self.system}, {"role": "user", "content": self.user_content(**values)}]
+
+
+EXTRACT_KEYWORDS = PromptTemplate(
+    "extract_keywords",
+    "Your task is to find and list all of the keywords and key skills that are present in a job description using "
+    "ATS standards. Please write nothing other than the keywords and key skills from this job description in your "
+    "response.",
+    [PromptField("job_description")])
+
+_PROCESS_RESUME_TASK = (
+    "Your task is to take a list of keywords and key skills and then look at my resume text (which contains my key "
+    "skills and my work experience) and remove anything from my resume that doesn't match or have anything to do "
+    "with the keywords and key skills. Please only write the skills and work experience that match the keywords and "
+    "key skills from the job description. And if you see any ways to improve the wording in my resume to better "
+    "match the keywords and key skills in the job description, please do so.")
+
+_RESUME_THEN_KEYWORDS = [PromptField("resume", "my resume:", stable=True), PromptField("keywords", "keywords:")]
+
+PROCESS_RESUME = PromptTemplate(
+    "process_resume",
+    _PROCESS_RESUME_TASK + " When you're done, please write the skills and bullets in a format that I can easily "
+    "use a Python split function on. More specifically, please enclose the resume section with this delimiter: "
+    "'```'. This is so I will always be able to access the resume portion with this code "
+    "(resume_response.split('```')[1])",
+    _RESUME_THEN_KEYWORDS)
+
+PROCESS_RESUME_STRUCTURED = PromptTemplate(
+    "process_resume_structured",
+    _PROCESS_RESUME_TASK + " Put each skill in key_skills, and each employer line and bullet of my work experience, "
+    "in order, in work_experience.",
+    _RESUME_THEN_KEYWORDS)
+
+PROCESS_RESUME_ITEMS = PromptTemplate(
+    "process_resume_items",
+    "Your task is to take a list of keywords and key skills and then look at items from my resume: my key skills, "
+    "and my work experience bullets with the employer they are listed under. For each item, write nothing (an "
+    "empty text) if it doesn't match or have anything to do with the keywords and key skills. Otherwise, write the "
+    "item, and if you see any ways to improve its wording to better match the keywords and key skills in the job "
+    "description, please do so. Return every item id exactly once.",
+    [PromptField("items", "resume items:"), PromptField("keywords", "keywords:")])
+
+_RESUME_THEN_JOB = [PromptField("resume", "my resume:"), PromptField("job_description", "job description:")]
+
+REVIEW_RESUME = PromptTemplate(
+    "review_resume",
+    "Your task is to look at my resume and this job description and let me know how well my resume matches the job "
+    "description. I would like you to provide a score from 0 to 100, where 0 is a poor match and 100 is a perfect "
+    "match. Please provide a brief explanation of why you gave this score. Additionally, please tell me which "
+    "keywords and key skills from the job description are missing from my resume and how I can improve my resume "
+    "to better match the job description.",
+    _RESUME_THEN_JOB)
+
+REVIEW_RESUME_STRUCTURED = PromptTemplate(
+    "review_resume_structured",
+    "Your task is to look at my resume and this job description and let me know how well my resume matches the job "
+    "description. Score the match from 0 to 100, where 0 is a poor match and 100 is a perfect match, and briefly "
+    "explain why you gave this score. List the keywords and key skills from the job description that are missing "
+    "from my resume, and suggest how I can improve my resume to better match the job description.",
+    _RESUME_THEN_JOB)
+
+_REVIEW_DELTA_TASK = (
+    "Your task is to update a review of how well my resume matches a job description. The review was written for "
+    "an earlier version of my resume, which I have since tailored to the job description; the keywords the tailoring "
+    "added or removed are listed. Keep whatever in the earlier review still holds for my tailored resume, and "
+    "correct the score from 0 to 100 (where 0 is a poor match and 100 is a perfect match), the explanation, the "
+    "keywords and key skills that are missing, and the suggestions where it doesn't.")
+
+# Nothing here repeats across calls: the review and keyword changes are specific to one tailored resume
+_REVIEW_DELTA_FIELDS = [PromptField("resume", "my resume:"), PromptField("job_description", "job description:"),
+                        PromptField("review", "earlier review:"), PromptField("changes", "keyword changes:")]
+
+REVIEW_DELTA = PromptTemplate(
+    "review_delta", _REVIEW_DELTA_TASK + " Write the updated review in the same format as the earlier one.",
+    _REVIEW_DELTA_FIELDS)
+
+REVIEW_DELTA_STRUCTURED = PromptTemplate("review_delta_structured", _REVIEW_DELTA_TASK, _REVIEW_DELTA_FIELDS)
+
+_FIX_RESUME_TASK = (
+    "Your task is to read my resume, a job description, and a list of my experiences that are currently not present "
+    "in my resume. After reading these, please write the relevant experiences from my list of experiences into my "
+    "resume in a way that makes sense and is easy for recruiters to read and interpret. For each of the bullets that "
+    "you add to the resume, please keep the same level of succinctness that is present in the bullets in the current "
+    "resume. Please also make sure to include the experiences in the correct sections and jobs of my resume.")
+
+_FIX_RESUME_FIELDS = _RESUME_THEN_JOB + [PromptField("experiences", "experiences not on resume:")]
+
+FIX_RESUME = PromptTemplate("fix_resume", _FIX_RESUME_TASK, _FIX_RESUME_FIELDS)
+
+FIX_RESUME_STRUCTURED = PromptTemplate(
+    "fix_resume_structured", _FIX_RESUME_TASK + " Put the whole updated resume in resume.", _FIX_RESUME_FIELDS)
+
+# Not sent by the app: the prompt save_special_log_for_gpt writes out for pasting into ChatGPT
+SPECIAL_GPT_LOG = PromptTemplate(
+    "special_gpt_log",
+    "Your task is to read my resume, a job description, a set of recommendations I received for my resume regarding "
+    "this job description, and a list of my experiences that are currently not present in my resume. After reading "
+    "these, please write the relevant experiences from my list of experiences into my resume in a way that makes "
+    "sense and is easy for recruiters to read and interpret. For each of the bullets that you add to the resume, "
+    "please keep the same level of succinctness that is present in the bullets in the current resume. Please also "
+    "make sure to include the experiences in the correct sections and jobs of my resume.",
+    _RESUME_THEN_JOB + [PromptField("recommendations", "recommendations:"),
+                        PromptField("experiences", "experiences not on resume:")],
+    separator="\n")
+
+PROMPTS = {template.name: template for template in (
+    EXTRACT_KEYWORDS, PROCESS_RESUME, PROCESS_RESUME_STRUCTURED, PROCESS_RESUME_ITEMS, REVIEW_RESUME,
+    REVIEW_RESUME_STRUCTURED, REVIEW_DELTA, REVIEW_DELTA_STRUCTURED, FIX_RESUME, FIX_RESUME_STRUCTURED, SPECIAL_GPT_LOG)}
+
+
+def get_prompt(name):
+    """
+    Looks up a template by name.
+    Raises:
+        KeyError: If there is no template with that name.
+    """
+    return PROMPTS[name]
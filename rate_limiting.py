@@ -0,0 +1,265 @@
+import os
+import random
+import threading
+import time
+
+from prompt_compaction import count_tokens
+
+# (requests per minute, tokens per minute) per model at OpenAI's usage tier 1, for RateLimiter(rate_limits=...).
+# Dated model names fall back to their undated family; models missing from the table are not throttled.
+RATE_LIMITS = {
+    "gpt-3.5-turbo": (3500, 200_000),
+    "gpt-4-turbo": (500, 30_000),
+    "gpt-4o-mini": (500, 200_000),
+    "gpt-4o": (500, 30_000),
+}
+
+# HTTP statuses worth retrying: request timeout, conflict, rate limit and server errors
+RETRYABLE_STATUSES = (408, 409, 429)
+
+
+def load_api_key():
+    """
+    Reads the OpenAI API key from the OPENAI_API_KEY environment variable, or else from config.py.
+    Raises:
+        RuntimeError: If neither is set.
+    """
+    if os.environ.get("OPENAI_API_KEY"):
+        return os.environ["OPENAI_API_KEY"]
+    try:
+        from config import API_KEY
+    except ImportError:
+        raise RuntimeError("No OpenAI API key: set OPENAI_API_KEY or copy config_example.py to config.py") from None
+    return API_KEY
+
+
+def make_openai_client(api_key=None, base_url=None, timeout=60.0, max_connections=20, max_keepalive_connections=10,
+                       keepalive_expiry=30.0):
+    """
+    Builds an OpenAI client on a pooled, keep-alive httpx connection pool sized for concurrent batch jobs.
+    The client's own retries are turned off; RateLimitedClient retries with backoff and throttling instead.
+    Args:
+        api_key: Optional; the OpenAI API key. Defaults to load_api_key().
+        base_url: Optional; the API base URL, e.g. a local fake server such as "http://127.0.0.1:8000/v1".
+        timeout: The default per-request timeout in seconds.
+        max_connections: The maximum number of open connections.
+        max_keepalive_connections: The maximum number of idle connections kept alive for reuse.
+        keepalive_expiry: Seconds an idle connection is kept alive.
+    Returns:
+        An openai.OpenAI client.
+    """
+    import openai
+
+    if api_key is None:
+        api_key = load_api_key()
+    # Build the limits with the Limits class of the httpx package the installed openai was built against
+    limits = type(openai.DEFAULT_CONNECTION_LIMITS)(max_connections=max_connections,
+                                                    max_keepalive_connections=max_keepalive_connections,
+                                                    keepalive_expiry=keepalive_expiry)
+    http_client = openai.DefaultHttpxClient(limits=limits, timeout=timeout)
+    return openai.OpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0, timeout=timeout)
+
+
+def without_client_retries(client):
+    """
+    Returns an OpenAI client with its own retries turned off, so that wrapping it in a RateLimitedClient doesn't
+    multiply the two retry counts. Any other client (a fake, or another wrapper) is returned as is.
+    """
+    try:
+        import openai
+    except ImportError:
+        return client
+    if isinstance(client, openai.OpenAI) and client.max_retries:
+        return client.with_options(max_retries=0)
+    return client
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        A thread-safe token bucket refilled continuously at rate_per_minute.
+        Args:
+            rate_per_minute: How many units (requests or tokens) the bucket allows per minute.
+            capacity: Optional; the burst size. Defaults to one minute's worth.
+            clock: The monotonic clock to refill against.
+            sleep: The function used to wait for the bucket to refill.
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.available = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1):
+        """
+        Takes amount units from the bucket, waiting until they are available.
+        An amount larger than the capacity is capped to it, so oversized requests still go through.
+        Returns:
+            The seconds spent waiting.
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return waited
+                delay = (amount - self.available) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    def __init__(self, rate_limits=None, max_retries=5, base_delay=1.0, max_delay=60.0, timeout=None,
+                 sleep=time.sleep):
+        """
+        Holds the throttling and retry policy shared by every RateLimitedClient (and thread) that uses it:
+        one requests-per-minute and one tokens-per-minute bucket per model.
+        Args:
+            rate_limits: Optional; a dict mapping model names to (requests per minute, tokens per minute), e.g.
+                         RATE_LIMITS for an account at usage tier 1. Without one no model is throttled and only
+                         the retries apply.
+            max_retries: How many times a failed request is retried.
+            base_delay: The backoff delay before the first retry, doubled for every retry after it.
+            max_delay: The maximum backoff delay.
+            timeout: Optional; the per-call timeout in seconds, for calls that don't pass their own.
+            sleep: The function used to wait between retries and for the buckets.
+        """
+        self.rate_limits = rate_limits if rate_limits is not None else {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.sleep = sleep
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def limits_for(self, model):
+        limits = self.rate_limits.get(model)
+        if limits is None:
+            family = max((name for name in self.rate_limits if model.startswith(name)), key=len, default=None)
+            limits = self.rate_limits.get(family)
+        return limits
+
+    def _buckets_for(self, model):
+        with self._lock:
+            buckets = self._buckets.get(model)
+            if buckets is None:
+                limits = self.limits_for(model)
+                buckets = None if limits is None else (TokenBucket(limits[0], sleep=self.sleep),
+                                                       TokenBucket(limits[1], sleep=self.sleep))
+                self._buckets[model] = buckets
+            return buckets
+
+    def throttle(self, model, tokens):
+        """
+        Waits until the model's buckets allow one more request of about this many tokens.
+        """
+        buckets = self._buckets_for(model)
+        if buckets is None:
+            return
+        waited = buckets[0].acquire(1) + buckets[1].acquire(tokens)
+        if waited:
+            with self._lock:
+                self.throttled_seconds += waited
+
+    def backoff(self, attempt, error=None):
+        """
+        Returns the delay before retry number attempt (from 0): exponential backoff with full jitter, but never
+        shorter than the Retry-After the server asked for.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = _retry_after(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def wait_before_retry(self, attempt, error=None):
+        with self._lock:
+            self.retries += 1
+        self.sleep(self.backoff(attempt, error))
+
+
+def is_retryable(error):
+    """
+    True for errors worth retrying: rate limits, timeouts, dropped connections and server errors.
+    """
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUSES or status >= 500
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(error, openai.APIConnectionError)
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return min(float(headers.get("retry-after")), 120.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_request_tokens(request):
+    """
+    Estimates the tokens a request counts against the tokens-per-minute limit: its prompt plus max_tokens.
+    """
+    prompt = "".join(str(message.get("content", "")) for message in request.get("messages", ()))
+    return count_tokens(prompt, request.get("model", "")) + (request.get("max_tokens") or 0)
+
+
+class RateLimitedClient:
+    def __init__(self, client, limiter=None):
+        """
+        Wraps an OpenAI client so every chat.completions.create call is throttled to the model's rate limits,
+        retried with jittered exponential backoff on rate limits and transient errors, and given a timeout.
+        Every other attribute is passed through to the wrapped client.
+        Args:
+            client: The OpenAI client (or another wrapper with the same interface).
+            limiter: Optional; the RateLimiter to share. Defaults to a new one that only retries.
+        """
+        self.client = client
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.chat = _RateLimitedChat(self)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class _RateLimitedChat:
+    def __init__(self, owner):
+        self.completions = _RateLimitedCompletions(owner)
+
+
+class _RateLimitedCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        limiter = self._owner.limiter
+        if limiter.timeout is not None:
+            kwargs.setdefault("timeout", limiter.timeout)
+        tokens = estimate_request_tokens(kwargs)
+        attempt = 0
+        while True:
+            limiter.throttle(kwargs.get("model", ""), tokens)
+            try:
+                return self._owner.client.chat.completions.create(**kwargs)
+            except Exception as exc:
+                if attempt >= limiter.max_retries or not is_retryable(exc):
+                    raise
+                limiter.wait_before_retry(attempt, exc)
+                attempt += 1
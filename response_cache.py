@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".resume_fix_app", "response_cache.sqlite3")
+
+# Request arguments that change how a call is sent but not what the model answers.
+_TRANSPORT_PARAMS = ("timeout", "extra_headers", "extra_query", "extra_body")
+
+
+def make_cache_key(model, messages, **params):
+    """
+    Builds a content-addressed key for a chat completion request.
+    Args:
+        model: The model identifier of the request.
+        messages: The list of message dicts (system prompt and user content) of the request.
+        params: Any other request parameters that affect the response (e.g. temperature).
+    Returns:
+        A hex SHA-256 digest that is identical for identical requests.
+    """
+    payload = json.dumps({"model": model, "messages": messages, "params": params},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=None, max_memory_entries=256, max_disk_entries=10000, ttl=7 * 24 * 3600):
+        """
+        Initializes a two-tier response cache: an in-memory LRU in front of an optional SQLite file.
+        Args:
+            path: Optional; a path to the SQLite file. When None, only the in-memory tier is used.
+            max_memory_entries: The maximum number of entries kept in the in-memory LRU.
+            max_disk_entries: The maximum number of entries kept on disk; least recently used go first.
+            ttl: Seconds an entry stays valid, or None to keep entries until they are evicted by size.
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses ("
+                             "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                             "created_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            self._db.commit()
+
+    def get(self, key):
+        """
+        Looks up a cached value, checking memory first and then disk.
+        Args:
+            key: A key built with make_cache_key.
+        Returns:
+            The cached string, or None on a miss or when the entry has expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._expired(created_at, now):
+                        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, value, created_at)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        """
+        Stores a value in both tiers and evicts expired or excess entries.
+        Args:
+            key: A key built with make_cache_key.
+            value: The string to cache.
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) "
+                                 "VALUES (?, ?, ?, ?)", (key, value, now, now))
+                if self.ttl is not None:
+                    self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+                self._db.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                                 "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_disk_entries,))
+                self._db.commit()
+
+    def clear(self):
+        """
+        Removes every entry from both tiers. The hit/miss counters are left untouched.
+        """
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self):
+        """
+        Returns the cache counters.
+        Returns:
+            A dict with hits, misses, memory_hits, disk_hits, the hit rate and the in-memory size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def close(self):
+        """
+        Closes the SQLite connection, if any.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _expired(self, created_at, now):
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+
+class CachedClient:
+    def __init__(self, client, cache):
+        """
+        Wraps an OpenAI client so that chat.completions.create is answered from a ResponseCache when possible.
+        Every other attribute is passed through to the wrapped client.
+        Args:
+            client: The OpenAI client (or another wrapper with the same interface) to send misses to.
+            cache: The ResponseCache to read from and write to.
+        """
+        self.client = client
+        self.cache = cache
+        self.chat = _CachedChat(self)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class _CachedChat:
+    def __init__(self, owner):
+        self.completions = _CachedCompletions(owner)
+
+
+class _CachedCompletions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **kwargs):
+        client = self._owner.client
+        cache = self._owner.cache
+
+        # Multi-choice requests are sent through unchanged.
+        if kwargs.get("n", 1) != 1:
+            return client.chat.completions.create(**kwargs)
+
+        # Streamed and non-streamed requests for the same prompt share one entry.
+        stream = kwargs.get("stream", False)
+        params = {name: value for name, value in kwargs.items()
+                  if name not in _TRANSPORT_PARAMS and name not in ("stream", "stream_options")}
+        key = make_cache_key(**params)
+        cached = cache.get(key)
+        if cached is not None:
+            from openai.types.chat import ChatCompletion
+            response = ChatCompletion.model_validate_json(cached)
+            return _replay_stream(response) if stream else response
+
+        response = client.chat.completions.create(**kwargs)
+        if stream:
+            return _record_stream(response, cache, key)
+        if hasattr(response, "model_dump_json"):
+            cache.set(key, response.model_dump_json())
+        return response
+
+
+def _replay_stream(response):
+    """
+    Yields a cached completion as a single stream chunk.
+    """
+    from openai.types.chat import ChatCompletionChunk
+    choice = response.choices[0]
+    yield ChatCompletionChunk.model_validate({
+        "id": response.id, "object": "chat.completion.chunk", "created": response.created, "model": response.model,
+        "choices": [{"index": 0, "delta": {"role": "assistant", "content": choice.message.content},
+                     "finish_reason": choice.finish_reason}],
+        "usage": response.usage.model_dump() if response.usage is not None else None,
+    })
+
+
+def _record_stream(stream, cache, key):
+    """
+    Passes a streamed completion through chunk by chunk and caches it once the stream has been read to the end.
+    """
+    parts = []
+    completion = {"id": "", "created": 0, "model": "", "finish_reason": "stop", "usage": None}
+    for chunk in stream:
+        completion["id"] = chunk.id or completion["id"]
+        completion["created"] = chunk.created or completion["created"]
+        completion["model"] = chunk.model or completion["model"]
+        if getattr(chunk, "usage", None) is not None:
+            completion["usage"] = chunk.usage.model_dump()
+        if chunk.choices:
+            choice = chunk.choices[0]
+            if choice.delta.content:
+                parts.append(choice.delta.content)
+            if choice.finish_reason:
+                completion["finish_reason"] = choice.finish_reason
+        yield chunk
+
+    from openai.types.chat import ChatCompletion
+    response = ChatCompletion.model_validate({
+        "id": completion["id"], "object": "chat.completion", "created": completion["created"],
+        "model": completion["model"], "usage": completion["usage"],
+        "choices": [{"index": 0, "finish_reason": completion["finish_reason"],
+                     "message": {"role": "assistant", "content": "".join(parts)}}],
+    })
+    cache.set(key, response.model_dump_json())
@@ -1,20 +1,179 @@
-from openai import OpenAI
+import json
 from datetime import datetime
-import docx
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from resume_parser import parse_resume, KEY_SKILLS, WORK_EXPERIENCE
+from response_cache import ResponseCache, CachedClient
+from keyword_extractor import get_default_extractor, merge_keywords
+from pipeline import Pipeline
+from metrics import MetricsRegistry, InstrumentedClient
+from rate_limiting import RateLimiter, RateLimitedClient, without_client_retries
+from conversation_log import ConversationLog
+from incremental import IncrementalStore, resume_items, render_items
+from speculative_review import SpeculativeReview, review_delta, REUSED, REFRESHED
+from prompt_templates import (EXTRACT_KEYWORDS, PROCESS_RESUME, PROCESS_RESUME_STRUCTURED, PROCESS_RESUME_ITEMS,
+                              REVIEW_RESUME, REVIEW_RESUME_STRUCTURED, REVIEW_DELTA, REVIEW_DELTA_STRUCTURED,
+                              FIX_RESUME, FIX_RESUME_STRUCTURED, SPECIAL_GPT_LOG)
+from model_cascade import STAGE_MODELS, CHEAP_MODEL
+from prompt_compaction import compact_resume, compact_job_description, count_tokens, format_keywords
+from structured_outputs import (KeywordResult, ResumeSections, ResumeReview, FixedResume, TailoredItems,
+                                StructuredOutputError,
+                                structured_request, parse_structured, repair_request)
+
+KEYWORD_MODES = ("llm", "local", "hybrid")
+
+
+class JobResult:
+    """
+    Holds the outcome of tailoring one resume against one job description in batch mode.
+    Each batch job gets its own JobResult so that concurrent jobs never share mutable state.
+    Attributes:
+        index: Position of the job description in the batch input.
+        job_description: The job description text.
+        keywords: The list of keywords extracted from the job description.
+        processed_resume: The resume text tailored to the job description.
+        review_response: The review of the processed resume, or None if reviewing was skipped.
+        review: The structured_outputs.ResumeReview (score, missing skills, suggestions), when the job ran with
+                structured_outputs.
+        conversation_log: The conversation_log.ConversationLog of this job; its latest records are kept in memory.
+        error: The exception raised while processing this job, or None on success.
+        elapsed: Wall-clock seconds spent on this job.
+        timings: A dict mapping each stage to its duration in seconds, when the job ran through run_pipeline.
+        match: In shortlisted runs over a match_index.MatchIndex, the IndexedMatch (candidate id, job id and local
+               score) that put this pair on the shortlist.
+        duplicate_of: In deduplicated runs, the index of the near-identical job description whose results this
+                      job reuses, or None if it was processed itself.
+        speculation: With speculative_review, the speculative_review.ReviewDelta between the original and the
+                     processed resume, including whether the speculative review was reused, checked or refreshed.
+        api_calls: The API requests this job sent (cache misses, retries included).
+    """
+
+    def __init__(self, index, job_description):
+        self.index = index
+        self.job_description = job_description
+        self.keywords = None
+        self.processed_resume = None
+        self.review_response = None
+        self.review = None
+        self.conversation_log = []
+        self.error = None
+        self.elapsed = None
+        self.timings = {}
+        self.duplicate_of = None
+        self.match = None
+        self.speculation = None
+        self.api_calls = 0
+
+    @property
+    def ok(self):
+        """
+        True if the job finished without raising an exception.
+        """
+        return self.error is None
+
+    def to_dict(self):
+        """
+        Returns the result as a JSON-serializable dict (the error as its repr), without the conversation log.
+        """
+        keywords = self.keywords if self.keywords is None or isinstance(self.keywords, str) else list(self.keywords)
+        return {"index": self.index, "ok": self.ok, "keywords": keywords, "processed_resume": self.processed_resume,
+                "review_response": self.review_response,
+                "score": self.review.score if self.review is not None else None,
+                "missing_skills": self.review.missing_skills if self.review is not None else None,
+                "error": repr(self.error) if self.error is not None else None,
+                "elapsed": self.elapsed, "timings": self.timings,
+                "duplicate_of": self.duplicate_of,
+                "match": self.match.to_dict() if self.match is not None else None,
+                "speculation": self.speculation.to_dict() if self.speculation is not None else None}
+
 
 class ResumeProcessor:
-    def __init__(self, openai_client):
+    def __init__(self, openai_client, cache=None, section_headings=None, keyword_mode="llm", keyword_extractor=None,
+                 metrics=None, compact_prompts=False, token_budget=None, structured_outputs=False,
+                 rate_limiter=None, cascade=None, log_sink=None, log_max_records=1000,
+                 incremental=False, speculative_review=False, incremental_store=None):
         """
         Initializes the ResumeProcessor with an OpenAI client.
         Args:
             openai_client: An instance of the OpenAI API client to be used for API calls.
+            cache: Optional; a ResponseCache used to answer repeated prompts. Defaults to an in-memory cache.
+            section_headings: Optional; the resume section headings to split on, either a list of headings or a
+                              dict mapping headings to section names. Defaults to resume_parser.SECTION_HEADINGS.
+            keyword_mode: How process_job_description finds keywords: "llm" asks the OpenAI API, "local" only uses
+                          the offline keyword extractor, and "hybrid" uses the local extractor first and sends only
+                          the job description lines it found no known terms in to the API.
+            keyword_extractor: Optional; the KeywordExtractor for the "local" and "hybrid" modes. Defaults to one
+                               built over the bundled ats_terms.txt vocabulary.
+            metrics: Optional; a MetricsRegistry recording latency, tokens and cost of every API call and the docx
+                     parse. A new registry is created by default; see export_metrics.
+            compact_prompts: A boolean that determines if process_resume and fix_resume compact their prompts
+                             before sending: keywords are de-duplicated and sent as one line, and Work Experience
+                             bullets sharing no keyword with the job description are left out.
+            token_budget: Optional; with compact_prompts, the maximum number of tokens for the resume sent by
+                          process_resume and for the job description sent by fix_resume.
+            structured_outputs: A boolean that determines if every stage asks for a JSON reply (see
+                                structured_outputs.py) instead of free text split on commas and '```'. Replies that
+                                don't match the schema get one cheap repair call instead of a re-run. The parsed
+                                results are kept in keyword_result, resume_sections, review and fixed_resume_result.
+            rate_limiter: Optional; a rate_limiting.RateLimiter retrying rate limits and transient errors with
+                          backoff and, given rate limits (e.g. rate_limiting.RATE_LIMITS for usage tier 1),
+                          throttling calls to each model's requests and tokens per minute. Defaults to one that only
+                          retries, shared by the batch jobs; pass the same limiter to every processor using the same
+                          API key. An OpenAI client's own retries are turned off for chat completions, so those are
+                          only retried by the limiter. For a pooled client, see rate_limiting.make_openai_client.
+            cascade: Optional; a model_cascade.CascadeRouter. Each stage then tries the cheap model first and only
+                     escalates to the larger one when the reply fails the stage's checks (delimiter present, score
+                     parseable, enough keywords kept). Escalation rates are recorded in the metrics.
+            log_sink: Optional; a conversation_log.JsonlLogSink every log record is written through to, shared with
+                      the batch jobs. Without one only the in-memory log is kept.
+            log_max_records: The number of log records kept in memory (per job in batch mode).
+            incremental: A boolean that determines if process_resume tailors the resume per skill and per bullet,
+                         keeping each item's output in the cache by a hash of its content, so that re-running after
+                         editing a few bullets only sends those bullets. fix_resume likewise builds on its stored
+                         output and only sends experiences that were added since. The per-item requests always ask
+                         for JSON, whatever structured_outputs is, and are not compacted (only changed items are
+                         sent anyway); the cascade still applies, escalating when a reply leaves items out.
+            speculative_review: A boolean that determines if run_pipeline and the batch jobs start reviewing the
+                                original resume at the same time as process_resume instead of after it. Once the
+                                processed resume exists, the speculative review is kept if no job description
+                                keyword changed between covered and missing, updated by a cheap model if a few did,
+                                and otherwise replaced by a full review (see speculative_review.py).
+            incremental_store: Optional; the incremental.IncrementalStore keeping the outputs for incremental. By
+                               default one is kept next to the cache's file (in memory if the cache has none), so
+                               the outputs last across sessions whenever the responses do.
         """
-        self.client = openai_client
-        self.conversation_log = []
+        if keyword_mode not in KEYWORD_MODES:
+            raise ValueError(f"keyword_mode must be one of {KEYWORD_MODES}, not {keyword_mode!r}")
+        self.openai_client = openai_client
+        self.section_headings = section_headings
+        self.keyword_mode = keyword_mode
+        self.keyword_extractor = keyword_extractor
+        self.compact_prompts = compact_prompts
+        self.token_budget = token_budget
+        self.structured_outputs = structured_outputs
+        self.cascade = cascade
+        self.cache = cache if cache is not None else ResponseCache()
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        # Only calls that miss the cache are throttled, and every attempt (retries included) reaches the
+        # instrumented client, so the metrics reflect real API spend
+        self._instrumented = InstrumentedClient(without_client_retries(openai_client), self.metrics)
+        self.client = CachedClient(RateLimitedClient(self._instrumented, self.rate_limiter), self.cache)
+        self.log_sink = log_sink
+        self.log_max_records = log_max_records
+        self.incremental = incremental
+        if incremental_store is None and incremental:
+            incremental_store = IncrementalStore.beside(self.cache)
+        self.incremental_store = incremental_store
+        self.speculative_review = speculative_review
+        self.speculation = None
+        self.dedup_report = None
+        self.conversation_log = ConversationLog(log_sink, log_max_records)
 
     def process_job_description(self, job_description, verbose=True):
         """
-        Extracts keywords from a given job description using the OpenAI API.
+        Extracts keywords from a given job description using the OpenAI API, the local keyword extractor, or both
+        (see keyword_mode).
         Args:
             job_description: A string containing the job description from which to extract keywords.
             verbose: A boolean that determines if the function should return a verbose response.
@@ -23,75 +182,76 @@ class ResumeProcessor:
         """
 
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"({current_time}) Processing Job Description...\n")
+        self.log_interaction(f"({current_time}) Processing Job Description...\n", "process_job_description")
         self.job_description = job_description
-        """ Process the job description to extract keywords using OpenAI's API. """
-        response = self.client.chat.completions.create(
-            model="gpt-3.5-turbo-0125",
-            messages=[
-                {"role": "system",
-                 "content": "Your task is to find and list all of the keywords and key skills that are present in "
-                            "a job description using ATS standards. Please write nothing other than the keywords "
-                            "and key skills from this job description in your response."},
-                {"role": "user", "content": self.job_description}
-            ]
-        )
-        self.keywords = response.choices[0].message.content.strip().split(",")
+
+        if self.keyword_mode == "llm":
+            self.keywords = self._extract_keywords_llm(self.job_description)
+        else:
+            extractor = self.keyword_extractor or get_default_extractor()
+            self.keywords = extractor.extract(self.job_description)
+            if self.keyword_mode == "hybrid":
+                unmatched = "\n".join(extractor.unmatched_lines(self.job_description))
+                if unmatched:
+                    self.keywords = merge_keywords(self.keywords, self._extract_keywords_llm(unmatched))
+
         if verbose:
             self.keywords = (f"Keywords Extracted: \n{self.keywords}")
         else:
             self.keywords = self.keywords
         return self.keywords
+
+    def _extract_keywords_llm(self, text):
+        """
+        Asks the OpenAI API for the keywords and key skills in a (possibly partial) job description.
+        Args:
+            text: The job description text to send.
+        Returns:
+            The list of keywords in the reply.
+        """
+        if self.structured_outputs:
+            self.keyword_result = self._create_structured("process_job_description", KeywordResult,
+                                                          STAGE_MODELS["process_job_description"],
+                                                          EXTRACT_KEYWORDS.system,
+                                                          EXTRACT_KEYWORDS.user_content(job_description=text))
+            return self.keyword_result.keywords
+        response = self._complete(
+            "process_job_description",
+            model=STAGE_MODELS["process_job_description"],
+            messages=EXTRACT_KEYWORDS.messages(job_description=text)
+        )
+        return response.choices[0].message.content.strip().split(",")
     
     def load_resume_sections(self, resume_file_path):
         """
         Loads and parses specific sections (Key Skills, Work Experience) from a given resume file.
+        The document itself is only parsed once per file content; see resume_parser.parse_resume.
         Args:
             resume_file_path: A string path to the resume file to be processed.
         Returns:
             Two strings containing formatted Key Skills and Work Experience sections.
         """
 
-        doc = docx.Document(resume_file_path)
-        key_skills_text = ''
-        work_experience_text = ''
-        capture_skills = False
-        capture_experience = False
-
-        stop_sections = ['Education', 'Projects', 'Certifications', 'Skills', 'Languages', 'Interests', 'References']
-
-        for para in doc.paragraphs:
-            if para.text == 'Key Skills':
-                capture_skills = True
-                continue
+        with self.metrics.time_stage("docx_parse"):
+            parsed = parse_resume(resume_file_path, self.section_headings)
+        key_skills_text = "".join(line + '\n' for line in parsed.sections.get(KEY_SKILLS, []))
+        key_skills_final = f"Key Skills: \n{key_skills_text.split('•')}\n"
 
-            if para.text == 'Work Experience':
-                capture_skills = False
-                capture_experience = True
-                work_experience_text += "Work Experience: \n"
-                continue
+        work_experience_final = ''
+        if WORK_EXPERIENCE in parsed.sections:
+            work_experience_final = "Work Experience: \n" + "".join(line + '\n' for line in parsed.sections[WORK_EXPERIENCE])
 
-            elif para.text in stop_sections:
-                capture_experience = False
-                capture_skills = False
-
-            if capture_skills and para.text.strip() != '':
-                key_skills_text += para.text + '\n'
-            if capture_experience and para.text.strip() != '':
-                work_experience_text += para.text + '\n'
-
-        key_skills_final = f'Key Skills: \n{key_skills_text.split('•')}\n'
-        work_experience_final = work_experience_text
-        
         return key_skills_final, work_experience_final
     
 
-    def process_resume(self, resume_file_path, keywords=None):
+    def process_resume(self, resume_file_path, keywords=None, sections=None):
         """
         Processes the resume to match against provided keywords or previously extracted keywords.
         Args:
             resume_file_path: A string path to the resume file.
             keywords: Optional; a list of keywords to match against the resume content.
+            sections: Optional; the (Key Skills, Work Experience) texts load_resume_sections already returned for
+                      this file, so that it isn't loaded again.
         Returns:
             A processed resume with emphasis on matched skills and experiences.
         """
@@ -100,21 +260,36 @@ class ResumeProcessor:
             keywords = self.keywords
 
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"\n\n({current_time}) Processing Resume...")
+        self.log_interaction(f"\n\n({current_time}) Processing Resume...", "process_resume")
+        if self.incremental:
+            return self._process_resume_incremental(resume_file_path, keywords)
         
-        key_skills, work_experience = self.load_resume_sections(resume_file_path)
+        key_skills, work_experience = sections if sections is not None else self.load_resume_sections(resume_file_path)
         my_resume = f"{key_skills}\n{work_experience}"
-        response = self.client.chat.completions.create(
-            model="gpt-4-turbo-2024-04-09",
+        template = PROCESS_RESUME_STRUCTURED if self.structured_outputs else PROCESS_RESUME
+        user_content = template.user_content(resume=my_resume, keywords=keywords)
+        if self.compact_prompts:
+            parsed = parse_resume(resume_file_path, self.section_headings)
+            compacted = compact_resume(parsed, keywords, self.token_budget, STAGE_MODELS["process_resume"])
+            user_content = self._compacted("process_resume", user_content,
+                                           template.user_content(resume=compacted.text,
+                                                                 keywords=format_keywords(keywords)),
+                                           len(compacted.dropped))
+        if self.structured_outputs:
+            self.resume_sections = self._create_structured(
+                "process_resume", ResumeSections, STAGE_MODELS["process_resume"], template.system, user_content,
+                check=lambda result: self.cascade.check_processed_resume(result.to_text(), keywords, my_resume,
+                                                                         delimited=False))
+            self.processed_resume = self.resume_sections.to_text()
+            self.log_interaction("\nProcessed Resume: " + self.processed_resume, "process_resume")
+            return self.processed_resume
+
+        response = self._complete(
+            "process_resume",
+            check=lambda reply: self.cascade.check_processed_resume(reply, keywords, my_resume),
+            model=STAGE_MODELS["process_resume"],
             #model="gpt-3.5-turbo-0125",
-            messages = [{"role": "system",
-                        "content": """Your task is to take a list of keywords and key skills and then look at my resume text (which contains my key skills and my work experience) and remove anything from my resume that
-                        doesn't match or have anything to do with the keywords and key skills. Please only write the skills and work experience that match the keywords and key skills from the job description.
-                        And if you see any ways to improve the wording in my resume to better match the keywords and key skills in the job description, please do so. When you're done, please write the skills
-                        and bullets in a format that I can easily use a Python split function on. More specifically, please enclose the resume section with this delimiter: '```'. This is so I will always be able to access the resume with this code: so I can will always be able to access the resume portion with this code (resume_response.split('```')[1]) """},
-                        
-                        {"role": "user",
-                        "content": f"keywords: {self.keywords}\n\nmy resume: {my_resume}"}]
+            messages=[{"role": "system", "content": template.system}, {"role": "user", "content": user_content}]
             )
         self.processed_resume = response.choices[0].message.content.split("\n")
         full_text = "\n".join(self.processed_resume)
@@ -122,14 +297,16 @@ class ResumeProcessor:
         try:
             self.processed_resume = full_text.split('```')[1]
         except IndexError:
+            # Fall back to the whole reply rather than carrying on with a list of lines
+            self.processed_resume = full_text
             print("No delimited section found.")
 
-        self.log_interaction("\nProcessed Resume: " + self.processed_resume)
+        self.log_interaction("\nProcessed Resume: " + self.processed_resume, "process_resume")
 
         return self.processed_resume
 
 
-    def review_resume(self, job_description=None, processed_resume=None, model_='gpt-4-turbo-2024-04-09'):
+    def review_resume(self, job_description=None, processed_resume=None, model_=STAGE_MODELS["review_resume"]):
         """
         Reviews the processed resume against the job description to provide a match score and feedback.
         Args:
@@ -146,24 +323,125 @@ class ResumeProcessor:
             processed_resume = self.processed_resume
 
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"\n\n({current_time}) Reviewing Resume...")
+        self.log_interaction(f"\n\n({current_time}) Reviewing Resume...", "review_resume")
+
+        self.review_response, self.review = self._review("review_resume", job_description, processed_resume, model_)
+        self.log_interaction("\nReview Response:\n" + self.review_response, "review_resume")
+
+        return self.review_response
+
 
-        response3 = self.client.chat.completions.create(
+    def _review(self, stage, job_description, resume_text, model_=STAGE_MODELS["review_resume"]):
+        """
+        Sends a review request without touching the instance's review attributes, so a speculative review finishing
+        late on another thread can't overwrite a newer one.
+        Returns:
+            The review text and, with structured_outputs, the structured_outputs.ResumeReview (otherwise None).
+        """
+        template = REVIEW_RESUME_STRUCTURED if self.structured_outputs else REVIEW_RESUME
+        if self.structured_outputs:
+            review = self._create_structured(stage, ResumeReview, model_, template.system,
+                                             template.user_content(resume=resume_text, job_description=job_description))
+            return review.to_text(), review
+
+        response = self._complete(
+            stage,
+            check=lambda reply: self.cascade.check_review(reply),
             model=model_,
-            #model="gpt-3.5-turbo-0125",
-            messages = [{"role": "system",
-                        "content": """Your task is to look at my resume and this job description and let me know how well my resume matches the job description.
-                        I would like you to provide a score from 0 to 100, where 0 is a poor match and 100 is a perfect match. Please provide a brief explanation of why you gave this score.
-                        Additionally, please tell me which keywords and key skills from the job description are missing from my resume and how I can improve my resume to better match the job description."""},
-                        
-                        {"role": "user",
-                        "content": f"job description: {self.job_description}\n\nmy resume: {self.processed_resume}"}]
+            messages=template.messages(resume=resume_text, job_description=job_description)
         )
+        return response.choices[0].message.content, None
 
-        self.review_response = response3.choices[0].message.content
-        self.log_interaction("\nReview Response:\n" + self.review_response)
 
+    def start_speculative_review(self, job_description, resume_file_path, executor,
+                                 model_=STAGE_MODELS["review_resume"]):
+        """
+        Starts reviewing the original resume (as parsed locally) on an executor, so the review overlaps the keyword
+        extraction and process_resume instead of waiting for them. Finish it with finish_speculative_review.
+        Args:
+            job_description: A string of the job description to compare against.
+            resume_file_path: A string path to the resume file.
+            executor: The concurrent.futures executor to run the review on.
+            model_: The model identifier to use for the OpenAI API call.
+        Returns:
+            A speculative_review.SpeculativeReview.
+        """
+        key_skills, work_experience = self.load_resume_sections(resume_file_path)
+        resume_text = f"{key_skills}\n{work_experience}"
+        self.log_interaction("\nStarting a speculative review of the original resume...", "review_resume")
+        return SpeculativeReview(resume_text, executor.submit(self._review, "speculative_review", job_description,
+                                                              resume_text, model_))
+
+
+    def finish_speculative_review(self, speculative, job_description=None, processed_resume=None, keywords=None):
+        """
+        Turns a speculative review into the review of the processed resume. The speculative review is kept as it is
+        if the processed resume covers the same job description keywords as the original, updated by a cheap model
+        if a few keywords changed, and cancelled (or ignored if already sent) in favor of a full review_resume if
+        many did; see speculative_review.ReviewDelta.decide. A speculative review that failed is refreshed too.
+        Args:
+            speculative: The SpeculativeReview from start_speculative_review.
+            job_description: Optional; a string of the job description to compare against.
+            processed_resume: Optional; the processed resume text.
+            keywords: Optional; the keywords process_resume tailored the resume to.
+        Returns:
+            The review of the processed resume, also kept in review_response (and review) like review_resume.
+        """
+        if job_description is None:
+            job_description = self.job_description
+        if processed_resume is None:
+            processed_resume = self.processed_resume
+        if keywords is None:
+            keywords = self.keywords
+
+        delta = review_delta(speculative.resume_text, processed_resume, keywords)
+        delta.outcome = delta.decide()
+        self.speculation = delta
+        if delta.outcome != REFRESHED:
+            try:
+                review_response, review = speculative.future.result()
+            except Exception as exc:
+                self.log_interaction(f"\nSpeculative review failed ({exc!r})", "review_resume")
+                delta.outcome = REFRESHED
+        self.log_interaction(f"\nSpeculative review {delta.outcome}: {len(delta.gained)} keywords gained and "
+                             f"{len(delta.lost)} lost of {delta.keywords} (divergence {delta.divergence:.2f})",
+                             "review_resume")
+        self.metrics.record_speculation(delta.outcome)
+
+        if delta.outcome == REFRESHED:
+            speculative.cancel()
+            return self.review_resume(job_description, processed_resume)
+        if delta.outcome == REUSED:
+            self.review_response, self.review = review_response, review
+        else:
+            self.review_response, self.review = self._check_review_delta(job_description, processed_resume,
+                                                                         review_response, delta)
+        self.log_interaction("\nReview Response:\n" + self.review_response, "review_resume")
         return self.review_response
+
+
+    def _check_review_delta(self, job_description, processed_resume, review_response, delta,
+                            model_=CHEAP_MODEL):
+        """
+        Asks a cheap model to update a speculative review for the keywords the processed resume gained or lost.
+        Returns:
+            The updated review text and, with structured_outputs, its ResumeReview (otherwise None).
+        """
+        template = REVIEW_DELTA_STRUCTURED if self.structured_outputs else REVIEW_DELTA
+        values = {"resume": processed_resume, "job_description": job_description, "review": review_response,
+                  "changes": delta.describe()}
+        if self.structured_outputs:
+            review = self._create_structured("review_delta", ResumeReview, model_, template.system,
+                                             template.user_content(**values))
+            return review.to_text(), review
+
+        response = self._complete(
+            "review_delta",
+            check=lambda reply: self.cascade.check_review(reply),
+            model=model_,
+            messages=template.messages(**values)
+        )
+        return response.choices[0].message.content, None
     
 
     def save_special_log_for_gpt(self, job_description=None, processed_resume=None, review_response=None, new_experiences=None):
@@ -190,25 +468,18 @@ class ResumeProcessor:
             new_experiences = self.new_experiences
 
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"\n\n({current_time}) Saving ChatGPT Prompt...")
-
-        content = (
-        "Your task is to read my resume, a job description, a set of recommendations "
-        "I received for my resume regarding this job description, and a list of my experiences that "
-        "are currently not present in my resume. After reading these, please write the relevant "
-        "experiences from my list of experiences into my resume in a way that makes sense and "
-        "is easy for recruiters to read and interpret. For each of the bullets that you add "
-        "to the resume, please keep the same level of succinctness that is present in the "
-        "bullets in the current resume. Please also make sure to include the experiences "
-        "in the correct sections and jobs of my resume."
-        )
+        self.log_interaction(f"\n\n({current_time}) Saving ChatGPT Prompt...", "save_special_log_for_gpt")
 
-        content2 = f"job description:\n{self.job_description}\n\nmy resume:\n{self.processed_resume}\n\nrecommendations:\n{self.review_response}\n\nexperiences not on resume:\n{self.new_experiences}"
-        self.log_interaction(f"\nPrompt for ChatGPT: \n{content}\n\n{content2}")
+        content = SPECIAL_GPT_LOG.system
+        content2 = SPECIAL_GPT_LOG.user_content(resume=self.processed_resume, job_description=self.job_description,
+                                                recommendations=self.review_response,
+                                                experiences=self.new_experiences)
+        self.log_interaction(f"\nPrompt for ChatGPT: \n{content}\n\n{content2}", "save_special_log_for_gpt")
         return f"\nPrompt for ChatGPT: \n{content}\n\n{content2}"
 
     
-    def fix_resume(self, job_description=None, processed_resume=None, new_experiences=None, model_='gpt-4-turbo-2024-04-09'):
+    def fix_resume(self, job_description=None, processed_resume=None, new_experiences=None,
+                   model_=STAGE_MODELS["fix_resume"]):
         """
         Integrates new experiences into the processed resume based on user input and API feedback.
         Args:
@@ -229,38 +500,638 @@ class ResumeProcessor:
         if new_experiences is None:
             new_experiences = self.new_experiences
 
-        self.log_interaction("\nNew Experiences: \n" + self.new_experiences)
+        self.log_interaction("\nNew Experiences: \n" + self.new_experiences, "fix_resume")
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"\n\n({current_time}) Fixing Resume...")
+        self.log_interaction(f"\n\n({current_time}) Fixing Resume...", "fix_resume")
 
-        response4 = self.client.chat.completions.create(
+        resume_text = self.processed_resume
+        experiences = self.new_experiences
+        if self.incremental:
+            # Build on the stored fixed resume that already covers some of these experiences, if there is one
+            prior, remaining = self.incremental_store.prior_fix(self.job_description, self.processed_resume,
+                                                                self.new_experiences, model_)
+            if prior is not None:
+                self.log_interaction(f"\nIncremental fix: {len(remaining)} new experience lines to add to the "
+                                     f"stored fixed resume", "fix_resume")
+                if not remaining:
+                    self.fixed_resume = prior
+                    self.log_interaction("\nFixed Resume:\n" + self.fixed_resume, "fix_resume")
+                    return self.fixed_resume
+                resume_text = prior
+                experiences = "\n".join(remaining)
+
+        template = FIX_RESUME_STRUCTURED if self.structured_outputs else FIX_RESUME
+        user_content = template.user_content(resume=resume_text, job_description=self.job_description,
+                                             experiences=experiences)
+        if self.compact_prompts:
+            compacted = compact_job_description(self.job_description, getattr(self, "keywords", []),
+                                                self.token_budget, model_)
+            user_content = self._compacted("fix_resume", user_content,
+                                           template.user_content(resume=resume_text, job_description=compacted.text,
+                                                                 experiences=experiences),
+                                           len(compacted.dropped))
+
+        if self.structured_outputs:
+            self.fixed_resume_result = self._create_structured("fix_resume", FixedResume, model_, template.system,
+                                                               user_content)
+            self.fixed_resume = self.fixed_resume_result.resume
+            self._store_fix(model_)
+            self.log_interaction("\nFixed Resume:\n" + self.fixed_resume, "fix_resume")
+            return self.fixed_resume
+
+        response4 = self._complete(
+        "fix_resume",
+        check=lambda reply: self.cascade.check_reply(reply),
         model=model_,
         #model="gpt-3.5-turbo-0125",
-        messages = [{"role": "system",
-                    "content": """Your task is to read my resume, a job description, and a list of my experiences that are currently not present in my resume.
-                    After reading these, please write the relevant experiences from my list of experiences into my resume in a way that makes sense and is easy for recruiters to read and 
-                    interpret. For each of the bullets that you add to the resume, please keep the same level of succinctness that is present in the bullets in the 
-                    current resume. Please also make sure to include the experiences in the correct sections and jobs of my resume."""},
-                    
-                    {"role": "user",
-                    "content": f"job description: {self.job_description}\n\nmy resume: {self.processed_resume}\n\nexperiences not on resume: {self.new_experiences}"}]
+        messages=[{"role": "system", "content": template.system}, {"role": "user", "content": user_content}]
         )
 
         self.fixed_resume = response4.choices[0].message.content
-        self.log_interaction("\nFixed Resume:\n" + self.fixed_resume)
+        self._store_fix(model_)
+        self.log_interaction("\nFixed Resume:\n" + self.fixed_resume, "fix_resume")
         return self.fixed_resume
 
 
-    def log_interaction(self, text):
+    def _process_resume_incremental(self, resume_file_path, keywords, model=STAGE_MODELS["process_resume"]):
+        """
+        Tailors the resume item by item (each skill and each Work Experience bullet), only sending the items whose
+        text, employer, keywords or model changed since their output was stored, and merging the stored outputs
+        back in for the rest.
+        Args:
+            resume_file_path: A string path to the resume file.
+            keywords: The keywords to match against the resume content.
+            model: The model identifier to use for the OpenAI API call.
+        Returns:
+            The processed resume text.
+        """
+        with self.metrics.time_stage("docx_parse"):
+            parsed = parse_resume(resume_file_path, self.section_headings)
+        items, blocks = resume_items(parsed)
+        store = self.incremental_store
+        outputs, changed = store.split(items, keywords, model)
+        if not self.structured_outputs or self.compact_prompts:
+            self.log_interaction("\nIncremental processing sends uncompacted JSON requests per resume item, "
+                                 "ignoring structured_outputs and compact_prompts", "process_resume")
+
+        if changed:
+            result = self._create_structured(
+                "process_resume", TailoredItems, model, PROCESS_RESUME_ITEMS.system,
+                PROCESS_RESUME_ITEMS.user_content(items=json.dumps([item.to_prompt() for item in changed]),
+                                                  keywords=format_keywords(keywords)),
+                check=lambda result: None if all(item.id in result.items for item in changed)
+                else "items missing from the reply")
+            tailored = {item.id: result.items[item.id] for item in changed if item.id in result.items}
+            store.store(changed, tailored, keywords, model)
+            outputs.update(tailored)
+
+        self.metrics.record_compaction("process_resume_incremental",
+                                       count_tokens(json.dumps([item.to_prompt() for item in items])),
+                                       count_tokens(json.dumps([item.to_prompt() for item in changed])))
+        self.log_interaction(f"\nIncremental processing: sent {len(changed)} of {len(items)} resume items, "
+                             f"reused {len(items) - len(changed)} stored outputs", "process_resume")
+        self.processed_resume = render_items(items, blocks, outputs)
+        self.log_interaction("\nProcessed Resume: " + self.processed_resume, "process_resume")
+        return self.processed_resume
+
+
+    def _store_fix(self, model):
+        if self.incremental:
+            self.incremental_store.store_fix(self.job_description, self.processed_resume, self.new_experiences, model,
+                                             self.fixed_resume)
+
+
+    def run_pipeline(self, job_description, resume_file_path, review=True):
+        """
+        Tailors the resume to one job description with the independent stages overlapped: the keyword extraction
+        and the docx parse run at the same time, and process_resume starts as soon as the keywords exist, reusing
+        the parsed sections.
+        With speculative_review, the review of the original resume also starts once the parse is done.
+        Args:
+            job_description: A string containing the job description.
+            resume_file_path: A string path to the resume file.
+            review: A boolean that determines if the processed resume should also be reviewed.
+        Returns:
+            A JobResult whose timings attribute holds the duration of each stage. The timing breakdown is also
+            written to the conversation log.
+        """
+
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.log_interaction(f"\n\n({current_time}) Running Pipeline...", "pipeline")
+
+        result = JobResult(0, job_description)
+        start = time.perf_counter()
+        pipeline = Pipeline(max_workers=4)
+        try:
+            keywords = pipeline.submit("keywords", self.process_job_description, job_description, verbose=False)
+            sections = pipeline.submit("parse", self.load_resume_sections, resume_file_path)
+            # The parse is local and finishes long before the keyword call, so only the keywords are a dependency
+            processed = pipeline.submit("process_resume", lambda: self.process_resume(
+                resume_file_path, sections=sections.result()), after=(keywords,))
+            reviewed = None
+            if review and self.speculative_review:
+                key_skills, work_experience = sections.result()
+                resume_text = f"{key_skills}\n{work_experience}"
+                speculative = SpeculativeReview(resume_text, pipeline.submit(
+                    "speculative_review", self._review, "speculative_review", job_description, resume_text))
+                reviewed = pipeline.submit("review", self.finish_speculative_review, speculative, after=(processed,))
+            elif review:
+                reviewed = pipeline.submit("review", self.review_resume, after=(processed,))
+
+            result.keywords = keywords.result()
+            result.processed_resume = processed.result()
+            if reviewed is not None:
+                result.review_response = reviewed.result()
+                result.review = getattr(self, "review", None)
+                result.speculation = self.speculation if self.speculative_review else None
+        except Exception as exc:
+            result.error = exc
+        finally:
+            # A refreshed speculative review may still be in flight; its reply isn't needed
+            pipeline.shutdown(wait=result.error is None and (result.speculation is None
+                                                             or result.speculation.outcome != REFRESHED))
+
+        result.elapsed = time.perf_counter() - start
+        result.timings = pipeline.timings.durations()
+        self.log_interaction("\n" + pipeline.timings.summary(), "pipeline")
+        self.log_metrics_summary()
+        return result
+
+
+    def process_batch(self, job_descriptions, resume_file_path, max_workers=8, review=True):
+        """
+        Tailors one resume against many job descriptions concurrently.
+        Every job runs on its own ResumeProcessor that shares this instance's OpenAI client, so the
+        per-job state (job description, keywords, processed resume) never leaks between jobs.
+        Args:
+            job_descriptions: An iterable of job description strings.
+            resume_file_path: A string path to the resume file.
+            max_workers: The maximum number of jobs in flight at once.
+            review: A boolean that determines if each processed resume should also be reviewed.
+        Yields:
+            A JobResult for each job description, in the order the jobs finish.
+        """
+
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.log_interaction(f"\n\n({current_time}) Processing Batch...", "batch")
+
+        # Parse the resume up front so the jobs all reuse the memoized result
+        parse_resume(resume_file_path, self.section_headings)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [executor.submit(self._run_batch_job, index, job_description, resume_file_path, review)
+                       for index, job_description in enumerate(job_descriptions)]
+            for future in as_completed(futures):
+                result = future.result()
+                status = "done" if result.ok else f"failed: {result.error!r}"
+                self.log_interaction(f"\nBatch job {result.index} {status} ({result.elapsed:.1f}s)", "batch")
+                yield result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.log_metrics_summary()
+
+
+    def process_job(self, job_description, resume_file_path, review=True, index=0):
+        """
+        Tailors the resume to one job description on a fresh ResumeProcessor sharing this instance's clients,
+        cache and metrics, so it is safe to call from many threads at once (e.g. a worker pool).
+        Args:
+            job_description: A string containing the job description.
+            resume_file_path: A string path to the resume file.
+            review: A boolean that determines if the processed resume should also be reviewed.
+            index: The index to give the JobResult.
+        Returns:
+            A JobResult; exceptions are captured on it rather than raised.
+        """
+        return self._run_batch_job(index, job_description, resume_file_path, review)
+
+
+    def rank_job_descriptions(self, job_descriptions, resume_file_path, top_k=None, max_workers=8):
+        """
+        Ranks job descriptions by a local keyword-coverage score, without calling review_resume.
+        Keywords are extracted per job description (see keyword_mode), then the resume is scored against all of
+        them at once in match_scoring.
+        Args:
+            job_descriptions: A list of job description strings.
+            resume_file_path: A string path to the resume file.
+            top_k: Optional; only return the best top_k matches.
+            max_workers: The maximum number of keyword extractions in flight at once.
+        Returns:
+            A list of match_scoring.MatchScore objects, best match first. Each score's index is the position of its
+            job description in job_descriptions, and its missing attribute lists the keywords the resume lacks.
+        """
+        from match_scoring import rank_matches
+
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.log_interaction(f"\n\n({current_time}) Ranking Job Descriptions...", "rank_job_descriptions")
+
+        parsed = parse_resume(resume_file_path, self.section_headings)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            keyword_lists = list(executor.map(
+                lambda job_description: self._spawn().process_job_description(job_description, verbose=False),
+                job_descriptions))
+
+        ranking = rank_matches(parsed.text, keyword_lists, top_k)
+        self.log_interaction("\nRanking: " + ", ".join(f"#{match.index} ({match.score})" for match in ranking), "rank_job_descriptions")
+        return ranking
+
+
+    def process_top_matches(self, job_descriptions, resume_file_path, top_k=5, max_workers=8, review=True):
+        """
+        Ranks job descriptions locally and runs the full processing (and review) only for the top_k matches.
+        Args:
+            job_descriptions: A list of job description strings.
+            resume_file_path: A string path to the resume file.
+            top_k: The number of best-matching job descriptions to process.
+            max_workers: The maximum number of jobs in flight at once.
+            review: A boolean that determines if each processed resume should also be reviewed.
+        Yields:
+            A JobResult for each of the top_k job descriptions, in the order the jobs finish. JobResult.index is the
+            position in job_descriptions.
+        """
+        ranking = self.rank_job_descriptions(job_descriptions, resume_file_path, top_k, max_workers)
+        shortlist = [job_descriptions[match.index] for match in ranking]
+        for result in self.process_batch(shortlist, resume_file_path, max_workers, review):
+            result.index = ranking[result.index].index
+            yield result
+
+
+    def index_job_descriptions(self, index, job_descriptions, max_workers=8):
+        """
+        Extracts keywords from many job descriptions (see keyword_mode) and stores them in a match index.
+        Args:
+            index: The match_index.MatchIndex to add the job descriptions to.
+            job_descriptions: A dict mapping job ids to job description strings.
+            max_workers: The maximum number of keyword extractions in flight at once.
+        Returns:
+            The index.
+        """
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.log_interaction(f"\n\n({current_time}) Indexing {len(job_descriptions)} Job Descriptions...",
+                             "index_job_descriptions")
+
+        def add(item):
+            job_id, job_description = item
+            index.add_job(job_id, self._spawn().process_job_description(job_description, verbose=False),
+                          job_description)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(add, job_descriptions.items()))
+        return index
+
+
+    def process_matches(self, index, top_k=20, by="candidate", max_workers=8, review=True):
+        """
+        Scores every candidate in a match index against every job description locally and runs the full processing
+        (and review) only for the shortlisted pairs: each candidate's top_k job descriptions (by="candidate") or
+        each job description's top_k candidates (by="job").
+        Args:
+            index: A match_index.MatchIndex holding the resumes (added with a file path) and job descriptions (added
+                   with their text).
+            top_k: The number of matches per candidate (or per job description) to process.
+            by: "candidate" or "job".
+            max_workers: The maximum number of jobs in flight at once.
+            review: A boolean that determines if each processed resume should also be reviewed.
+        Yields:
+            A JobResult for each shortlisted pair, in the order the jobs finish. JobResult.index is the position in
+            the shortlist and JobResult.match the pair's IndexedMatch.
+        """
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.log_interaction(f"\n\n({current_time}) Processing Shortlisted Matches...", "process_matches")
+
+        with self.metrics.time_stage("match_index"):
+            shortlist = index.shortlist(top_k, by)
+        self.log_interaction(f"\nShortlisted {len(shortlist)} of {len(index.candidates) * len(index.jobs)} "
+                             f"candidate/job pairs", "process_matches")
+
+        def run_job(position, match):
+            result = self._run_batch_job(position, index.job_description(match.job_id),
+                                         index.resume_file_path(match.candidate_id), review)
+            result.match = match
+            return result
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [executor.submit(run_job, position, match) for position, match in enumerate(shortlist)]
+            for future in as_completed(futures):
+                result = future.result()
+                status = "done" if result.ok else f"failed: {result.error!r}"
+                self.log_interaction(f"\nMatch {result.match.candidate_id} x {result.match.job_id} {status} "
+                                     f"({result.elapsed:.1f}s)", "process_matches")
+                yield result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.log_metrics_summary()
+
+
+    def process_deduplicated(self, job_descriptions, resume_file_path, max_workers=8, review=True, threshold=0.8):
+        """
+        Groups near-identical job descriptions (reposts, the same role in several cities, agency copies) with a local
+        MinHash/LSH index, tailors the resume once per group and hands the result to every member of the group.
+        The dedup ratio and the estimated API calls saved are logged and recorded in the metrics; the report is also
+        kept as self.dedup_report.
+        Args:
+            job_descriptions: A list of job description strings.
+            resume_file_path: A string path to the resume file.
+            max_workers: The maximum number of jobs in flight at once.
+            review: A boolean that determines if each processed resume should also be reviewed.
+            threshold: The word-shingle Jaccard similarity at which two job descriptions count as duplicates.
+        Yields:
+            A JobResult for every job description, in the order their group finishes. JobResult.index is the
+            position in job_descriptions, and duplicate_of the index of the job description that was processed.
+        """
+        import copy
+        from jd_dedup import cluster_job_descriptions, DedupReport
+
+        job_descriptions = list(job_descriptions)
+        with self.metrics.time_stage("jd_dedup"):
+            clusters = cluster_job_descriptions(job_descriptions, threshold)
+        self.log_interaction(f"\nDeduplication: {len(job_descriptions)} job descriptions in {len(clusters)} clusters",
+                             "jd_dedup")
+
+        api_calls = 0
+        representatives = [job_descriptions[cluster.representative] for cluster in clusters]
+        for result in self.process_batch(representatives, resume_file_path, max_workers, review):
+            cluster = clusters[result.index]
+            result.index = cluster.representative
+            api_calls += result.api_calls
+            yield result
+            for member in cluster.duplicates:
+                # A deep copy, so that changing one duplicate's keywords or log doesn't change the others
+                duplicate = copy.deepcopy(result)
+                duplicate.index = member
+                duplicate.job_description = job_descriptions[member]
+                duplicate.duplicate_of = cluster.representative
+                duplicate.api_calls = 0
+                yield duplicate
+
+        calls_saved = round(api_calls / len(clusters) * (len(job_descriptions) - len(clusters))) if clusters else 0
+        self.dedup_report = DedupReport(len(job_descriptions), len(clusters), api_calls, calls_saved)
+        self.metrics.record_dedup(len(job_descriptions), len(clusters), calls_saved)
+        self.log_interaction("\n" + self.dedup_report.summary(), "jd_dedup")
+
+
+    def process_batch_api(self, job_descriptions, resume_file_path, review=True, poll_interval=60.0, runner=None):
+        """
+        Tailors one resume against many job descriptions through the OpenAI Batch API, for non-interactive runs
+        where throughput and cost matter more than latency (batch requests cost half as much and don't count
+        against the regular rate limits). Each stage's requests for all jobs go out as one batch: first every
+        keyword request, then every process_resume request, then every review; replies already in the cache are
+        not resubmitted. Metrics record each request's batch turnaround as its latency, and estimate cost at the
+        Batch API's prices (metrics.BATCH_PRICE).
+        Args:
+            job_descriptions: A list of job description strings.
+            resume_file_path: A string path to the resume file.
+            review: A boolean that determines if each processed resume should also be reviewed.
+            poll_interval: Seconds between batch status checks.
+            runner: Optional; the batch_api.BatchRunner to submit with. Defaults to one over this processor's
+                    OpenAI client.
+        Returns:
+            A list of JobResult objects in input order.
+        """
+        from batch_api import BatchRunner, BatchedClient
+
+        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.log_interaction(f"\n\n({current_time}) Processing Batch API Job Set...", "batch_api")
+
+        if runner is None:
+            runner = BatchRunner(self.openai_client, poll_interval=poll_interval,
+                                 log=lambda text: self.log_interaction("\n" + text, "batch_api"))
+        batched_client = BatchedClient(runner)
+        parse_resume(resume_file_path, self.section_headings)
+
+        def run_job(index, job_description):
+            try:
+                # Batch requests aren't subject to the per-minute limits, so the jobs don't throttle
+                return self._run_batch_job(index, job_description, resume_file_path, review,
+                                           self._spawn(batched_client, RateLimiter()), batched_client)
+            finally:
+                batched_client.release()
+
+        job_descriptions = list(job_descriptions)
+        # One request in flight per job; a speculative review adds its own while it runs (see _run_batch_job)
+        batched_client.expect(len(job_descriptions))
+        # One thread per job, since every job blocks until the batch holding its current request is done
+        with ThreadPoolExecutor(max_workers=max(1, len(job_descriptions))) as executor:
+            results = list(executor.map(run_job, range(len(job_descriptions)), job_descriptions))
+
+        failed = sum(not result.ok for result in results)
+        self.log_interaction(f"\nBatch API job set done: {len(results)} jobs ({failed} failed), "
+                             f"{batched_client.batches_submitted} batches submitted", "batch_api")
+        self.log_metrics_summary()
+        return results
+
+
+    def _spawn(self, openai_client=None, rate_limiter=None):
+        """
+        Creates a fresh ResumeProcessor sharing this instance's client and cache, for use by a single batch job.
+        Args:
+            openai_client: Optional; a different client for the job to send its requests to.
+            rate_limiter: Optional; a different RateLimiter for the job.
+        """
+        return ResumeProcessor(openai_client or self.openai_client, cache=self.cache, section_headings=self.section_headings,
+                               keyword_mode=self.keyword_mode, keyword_extractor=self.keyword_extractor,
+                               metrics=self.metrics, compact_prompts=self.compact_prompts,
+                               token_budget=self.token_budget, structured_outputs=self.structured_outputs,
+                               rate_limiter=rate_limiter or self.rate_limiter, cascade=self.cascade,
+                               log_sink=self.log_sink, log_max_records=self.log_max_records,
+                               incremental=self.incremental, speculative_review=self.speculative_review,
+                               incremental_store=self.incremental_store)
+
+
+    def _run_batch_job(self, index, job_description, resume_file_path, review, worker=None, batched_client=None):
+        """
+        Runs the keyword, processing and (optionally) review steps for one batch job.
+        Exceptions are captured on the returned JobResult so one failing job doesn't end the batch.
+        batched_client is the batch_api.BatchedClient the worker sends to, if any; it is told to expect the speculative
+        review's request next to the job's own until the review is done.
+        """
+        result = JobResult(index, job_description)
+        start = time.perf_counter()
+        executor = None
+        try:
+            worker = worker or self._spawn()
+            if review and worker.speculative_review:
+                executor = ThreadPoolExecutor(max_workers=1)
+            speculative = None
+            if executor is not None:
+                if batched_client is not None:
+                    batched_client.expect()
+                try:
+                    speculative = worker.start_speculative_review(job_description, resume_file_path, executor)
+                except Exception:
+                    if batched_client is not None:
+                        batched_client.release()
+                    raise
+                if batched_client is not None:
+                    # Also runs if the review is cancelled before it's sent
+                    speculative.future.add_done_callback(lambda _: batched_client.release())
+            result.keywords = worker.process_job_description(job_description, verbose=False)
+            result.processed_resume = worker.process_resume(resume_file_path)
+            if speculative is not None:
+                result.review_response = worker.finish_speculative_review(speculative)
+                result.review = getattr(worker, "review", None)
+                result.speculation = worker.speculation
+            elif review:
+                result.review_response = worker.review_resume()
+                result.review = getattr(worker, "review", None)
+        except Exception as exc:
+            result.error = exc
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        result.elapsed = time.perf_counter() - start
+        if worker is not None:
+            result.conversation_log = worker.conversation_log
+            result.api_calls = worker._instrumented.requests
+        return result
+
+
+    def _create(self, stage, **request):
+        """
+        Sends a chat completion request, labelling it with a stage name in the metrics.
+        Args:
+            stage: The name of the processing step making the call.
+            request: The chat.completions.create arguments.
+        Returns:
+            The API response.
+        """
+        with self.metrics.stage(stage):
+            return self.client.chat.completions.create(**request)
+
+
+    def _complete(self, stage, check=None, **request):
+        """
+        Sends a free-text request through the stage's model cascade (see cascade).
+        Args:
+            stage: The name of the processing step making the call.
+            check: Optional; a function returning the reason a cheaper model's reply is rejected, or None.
+            request: The chat.completions.create arguments; model is the model to use without a cascade.
+        Returns:
+            The accepted API response.
+        """
+        def attempt(model, final):
+            response = self._create(stage, **dict(request, model=model))
+            reason = None if final or check is None else check(response.choices[0].message.content)
+            return response, reason
+
+        return self._cascade(stage, request["model"], attempt)
+
+
+    def _create_structured(self, stage, result_type, model, instructions, user_content, check=None):
+        """
+        Sends a request for a JSON reply and parses it into a result object.
+        A reply that doesn't match the schema is escalated to the next model in the stage's cascade; from the last
+        model, it is sent to a cheap model once to be repaired (as the "<stage>_repair" stage) instead of
+        re-running the stage.
+        Args:
+            stage: The name of the processing step making the call.
+            result_type: The structured_outputs result class to parse the reply into.
+            model: The model identifier to use for the OpenAI API call without a cascade.
+            instructions: The system prompt.
+            user_content: The user message.
+            check: Optional; a function returning the reason a cheaper model's result is rejected, or None.
+        Returns:
+            An instance of result_type.
+        Raises:
+            StructuredOutputError: If the repaired reply is still malformed.
+        """
+        def attempt(candidate, final):
+            response = self._create(stage, **structured_request(result_type, candidate, instructions, user_content))
+            reply = response.choices[0].message.content
+            try:
+                result = parse_structured(reply, result_type)
+            except StructuredOutputError as exc:
+                if not final:
+                    return None, str(exc)
+                self.log_interaction(f"\nMalformed {stage} reply ({exc}), requesting a repair...", stage)
+                response = self._create(f"{stage}_repair", **repair_request(result_type, reply, str(exc)))
+                return parse_structured(response.choices[0].message.content, result_type), None
+            return result, None if final or check is None else check(result)
+
+        return self._cascade(stage, model, attempt)
+
+
+    def _cascade(self, stage, model, attempt):
+        """
+        Tries a stage's models in order until one's reply is accepted, and records the escalations in the metrics.
+        Without a cascade, only the method's own model is tried.
+        Args:
+            stage: The name of the processing step making the call.
+            model: The method's own model.
+            attempt: A function taking (model, final) and returning (value, reason), where reason is None if the
+                     value is accepted; the final model's value is always accepted.
+        Returns:
+            The accepted value.
+        """
+        if self.cascade is None:
+            return attempt(model, True)[0]
+        models = self.cascade.models_for(stage, model)
+        for position, candidate in enumerate(models):
+            value, reason = attempt(candidate, position == len(models) - 1)
+            if reason is None:
+                break
+            self.log_interaction(f"\n{stage}: {candidate} reply rejected ({reason}), "
+                                 f"escalating to {models[position + 1]}", stage)
+        self.metrics.record_cascade(stage, candidate, position)
+        return value
+
+
+    def _compacted(self, stage, original, compacted, dropped_lines):
+        """
+        Logs and records how many tokens prompt compaction saved on one call.
+        Args:
+            stage: The name of the processing step making the call.
+            original: The user message the call would have sent without compaction.
+            compacted: The compacted user message.
+            dropped_lines: The number of resume or job description lines left out.
+        Returns:
+            The compacted user message.
+        """
+        tokens_before = count_tokens(original)
+        tokens_after = count_tokens(compacted)
+        self.metrics.record_compaction(stage, tokens_before, tokens_after)
+        self.log_interaction(f"\nPrompt compaction: {tokens_before} -> {tokens_after} tokens "
+                             f"({tokens_before - tokens_after} saved, {dropped_lines} lines left out)", stage)
+        return compacted
+
+
+    def export_metrics(self, format="json"):
+        """
+        Exports the aggregated call and stage metrics.
+        Args:
+            format: "json" for a JSON document or "prometheus" for the Prometheus text exposition format.
+        Returns:
+            The exported metrics as a string.
+        """
+        if format == "prometheus":
+            return self.metrics.to_prometheus()
+        if format == "json":
+            return self.metrics.to_json()
+        raise ValueError(f"Unknown metrics format: {format!r}")
+
+
+    def log_metrics_summary(self):
+        """
+        Appends a summary of the call and stage metrics to the conversation log.
+        """
+        self.log_interaction("\n" + self.metrics.summary(), "metrics")
+
+
+    def log_interaction(self, text, stage=None):
         """
         Logs interactions and steps taken during the processing of the resume.
         Args:
             text: A string of text to log.
+            stage: Optional; the processing step the entry belongs to. Defaults to the stage of the current API call.
         """
-        self.conversation_log.append(text)
+        self.conversation_log.append(text, stage or self.metrics.current_stage())
 
     def print_log(self):
         """
-        Prints the entire conversation log.
+        Prints the entire conversation log, read back from the log sink when there is one (otherwise the records
+        still in memory).
         """
-        print("\n".join(self.conversation_log))
\ No newline at end of file
+        for record in self.conversation_log.records(complete=True):
+            print(record.text)
@@ -1,17 +1,119 @@
+import os
 import sys
+import time
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QTextCursor
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QPushButton, QTextEdit, QLabel, QMessageBox, QFileDialog, QSplitter)
-from openai import OpenAI
-from config import API_KEY
-import docx
 from datetime import datetime
+from resume_parser import parse_resume, KEY_SKILLS, WORK_EXPERIENCE
+from response_cache import ResponseCache, CachedClient, DEFAULT_CACHE_PATH
+from pipeline import StageTimings
+from metrics import MetricsRegistry, InstrumentedClient
+from rate_limiting import RateLimiter, RateLimitedClient, make_openai_client
+from model_cascade import CascadeRouter, STAGE_MODELS
+from prompt_templates import EXTRACT_KEYWORDS, PROCESS_RESUME, REVIEW_RESUME, FIX_RESUME, SPECIAL_GPT_LOG
+from conversation_log import ConversationLog, JsonlLogSink, DEFAULT_LOG_PATH
+
+metrics = MetricsRegistry()
+_default_client = None
+# The job descriptions and resumes are only written to disk when asked for: set this environment variable to a file
+# path (or start the app with --log-file for DEFAULT_LOG_PATH) to also append the full log to a rotating JSONL file
+LOG_FILE_ENV = "RESUME_FIX_APP_LOG_FILE"
+
+
+def get_default_client():
+    """
+    Builds the GUI's shared client on first use: a pooled OpenAI client (keyed from config.py or OPENAI_API_KEY)
+    behind the rate limiter, metrics and the persistent response cache. Deferring it keeps the module importable,
+    and quick to start, without config.py.
+    """
+    global _default_client
+    if _default_client is None:
+        # Cache hits are never throttled and never reach the instrumented client, so the metrics only count real
+        # API calls
+        _default_client = CachedClient(RateLimitedClient(InstrumentedClient(make_openai_client(), metrics),
+                                                         RateLimiter()),
+                                       ResponseCache(DEFAULT_CACHE_PATH))
+    return _default_client
+
+
+class CompletionWorker(QThread):
+    # Runs one streamed chat completion off the GUI thread and reports the reply through signals
+    token = pyqtSignal(str)
+    completed = pyqtSignal(str)
+    failed = pyqtSignal(str)
+
+    def __init__(self, client, stage, model, messages, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self.stage = stage
+        self.model = model
+        self.messages = messages
+        self.time_to_first_token = None
+        self.elapsed = None
+
+    def run(self):
+        start = time.perf_counter()
+        parts = []
+        try:
+            with metrics.stage(self.stage):
+                stream = self.client.chat.completions.create(model=self.model, messages=self.messages, stream=True,
+                                                             stream_options={"include_usage": True})
+                for chunk in stream:
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    if self.time_to_first_token is None:
+                        self.time_to_first_token = time.perf_counter() - start
+                    parts.append(chunk.choices[0].delta.content)
+                    self.token.emit(chunk.choices[0].delta.content)
+        except Exception as exc:
+            self.elapsed = time.perf_counter() - start
+            self.failed.emit(str(exc))
+            return
+        self.elapsed = time.perf_counter() - start
+        self.completed.emit("".join(parts))
+
+
+class ParseWorker(QThread):
+    # Parses the resume off the GUI thread so it can overlap with the keyword request
+    parsed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, load_sections, file_path, parent=None):
+        super().__init__(parent)
+        self.load_sections = load_sections
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            self.parsed.emit(self.load_sections(self.file_path))
+        except Exception as exc:
+            self.failed.emit(str(exc))
 
-client = OpenAI(api_key=API_KEY)
 
 class ResumeApp(QWidget):
-    def __init__(self):
+    def __init__(self, section_headings=None, pipeline=False, client=None, cascade=None, log_file=None):
         super().__init__()
+        # Optional model_cascade.CascadeRouter: each request tries the cheap model first and escalates on a bad reply
+        self.cascade = cascade
+        # The client wrapper chain the completions are sent through; None uses get_default_client() on first request
+        self._client = client
+        # Resume section headings to split on; None uses resume_parser.SECTION_HEADINGS
+        self.section_headings = section_headings
+        # In pipeline mode the resume is picked and parsed while the keyword request is still running
+        self.pipeline = pipeline
+        self.timings = StageTimings()
         self.initUI()
-        self.conversation_log = []
+        # The window keeps the latest records in memory; with a log file (or LOG_FILE_ENV set), the full log is
+        # also appended to a rotating JSONL file
+        log_file = log_file or os.environ.get(LOG_FILE_ENV)
+        self.conversation_log = ConversationLog(JsonlLogSink(log_file) if log_file else None, max_records=500)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_default_client()
+        return self._client
 
     def initUI(self):
         self.layout = QVBoxLayout()
@@ -70,115 +172,139 @@ class ResumeApp(QWidget):
 
     def process_job_description(self):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"({current_time}) Processing Job Description...\n")
+        self.log_interaction(f"({current_time}) Processing Job Description...\n", "process_job_description")
 
         self.job_description = self.job_description_input.toPlainText()
-        self.log_interaction("JD Entered: \n" + self.job_description)
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo-0125",
-            messages=[
-                {"role": "system",
-                 "content": "Your task is to find and list all of the keywords and key skills that are present in "
-                            "a job description using ATS standards. Please write nothing other than the keywords "
-                            "and key skills from this job description in your response."},
-                {"role": "user", "content": self.job_description}
-            ]
+        self.log_interaction("JD Entered: \n" + self.job_description, "process_job_description")
+        self.keywords_output.clear()
+        self.timings = StageTimings()
+        self.timings.start("keywords")
+        self.keywords = None
+        self.resume_sections = None
+        self.resume_processing_started = False
+        self.run_completion(
+            "process_job_description",
+            "Keywords Extracted: \n",
+            self.keywords_extracted,
+            model=STAGE_MODELS["process_job_description"],
+            messages=EXTRACT_KEYWORDS.messages(job_description=self.job_description)
         )
+        if self.pipeline:
+            self.prompt_next_step()
 
-
+    def keywords_extracted(self, reply):
+        self.timings.stop("keywords")
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"({current_time})\n")
+        self.log_interaction(f"({current_time})\n", "process_job_description")
 
-        self.keywords = response.choices[0].message.content.strip().split(",")
+        self.keywords = reply.strip().split(",")
         self.keywords_output.setPlainText("Keywords Extracted: \n" + "\n".join(self.keywords))
-        self.log_interaction("Keywords Extracted: \n" + "\n".join(self.keywords))
-        self.prompt_next_step()
+        self.log_interaction("Keywords Extracted: \n" + "\n".join(self.keywords), "process_job_description")
+        if self.pipeline:
+            self.process_resume_when_ready()
+        else:
+            self.prompt_next_step()
 
     def prompt_next_step(self):
+        self.timings.start("resume selection")
         reply = QMessageBox.question(self, 'Next Step', "Do you want to upload your resume for processing? (Costs Will Be Incurred)",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.upload_resume()
+        else:
+            self.timings.stop("resume selection")
 
     def upload_resume(self):
         file_name, _ = QFileDialog.getOpenFileName(self, "Open Resume File", "", "Word Documents (*.docx);;All Files (*)")
+        self.timings.stop("resume selection")
         if file_name:
             current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.log_interaction(f"\n({current_time}) Uploading Resume...")
+            self.log_interaction(f"\n({current_time}) Uploading Resume...", "upload_resume")
+
+            self.log_interaction("\nResume Uploaded: " + file_name, "upload_resume")
+            self.timings.start("parse")
+            if self.pipeline:
+                parser = ParseWorker(self.load_resume_sections, file_name, self)
+                parser.parsed.connect(self.resume_parsed)
+                parser.failed.connect(self.resume_parse_failed)
+                parser.finished.connect(parser.deleteLater)
+                self.parser = parser
+                parser.start()
+            else:
+                try:
+                    key_skills, work_experience = self.load_resume_sections(file_name)
+                except Exception as exc:
+                    self.resume_parse_failed(str(exc))
+                    return
+                self.timings.stop("parse")
+                self.process_resume(key_skills, work_experience)
+
+    def resume_parsed(self, sections):
+        self.timings.stop("parse")
+        self.resume_sections = sections
+        self.process_resume_when_ready()
+
+    def resume_parse_failed(self, error):
+        # Forget the resume so a new upload starts over, instead of leaving pipeline mode waiting on this one
+        self.timings.stop("parse")
+        self.resume_sections = None
+        self.resume_processing_started = False
+        self.log_interaction(f"\nCould not read the resume: {error}", "upload_resume")
+        QMessageBox.warning(self, 'Resume Error', f"Could not read the resume:\n{error}")
+        self.prompt_next_step()
 
-            self.log_interaction("\nResume Uploaded: " + file_name)
-            key_skills, work_experience = self.load_resume_sections(file_name)
-            self.process_resume(key_skills, work_experience)
+    def process_resume_when_ready(self):
+        # Pipeline mode: processing needs both the keywords and the parsed resume, whichever arrives last starts it
+        if self.keywords is None or self.resume_sections is None or self.resume_processing_started:
+            return
+        self.resume_processing_started = True
+        self.process_resume(*self.resume_sections)
 
     def load_resume_sections(self, file_path):
-        doc = docx.Document(file_path)
-        key_skills_text = ''
-        work_experience_text = ''
-        capture_skills = False
-        capture_experience = False
-
-        # List of headings that should terminate capturing experience
-        end_of_experience_markers = ["Education", "Certifications", "Publications", "References"]
-
-        for para in doc.paragraphs:
-            # Check if the paragraph contains any underlined text
-            is_underlined = any(run.underline for run in para.runs if run.underline)
-
-            if para.style.name.startswith('Heading') or is_underlined:
-                if 'Key Skills' in para.text:
-                    capture_skills = True
-                    key_skills_text += para.text + '\n'
-                elif 'Work Experience' in para.text:
-                    capture_experience = True
-                    capture_skills = False  # Stop capturing skills if we start capturing experience
-                elif 'Panorama Education, Boston, MA (Remote)' in para.text:
-                    capture_experience = True
-                    capture_skills = False
-                elif any(marker in para.text for marker in end_of_experience_markers):
-                    capture_experience = False
-
-            # Add text to respective sections if we're in capture mode
-            if capture_skills and para.text.strip() != '':
-                key_skills_text += para.text + '\n'
-            if capture_experience and para.text.strip() != '':
-                work_experience_text += para.text + '\n'
-
-            key_skills_text = key_skills_text.replace('Key Skills', '').strip()
-            work_experience_text = work_experience_text.replace('Work Experience', '').strip()
+        # The docx is only parsed once per file content; later calls reuse the memoized result
+        with metrics.time_stage("docx_parse"):
+            parsed = parse_resume(file_path, self.section_headings)
+        key_skills_text = "\n".join(parsed.sections.get(KEY_SKILLS, []))
+        work_experience_text = "\n".join(parsed.sections.get(WORK_EXPERIENCE, []))
 
         key_skills_final = "Key Skills:\n" + "\n".join(skill.strip() for skill in key_skills_text.split(" • "))
-        work_experience_final = "\nWork Experience:\n" + "\n".join(work_experience_text.split("\n"))
-        
+        work_experience_final = "\nWork Experience:\n" + work_experience_text
+
         return key_skills_final, work_experience_final
     
 
     def process_resume(self, key_skills, work_experience):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"\n\n({current_time}) Processing Resume...")
+        self.log_interaction(f"\n\n({current_time}) Processing Resume...", "process_resume")
         
         my_resume = f"Key Skills:\n{key_skills}\n\nWork Experience:\n{work_experience}"
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-2024-04-09",
+        self.timings.start("process_resume")
+        self.run_completion(
+            "process_resume",
+            "\nProcessed Resume:\n",
+            self.resume_processed,
+            check=lambda reply: self.cascade.check_processed_resume(reply, self.keywords, my_resume),
+            model=STAGE_MODELS["process_resume"],
             #model="gpt-3.5-turbo-0125",
-            messages = [{"role": "system",
-                        "content": """Your task is to take a list of keywords and key skills and then look at my resume text (which contains my key skills and my work experience) and remove anything from my resume that
-                        doesn't match or have anything to do with the keywords and key skills. Please only write the skills and work experience that match the keywords and key skills from the job description.
-                        And if you see any ways to improve the wording in my resume to better match the keywords and key skills in the job description, please do so. When you're done, please write the skills
-                        and bullets in a format that I can easily use a Python split function on. More specifically, please enclose the resume section with this delimiter: '```'. This is so I will always be able to access the resume with this code: so I can will always be able to access the resume portion with this code (resume_response.split('```')[1]) """},
-                        
-                        {"role": "user",
-                        "content": f"keywords: {self.keywords}\n\nmy resume: {my_resume}"}]
+            messages=PROCESS_RESUME.messages(resume=my_resume, keywords=self.keywords)
             )
-        self.processed_resume = response.choices[0].message.content.split("\n")
+
+    def resume_processed(self, reply):
+        self.timings.stop("process_resume")
+        self.processed_resume = reply.split("\n")
         full_text = "\n".join(self.processed_resume)
 
         try:
             self.processed_resume = full_text.split('```')[1]
         except IndexError:
+            # Fall back to the whole reply rather than carrying on with a list of lines
+            self.processed_resume = full_text
             print("No delimited section found.")
 
-        self.keywords_output.append("\nProcessed Resume:\n" + self.processed_resume)
-        self.log_interaction("\nProcessed Resume: " + self.processed_resume)
+        # Replace the streamed reply with just the delimited resume section
+        self.finish_stream(self.processed_resume)
+        self.log_interaction("\nProcessed Resume: " + self.processed_resume, "process_resume")
+        self.log_interaction("\n" + self.timings.summary(), "process_resume")
         self.prompt_for_review()
 
 
@@ -209,33 +335,33 @@ class ResumeApp(QWidget):
 
         if fileName:
             current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.log_interaction("\n" + metrics.summary(), "metrics")
             save_message = f"\n\nLog saved to: {fileName} at {current_time}"
-            self.log_interaction(save_message)
+            self.log_interaction(save_message, "save_log")
 
+            # Stream this session's records back from the log file rather than joining them in memory
             with open(fileName, 'w') as file:
-                file.write("\n".join(self.conversation_log))
+                self.conversation_log.write_to(file)
 
 
 
     def review_resume(self):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"\n\n({current_time}) Reviewing Resume...")
-
-        response3 = client.chat.completions.create(
-            model="gpt-4-turbo-2024-04-09",
+        self.log_interaction(f"\n\n({current_time}) Reviewing Resume...", "review_resume")
+
+        self.run_completion(
+            "review_resume",
+            "\nReview Response:\n",
+            self.resume_reviewed,
+            check=lambda reply: self.cascade.check_review(reply),
+            model=STAGE_MODELS["review_resume"],
             #model="gpt-3.5-turbo-0125",
-            messages = [{"role": "system",
-                        "content": """Your task is to look at my resume and this job description and let me know how well my resume matches the job description.
-                        I would like you to provide a score from 0 to 100, where 0 is a poor match and 100 is a perfect match. Please provide a brief explanation of why you gave this score.
-                        Additionally, please tell me which keywords and key skills from the job description are missing from my resume and how I can improve my resume to better match the job description."""},
-                        
-                        {"role": "user",
-                        "content": f"job description: {self.job_description}\n\nmy resume: {self.processed_resume}"}]
+            messages=REVIEW_RESUME.messages(resume=self.processed_resume, job_description=self.job_description)
         )
 
-        self.review_response = response3.choices[0].message.content
-        self.keywords_output.append("\nReview Response:\n" + self.review_response)
-        self.log_interaction("\nReview Response:\n" + self.review_response)
+    def resume_reviewed(self, reply):
+        self.review_response = reply
+        self.log_interaction("\nReview Response:\n" + self.review_response, "review_resume")
         self.prompt_to_submit_experiences()
         
 
@@ -290,21 +416,13 @@ class ResumeApp(QWidget):
 
     def save_special_log_for_gpt(self):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"\n\n({current_time}) Saving ChatGPT Prompt...")
-
-        content = (
-        "Your task is to read my resume, a job description, a set of recommendations "
-        "I received for my resume regarding this job description, and a list of my experiences that "
-        "are currently not present in my resume. After reading these, please write the relevant "
-        "experiences from my list of experiences into my resume in a way that makes sense and "
-        "is easy for recruiters to read and interpret. For each of the bullets that you add "
-        "to the resume, please keep the same level of succinctness that is present in the "
-        "bullets in the current resume. Please also make sure to include the experiences "
-        "in the correct sections and jobs of my resume."
-        )
+        self.log_interaction(f"\n\n({current_time}) Saving ChatGPT Prompt...", "save_special_log_for_gpt")
 
-        content2 = f"job description:\n{self.job_description}\n\nmy resume:\n{self.processed_resume}\n\nrecommendations:\n{self.review_response}\n\nexperiences not on resume:\n{self.new_experiences}"
-        self.log_interaction(f"\nPrompt for ChatGPT: \n{content}\n\n{content2}")
+        content = SPECIAL_GPT_LOG.system
+        content2 = SPECIAL_GPT_LOG.user_content(resume=self.processed_resume, job_description=self.job_description,
+                                                recommendations=self.review_response,
+                                                experiences=self.new_experiences)
+        self.log_interaction(f"\nPrompt for ChatGPT: \n{content}\n\n{content2}", "save_special_log_for_gpt")
         self.keywords_output.append(f"\n\nPrompt for ChatGPT: \n{content}\n\n{content2}")
         self.save_log()
 
@@ -313,32 +431,97 @@ class ResumeApp(QWidget):
 
     def fix_resume(self):
         self.keywords_output.append("\nNew Experiences:\n" + self.new_experiences)
-        self.log_interaction("\nNew Experiences: \n" + self.new_experiences)
+        self.log_interaction("\nNew Experiences: \n" + self.new_experiences, "fix_resume")
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log_interaction(f"\n\n({current_time}) Fixing Resume...")
-
-        response4 = client.chat.completions.create(
-        #model="gpt-4-turbo-2024-04-09",
-        model="gpt-3.5-turbo-0125",
-        messages = [{"role": "system",
-                    "content": """Your task is to read my resume, a job description, and a list of my experiences that are currently not present in my resume.
-                    After reading these, please write the relevant experiences from my list of experiences into my resume in a way that makes sense and is easy for recruiters to read and 
-                    interpret. For each of the bullets that you add to the resume, please keep the same level of succinctness that is present in the bullets in the 
-                    current resume. Please also make sure to include the experiences in the correct sections and jobs of my resume."""},
-                    
-                    {"role": "user",
-                    "content": f"job description: {self.job_description}\n\nmy resume: {self.processed_resume}\n\nexperiences not on resume: {self.new_experiences}"}]
+        self.log_interaction(f"\n\n({current_time}) Fixing Resume...", "fix_resume")
+
+        self.run_completion(
+        "fix_resume",
+        "\nFixed Resume:\n",
+        self.resume_fixed,
+        check=lambda reply: self.cascade.check_reply(reply),
+        model=STAGE_MODELS["fix_resume"],
+        messages=FIX_RESUME.messages(resume=self.processed_resume, job_description=self.job_description,
+                                     experiences=self.new_experiences)
         )
 
-        self.fixed_resume = response4.choices[0].message.content
+    def resume_fixed(self, reply):
+        self.fixed_resume = reply
         self.new_experiences_input.setHidden(True)
-        self.keywords_output.append("\nFixed Resume:\n" + self.fixed_resume)
-        self.log_interaction("\nFixed Resume:\n" + self.fixed_resume)
+        self.log_interaction("\nFixed Resume:\n" + self.fixed_resume, "fix_resume")
         self.prompt_to_save_log()
 
 
-    def log_interaction(self, text):
-        self.conversation_log.append(text)
+    def run_completion(self, stage, header, on_finished, check=None, **request):
+        # Sends the request on a worker thread so the window stays responsive, streaming the reply
+        # into keywords_output under the header as it arrives; on_finished gets the full reply.
+        # With a cascade, check returns why a cheaper model's reply is rejected (or None to accept it)
+        try:
+            self.client
+        except RuntimeError as exc:  # no API key configured
+            QMessageBox.warning(self, 'Request Failed', str(exc))
+            return
+        self.process_button.setEnabled(False)
+        self.submit_experiences_button.setEnabled(False)
+        self.keywords_output.append(header)
+        models = (self.cascade.models_for(stage, request["model"]) if self.cascade is not None
+                  else (request["model"],))
+        self.start_completion(stage, models, 0, check, request["messages"], on_finished)
+
+    def start_completion(self, stage, models, position, check, messages, on_finished):
+        self.keywords_output.moveCursor(QTextCursor.End)
+        self.stream_start = self.keywords_output.textCursor().position()
+
+        worker = CompletionWorker(self.client, stage, models[position], messages, self)
+        worker.cascade = (models, position, check)
+        worker.token.connect(self.append_token)
+        worker.completed.connect(lambda reply: self.completion_finished(worker, reply, on_finished))
+        worker.failed.connect(lambda error: self.completion_failed(worker, error))
+        worker.finished.connect(worker.deleteLater)
+        self.worker = worker
+        worker.start()
+
+    def append_token(self, text):
+        self.keywords_output.moveCursor(QTextCursor.End)
+        self.keywords_output.insertPlainText(text)
+        self.keywords_output.ensureCursorVisible()
+
+    def finish_stream(self, text):
+        # Swap the streamed reply for its final form
+        cursor = self.keywords_output.textCursor()
+        cursor.setPosition(self.stream_start)
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.insertText(text)
+
+    def completion_finished(self, worker, reply, on_finished):
+        if worker.time_to_first_token is not None:
+            self.log_interaction(f"(First token after {worker.time_to_first_token:.1f}s, "
+                                 f"reply complete after {worker.elapsed:.1f}s)", worker.stage)
+        models, position, check = worker.cascade
+        if self.cascade is not None and check is not None and position + 1 < len(models):
+            reason = check(reply)
+            if reason is not None:
+                # Keep a note of the rejected reply in place of it and stream the larger model's reply after it
+                self.log_interaction(f"\n{worker.stage}: {worker.model} reply rejected ({reason}), "
+                                     f"escalating to {models[position + 1]}", worker.stage)
+                self.finish_stream(f"[{worker.model} reply rejected ({reason}), retrying with "
+                                   f"{models[position + 1]}]\n")
+                self.start_completion(worker.stage, models, position + 1, check, worker.messages, on_finished)
+                return
+        if self.cascade is not None:
+            metrics.record_cascade(worker.stage, worker.model, position)
+        self.process_button.setEnabled(True)
+        self.submit_experiences_button.setEnabled(True)
+        on_finished(reply)
+
+    def completion_failed(self, worker, error):
+        self.process_button.setEnabled(True)
+        self.submit_experiences_button.setEnabled(True)
+        self.log_interaction(f"\nRequest failed after {worker.elapsed:.1f}s: {error}", worker.stage)
+        QMessageBox.warning(self, 'Request Failed', f"The OpenAI request failed:\n{error}")
+
+    def log_interaction(self, text, stage="unlabeled"):
+        self.conversation_log.append(text, stage)
 
     # def export_conversation_to_pdf(self):
     #     # Implement the export functionality here
@@ -346,7 +529,8 @@ class ResumeApp(QWidget):
 
 def main():
     app = QApplication(sys.argv)
-    ex = ResumeApp()
+    ex = ResumeApp(pipeline="--pipeline" in sys.argv, cascade=CascadeRouter() if "--cascade" in sys.argv else None,
+                   log_file=DEFAULT_LOG_PATH if "--log-file" in sys.argv else None)
     ex.show()
     sys.exit(app.exec_())
 
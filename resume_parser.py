@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Bump whenever the parsing rules or the ParsedResume layout change, so stale sidecar files are ignored.
+PARSER_VERSION = 2
+
+KEY_SKILLS = "Key Skills"
+WORK_EXPERIENCE = "Work Experience"
+
+# Paragraphs whose whole text matches one of these (ignoring case and a trailing colon) start a new section.
+# Anywhere a set of headings is accepted, a dict mapping alternative headings to one of these names may be
+# passed instead, e.g. {"Professional Experience": WORK_EXPERIENCE, "Core Competencies": KEY_SKILLS}.
+SECTION_HEADINGS = (KEY_SKILLS, WORK_EXPERIENCE, "Education", "Projects", "Certifications", "Skills",
+                    "Languages", "Interests", "Publications", "References")
+
+SIDECAR_SUFFIX = ".parsed.json"
+
+# The most parses (and file hashes) kept in memory; the least recently used are dropped first, so a long-running
+# worker or bulk ingestion doesn't keep every resume it has seen
+MEMO_MAX_ENTRIES = 256
+
+_memo = OrderedDict()
+_hashes = OrderedDict()
+_saved = OrderedDict()
+_lock = threading.Lock()
+
+
+class ParsedResume:
+    def __init__(self, file_hash, sections, subheadings=()):
+        """
+        Holds the structured content of a resume document.
+        Args:
+            file_hash: The SHA-256 hex digest of the resume file the content was parsed from.
+            sections: A dict mapping each section heading to its non-empty paragraph lines, in document order.
+            subheadings: Lines inside sections that were formatted as headings (e.g. employer and job title lines).
+        """
+        self.file_hash = file_hash
+        self.sections = sections
+        self.subheadings = set(subheadings)
+
+    @property
+    def skills(self):
+        """
+        The individual skills listed under Key Skills.
+        """
+        skills = []
+        for line in self.sections.get(KEY_SKILLS, []):
+            skills.extend(skill.strip() for skill in line.split("•") if skill.strip())
+        return skills
+
+    @property
+    def bullets(self):
+        """
+        The Work Experience lines, excluding employer and job title lines.
+        """
+        return [line for line in self.sections.get(WORK_EXPERIENCE, []) if line not in self.subheadings]
+
+    @property
+    def text(self):
+        """
+        The full text of every parsed section, headings included.
+        """
+        return "\n".join(f"{section}\n" + "\n".join(lines) for section, lines in self.sections.items())
+
+    def to_dict(self):
+        """
+        Returns a JSON-serializable dict of the parsed resume.
+        """
+        return {"version": PARSER_VERSION, "file_hash": self.file_hash,
+                "sections": self.sections, "subheadings": sorted(self.subheadings)}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a ParsedResume from the output of to_dict.
+        """
+        return cls(data["file_hash"], data["sections"], data.get("subheadings", ()))
+
+
+def file_sha256(path):
+    """
+    Returns the SHA-256 hex digest of a file, reusing the last digest while the file's size and mtime are unchanged.
+    Args:
+        path: A string path to the file.
+    """
+    stat = os.stat(path)
+    stat_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        file_hash = _recall(_hashes, stat_key)
+    if file_hash is None:
+        with open(path, "rb") as file:
+            file_hash = hashlib.sha256(file.read()).hexdigest()
+        with _lock:
+            _remember(_hashes, stat_key, file_hash)
+    return file_hash
+
+
+def parse_resume(resume_file_path, headings=None, save=False):
+    """
+    Parses a .docx resume into a ParsedResume, memoized by the file's content hash.
+    The document is only opened when neither the in-process memo nor a matching sidecar file has the result.
+    Args:
+        resume_file_path: A string path to the resume file.
+        headings: Optional; the section headings to split on. Defaults to SECTION_HEADINGS.
+        save: A boolean that determines if the parsed result should be written next to the file
+              (as <file>.parsed.json) so later processes can skip the parse too.
+    Returns:
+        A ParsedResume.
+    """
+    lookup = heading_lookup(headings)
+    lookup_key = tuple(sorted(lookup.items()))
+    file_hash = file_sha256(resume_file_path)
+    sidecar_path = resume_file_path + SIDECAR_SUFFIX
+    memo_key = (file_hash, lookup_key)
+    with _lock:
+        parsed = _recall(_memo, memo_key)
+    if parsed is None:
+        parsed = _load_sidecar(sidecar_path, file_hash, lookup_key)
+        if parsed is not None:
+            with _lock:
+                _remember(_saved, (sidecar_path, memo_key), True)
+        else:
+            import docx  # imported on first parse; python-docx is slow to import
+            parsed = extract_sections(docx.Document(resume_file_path), file_hash, lookup)
+        with _lock:
+            _remember(_memo, memo_key, parsed)
+
+    if save and (sidecar_path, memo_key) not in _saved:
+        data = parsed.to_dict()
+        data["headings"] = [list(item) for item in lookup_key]
+        with open(sidecar_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        with _lock:
+            _remember(_saved, (sidecar_path, memo_key), True)
+    return parsed
+
+
+def heading_lookup(headings=None):
+    """
+    Normalizes a set of section headings into a dict mapping casefolded heading text to the section name.
+    Args:
+        headings: Optional; an iterable of heading names, or a dict mapping headings to section names.
+                  Defaults to SECTION_HEADINGS.
+    """
+    if headings is None:
+        headings = SECTION_HEADINGS
+    if not isinstance(headings, dict):
+        headings = {heading: heading for heading in headings}
+    return {_normalize_heading(heading): name for heading, name in headings.items()}
+
+
+def iter_sections(paragraphs, headings=None):
+    """
+    Streams the section content of a document in a single pass, holding no more than one paragraph at a time.
+    Heading paragraphs are consumed; text before the first heading (name, contact details) is skipped.
+    Args:
+        paragraphs: An iterable of docx paragraphs.
+        headings: Optional; the section headings to split on, in any form accepted by heading_lookup.
+    Yields:
+        (section, text, is_subheading) tuples, where is_subheading is True for lines formatted as a heading
+        or underlined inside a section, such as employer and job title lines.
+    """
+    lookup = heading_lookup(headings)
+    # Resolving para.style scans the whole style table, so names are looked up once per style id
+    style_names = {}
+    current = None
+
+    for para in paragraphs:
+        text = para.text.strip()
+        if not text:
+            continue
+
+        section = lookup.get(_normalize_heading(text))
+        if section is not None:
+            current = section
+            continue
+
+        if current is not None:
+            style_id = para._p.style
+            if style_id not in style_names:
+                style_names[style_id] = para.style.name
+            is_subheading = style_names[style_id].startswith("Heading") or any(run.underline for run in para.runs)
+            yield current, text, is_subheading
+
+
+def extract_sections(doc, file_hash=None, headings=None):
+    """
+    Splits a docx document into sections in a single pass over its paragraphs.
+    Args:
+        doc: A docx.Document.
+        file_hash: Optional; the content hash to record on the result.
+        headings: Optional; the section headings to split on, in any form accepted by heading_lookup.
+    Returns:
+        A ParsedResume with one entry per section heading found in the document.
+    """
+    sections = {}
+    subheadings = []
+    for section, text, is_subheading in iter_sections(doc.paragraphs, headings):
+        lines = sections.get(section)
+        if lines is None:
+            lines = sections[section] = []
+        lines.append(text)
+        if is_subheading:
+            subheadings.append(text)
+
+    return ParsedResume(file_hash, sections, subheadings)
+
+
+def _normalize_heading(text):
+    return text.strip().rstrip(":").strip().casefold()
+
+
+def _load_sidecar(sidecar_path, file_hash, lookup_key):
+    try:
+        with open(sidecar_path, encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != PARSER_VERSION or data.get("file_hash") != file_hash:
+        return None
+    if [tuple(item) for item in data.get("headings", [])] != list(lookup_key):
+        return None
+    return ParsedResume.from_dict(data)
+
+
+def _recall(entries, key):
+    # Called with _lock held; marks a hit as the most recently used
+    value = entries.get(key)
+    if value is not None:
+        entries.move_to_end(key)
+    return value
+
+
+def _remember(entries, key, value):
+    # Called with _lock held
+    entries[key] = value
+    entries.move_to_end(key)
+    while len(entries) > MEMO_MAX_ENTRIES:
+        entries.popitem(last=False)
+
+
+def clear_cache():
+    """
+    Forgets every memoized parse in this process. Sidecar files are left in place.
+    """
+    with _lock:
+        _memo.clear()
+        _hashes.clear()
+        _saved.clear()
@@ -0,0 +1,108 @@
+import re
+
+from keyword_extractor import KeywordExtractor, merge_keywords
+
+# Up to this divergence the speculative review is kept as it is; above REFRESH_DIVERGENCE it is thrown away and the
+# processed resume is reviewed from scratch, and in between a cheap model updates it (see ReviewDelta.decide)
+REUSE_DIVERGENCE = 0.05
+REFRESH_DIVERGENCE = 0.25
+
+REUSED = "reused"
+CHECKED = "checked"
+REFRESHED = "refreshed"
+
+_WORD = re.compile(r"\w+")
+
+
+class SpeculativeReview:
+    def __init__(self, resume_text, future):
+        """
+        A review of the locally parsed resume, started before process_resume has produced the tailored one.
+        Args:
+            resume_text: The resume text the review was asked about.
+            future: A concurrent.futures.Future for the (review_response, review) pair.
+        """
+        self.resume_text = resume_text
+        self.future = future
+
+    def cancel(self):
+        """
+        Cancels the review if it hasn't been sent yet. A request already in flight is left to finish and its reply
+        is ignored.
+        """
+        return self.future.cancel()
+
+
+class ReviewDelta:
+    def __init__(self, divergence, gained, lost, keywords):
+        """
+        How far a processed resume moved from the resume a speculative review saw, as far as the review is concerned.
+        Args:
+            divergence: From 0.0 (the review still applies) to 1.0: the fraction of the job description keywords
+                        that went from missing to present or back, or without keywords, the fraction of distinct
+                        words the two texts don't share.
+            gained: The keywords the processed resume covers and the original didn't.
+            lost: The keywords the original resume covered and the processed one doesn't.
+            keywords: The number of job description keywords compared.
+        Attributes:
+            outcome: What happened to the speculative review (REUSED, CHECKED or REFRESHED), once decided.
+        """
+        self.divergence = divergence
+        self.gained = gained
+        self.lost = lost
+        self.keywords = keywords
+        self.outcome = None
+
+    def decide(self, reuse_divergence=REUSE_DIVERGENCE, refresh_divergence=REFRESH_DIVERGENCE):
+        """
+        Decides what happens to the speculative review: REUSED, CHECKED (updated by a cheap model) or REFRESHED
+        (replaced by a full review of the processed resume).
+        """
+        if self.divergence <= reuse_divergence:
+            return REUSED
+        if self.divergence > refresh_divergence:
+            return REFRESHED
+        return CHECKED
+
+    def describe(self):
+        """
+        Lists the keyword changes for the delta check prompt.
+        """
+        lines = [f"now covered: {', '.join(self.gained) or 'none'}",
+                 f"no longer covered: {', '.join(self.lost) or 'none'}"]
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {"divergence": round(self.divergence, 4), "gained": self.gained, "lost": self.lost,
+                "keywords": self.keywords, "outcome": self.outcome}
+
+    def __repr__(self):
+        return f"ReviewDelta(divergence={self.divergence:.3f}, gained={len(self.gained)}, lost={len(self.lost)})"
+
+
+def review_delta(resume_text, processed_resume, keywords):
+    """
+    Measures how much a processed resume diverged from the original for the purpose of reviewing it. The review
+    scores keyword coverage and lists missing skills, so what counts is which job description keywords changed
+    between present and missing; rewording and dropped lines that touch no keyword don't.
+    Args:
+        resume_text: The resume text the speculative review saw.
+        processed_resume: The processed resume.
+        keywords: The job description keywords. A string (e.g. a verbose process_job_description reply) or an empty
+                  list falls back to comparing the texts' words.
+    Returns:
+        A ReviewDelta.
+    """
+    keywords = [] if isinstance(keywords, str) else merge_keywords(keywords or [])
+    if not keywords:
+        before = set(_WORD.findall(resume_text.casefold()))
+        after = set(_WORD.findall(processed_resume.casefold()))
+        union = before | after
+        return ReviewDelta(len(before ^ after) / len(union) if union else 0.0, [], [], 0)
+
+    extractor = KeywordExtractor({keyword: keyword for keyword in keywords})
+    before = set(extractor.extract(resume_text))
+    after = set(extractor.extract(processed_resume))
+    gained = [keyword for keyword in keywords if keyword in after and keyword not in before]
+    lost = [keyword for keyword in keywords if keyword in before and keyword not in after]
+    return ReviewDelta((len(gained) + len(lost)) / len(keywords), gained, lost, len(keywords))
@@ -0,0 +1,263 @@
+import json
+
+# Models that accept response_format={"type": "json_schema"}; older models get JSON mode plus the schema in the prompt.
+JSON_SCHEMA_MODEL_PREFIXES = ("gpt-4o", "gpt-4.1", "o1", "o3", "o4")
+
+# Cheap model used to repair malformed structured output instead of re-running the whole stage.
+REPAIR_MODEL = "gpt-3.5-turbo-0125"
+
+
+class StructuredOutputError(ValueError):
+    """
+    Raised when a model reply is not valid JSON or does not match the expected result schema.
+    """
+
+
+def _string_list(data, key):
+    value = data.get(key)
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise StructuredOutputError(f"'{key}' must be a list of strings")
+    return [item.strip() for item in value if item.strip()]
+
+
+def _string(data, key):
+    value = data.get(key)
+    if not isinstance(value, str):
+        raise StructuredOutputError(f"'{key}' must be a string")
+    return value.strip()
+
+
+class KeywordResult:
+    NAME = "keywords"
+    SCHEMA = {
+        "type": "object",
+        "properties": {"keywords": {"type": "array", "items": {"type": "string"}}},
+        "required": ["keywords"],
+        "additionalProperties": False,
+    }
+
+    def __init__(self, keywords):
+        """
+        Holds the keywords and key skills extracted from a job description.
+        """
+        self.keywords = keywords
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(_string_list(data, "keywords"))
+
+
+class ResumeSections:
+    NAME = "resume_sections"
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "key_skills": {"type": "array", "items": {"type": "string"}},
+            "work_experience": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["key_skills", "work_experience"],
+        "additionalProperties": False,
+    }
+
+    def __init__(self, key_skills, work_experience):
+        """
+        Holds a processed resume.
+        Args:
+            key_skills: The list of skills to keep.
+            work_experience: The Work Experience lines (employer lines and bullets) in order.
+        """
+        self.key_skills = key_skills
+        self.work_experience = work_experience
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(_string_list(data, "key_skills"), _string_list(data, "work_experience"))
+
+    def to_text(self):
+        """
+        Renders the sections as plain resume text.
+        """
+        return ("Key Skills:\n" + "\n".join(self.key_skills) +
+                "\n\nWork Experience:\n" + "\n".join(self.work_experience))
+
+
+class ResumeReview:
+    NAME = "resume_review"
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "score": {"type": "integer", "minimum": 0, "maximum": 100},
+            "explanation": {"type": "string"},
+            "missing_skills": {"type": "array", "items": {"type": "string"}},
+            "suggestions": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["score", "explanation", "missing_skills", "suggestions"],
+        "additionalProperties": False,
+    }
+
+    def __init__(self, score, explanation, missing_skills, suggestions):
+        """
+        Holds the review of a resume against a job description.
+        Args:
+            score: The 0-100 match score.
+            explanation: Why the score was given.
+            missing_skills: Keywords and key skills from the job description missing from the resume.
+            suggestions: How to improve the resume for the job description.
+        """
+        self.score = score
+        self.explanation = explanation
+        self.missing_skills = missing_skills
+        self.suggestions = suggestions
+
+    @classmethod
+    def from_dict(cls, data):
+        score = data.get("score")
+        if isinstance(score, str) and score.strip().isdigit():
+            score = int(score.strip())
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+            raise StructuredOutputError("'score' must be a number from 0 to 100")
+        return cls(int(round(score)), _string(data, "explanation"), _string_list(data, "missing_skills"),
+                   _string_list(data, "suggestions"))
+
+    def to_text(self):
+        """
+        Renders the review as plain text, in the shape review_resume has always returned.
+        """
+        lines = [f"Score: {self.score}/100", "", self.explanation, "", "Missing keywords and skills:"]
+        lines.extend(f"- {skill}" for skill in self.missing_skills)
+        lines.extend(["", "Suggestions:"])
+        lines.extend(f"- {suggestion}" for suggestion in self.suggestions)
+        return "\n".join(lines)
+
+
+class TailoredItems:
+    NAME = "tailored_items"
+    SCHEMA = {
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"id": {"type": "string"}, "text": {"type": "string"}},
+                    "required": ["id", "text"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["items"],
+        "additionalProperties": False,
+    }
+
+    def __init__(self, items):
+        """
+        Holds the tailored text of individual resume items (skills and bullets) by item id; an empty text means
+        the item was removed.
+        """
+        self.items = items
+
+    @classmethod
+    def from_dict(cls, data):
+        items = data.get("items")
+        if not isinstance(items, list):
+            raise StructuredOutputError("'items' must be a list")
+        result = {}
+        for item in items:
+            if not isinstance(item, dict):
+                raise StructuredOutputError("every item must be an object")
+            result[_string(item, "id")] = _string(item, "text")
+        return cls(result)
+
+
+class FixedResume:
+    NAME = "fixed_resume"
+    SCHEMA = {
+        "type": "object",
+        "properties": {"resume": {"type": "string"}},
+        "required": ["resume"],
+        "additionalProperties": False,
+    }
+
+    def __init__(self, resume):
+        """
+        Holds a resume with the new experiences written in.
+        """
+        self.resume = resume
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(_string(data, "resume"))
+
+
+def supports_json_schema(model):
+    """
+    True if the model accepts JSON-schema structured outputs.
+    """
+    return model.startswith(JSON_SCHEMA_MODEL_PREFIXES)
+
+
+def structured_request(result_type, model, system_prompt, user_content):
+    """
+    Builds chat.completions.create arguments asking for a reply that matches result_type's schema.
+    Models with structured output support get a strict json_schema response format; other models get JSON mode,
+    with the schema spelled out in the system prompt.
+    Args:
+        result_type: One of the result classes in this module.
+        model: The model identifier.
+        system_prompt: The task instructions.
+        user_content: The user message.
+    Returns:
+        A dict of request arguments.
+    """
+    schema = json.dumps(result_type.SCHEMA)
+    system_prompt = (f"{system_prompt}\n\nRespond only with a JSON object that matches this JSON schema:\n{schema}")
+    if supports_json_schema(model):
+        response_format = {"type": "json_schema",
+                           "json_schema": {"name": result_type.NAME, "strict": True, "schema": result_type.SCHEMA}}
+    else:
+        response_format = {"type": "json_object"}
+    return {"model": model, "response_format": response_format,
+            "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}]}
+
+
+def parse_structured(text, result_type):
+    """
+    Parses and validates a structured reply.
+    Args:
+        text: The reply content.
+        result_type: One of the result classes in this module.
+    Returns:
+        An instance of result_type.
+    Raises:
+        StructuredOutputError: If the reply is not JSON or does not match the schema.
+    """
+    text = (text or "").strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("\n") + 1:] if text.startswith("json") else text
+    try:
+        data = json.loads(text)
+    except ValueError as exc:
+        raise StructuredOutputError(f"reply is not valid JSON: {exc}") from None
+    if not isinstance(data, dict):
+        raise StructuredOutputError("reply must be a JSON object")
+    return result_type.from_dict(data)
+
+
+def repair_request(result_type, text, error, model=REPAIR_MODEL):
+    """
+    Builds a cheap follow-up request asking a model to fix a malformed structured reply, rather than re-running
+    the original (expensive) stage.
+    Args:
+        result_type: The result class the reply should have matched.
+        text: The malformed reply.
+        error: The validation error message.
+        model: The model to send the repair to.
+    Returns:
+        A dict of request arguments.
+    """
+    return structured_request(
+        result_type, model,
+        "The following reply was supposed to be a JSON object matching a schema, but it is malformed. "
+        "Rewrite it as valid JSON matching the schema, keeping its content. Do not add new content.",
+        f"validation error: {error}\n\nreply:\n{text}")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The modules live at the repository root rather than in an installed package; the benchmarks directory holds the
+# fake OpenAI server and the synthetic resume generator
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from batch_api import BatchedClient, BatchRequestError, BatchRunner
+from fake_openai import FakeOpenAIServer
+from rate_limiting import make_openai_client
+from response_cache import ResponseCache
+from resume_app_class_only import ResumeProcessor
+from synthetic import make_job_description, save_resume
+
+
+def _request(number):
+    return {"model": "gpt-4o-mini", "timeout": 5,
+            "messages": [{"role": "user", "content": f"job description: Python and SQL, posting {number}"}]}
+
+
+class StubRunner:
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def run(self, requests):
+        self.batches.append([custom_id for custom_id, _ in requests])
+        if self.error is not None:
+            raise self.error
+        return {custom_id: f"reply to {request['messages'][0]['content']}" for custom_id, request in requests}
+
+
+def _send(client, count):
+    results = [None] * count
+
+    def send(number):
+        try:
+            results[number] = client.chat.completions.create(**_request(number))
+        except Exception as exc:
+            results[number] = exc
+
+    threads = [threading.Thread(target=send, args=(number,)) for number in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def _wait_for_pending(client, count):
+    deadline = time.monotonic() + 5
+    while len(client._pending) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_runner_maps_results_and_partial_failures():
+    with FakeOpenAIServer(latency=0.0, batch_latency=0.05, failure_rate=0.5, seed=1) as server:
+        runner = BatchRunner(make_openai_client("fake", base_url=server.base_url), poll_interval=0.02)
+        results = runner.run([(f"job-{number}", _request(number)) for number in range(8)])
+    assert sorted(results) == [f"job-{number}" for number in range(8)]
+    failed = [custom_id for custom_id, result in results.items() if isinstance(result, BatchRequestError)]
+    assert 0 < len(failed) < 8
+    for custom_id, result in results.items():
+        if custom_id not in failed:
+            assert result.choices[0].message.content == "Python, SQL"
+            assert result.usage.prompt_tokens > 0
+
+
+def test_batch_is_submitted_once_every_expected_request_waits():
+    runner = StubRunner()
+    client = BatchedClient(runner)
+    client.expect(3)
+    threads, results = _send(client, 2)
+    _wait_for_pending(client, 2)
+    assert runner.batches == []
+    threads += _send(client, 1)[0]
+    for thread in threads:
+        thread.join(5)
+    assert len(runner.batches) == 1 and len(runner.batches[0]) == 3
+    assert results[0] == "reply to job description: Python and SQL, posting 0"
+
+
+def test_release_submits_the_requests_still_waiting():
+    runner = StubRunner()
+    client = BatchedClient(runner)
+    client.expect(3)
+    threads, results = _send(client, 2)
+    _wait_for_pending(client, 2)
+    assert runner.batches == []
+    # The third expected request will never come, e.g. a job that failed or a speculative review that was cancelled
+    client.release()
+    for thread in threads:
+        thread.join(5)
+    assert [len(batch) for batch in runner.batches] == [2]
+    assert all(isinstance(result, str) for result in results)
+
+
+def test_runner_failure_fails_every_request_in_the_batch():
+    client = BatchedClient(StubRunner(error=RuntimeError("upload failed")))
+    client.expect(2)
+    threads, results = _send(client, 2)
+    for thread in threads:
+        thread.join(5)
+    assert [str(result) for result in results] == ["upload failed", "upload failed"]
+
+
+def test_streaming_requests_are_rejected():
+    with pytest.raises(ValueError):
+        BatchedClient(StubRunner()).create(stream=True, **_request(0))
+
+
+@pytest.mark.parametrize("speculative_review", [False, True])
+def test_process_batch_api_runs_every_job(tmp_path, speculative_review):
+    resume_path = str(tmp_path / "resume.docx")
+    save_resume(resume_path, 1)
+    job_descriptions = [make_job_description(seed, skills=8) for seed in range(4)]
+    with FakeOpenAIServer(latency=0.0, batch_latency=0.02) as server:
+        processor = ResumeProcessor(make_openai_client("fake", base_url=server.base_url), cache=ResponseCache(),
+                                    speculative_review=speculative_review)
+        results = _with_timeout(lambda: processor.process_batch_api(job_descriptions, resume_path,
+                                                                      poll_interval=0.01))
+    assert [result.index for result in results] == [0, 1, 2, 3]
+    assert all(result.ok and result.review_response for result in results)
+    calls = processor.metrics.calls
+    assert sum(entry["cost"] for entry in calls.values()) > 0
+
+
+def test_process_batch_api_keeps_going_after_failed_requests(tmp_path):
+    resume_path = str(tmp_path / "resume.docx")
+    save_resume(resume_path, 1)
+    job_descriptions = [make_job_description(seed, skills=8) for seed in range(6)]
+    with FakeOpenAIServer(latency=0.0, batch_latency=0.02, failure_rate=0.3, seed=2) as server:
+        processor = ResumeProcessor(make_openai_client("fake", base_url=server.base_url), cache=ResponseCache(),
+                                    speculative_review=True)
+        results = _with_timeout(lambda: processor.process_batch_api(job_descriptions, resume_path,
+                                                                      poll_interval=0.01))
+    failed = [result for result in results if not result.ok]
+    assert 0 < len(failed) < len(results)
+    assert all(isinstance(result.error, BatchRequestError) for result in failed)
+
+
+def _with_timeout(run, seconds=30):
+    # A miscounted in-flight request leaves the jobs waiting forever; fail the test instead of hanging it
+    outcome = []
+    thread = threading.Thread(target=lambda: outcome.append(run()), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    assert outcome, "the batch jobs never finished"
+    return outcome[0]
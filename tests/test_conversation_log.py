@@ -0,0 +1,56 @@
+from conversation_log import ConversationLog, JsonlLogSink
+
+
+def test_memory_keeps_the_latest_records():
+    log = ConversationLog(max_records=2)
+    for text in ("one", "two", "three"):
+        log.append(text, "stage")
+    assert list(log) == ["two", "three"]
+    assert len(log) == 2
+
+
+def test_sink_keeps_every_record_of_the_session(tmp_path):
+    sink = JsonlLogSink(str(tmp_path / "log.jsonl"))
+    log = ConversationLog(sink, max_records=1)
+    other = ConversationLog(sink)
+    log.append("one", "keywords")
+    other.append("someone else's")
+    log.append("two", "review")
+    assert [record.text for record in log.records(complete=True)] == ["one", "two"]
+    assert [record.stage for record in log.records(complete=True)] == ["keywords", "review"]
+    sink.close()
+
+
+def test_sink_rotates_and_reads_across_files(tmp_path):
+    path = str(tmp_path / "log.jsonl")
+    sink = JsonlLogSink(path, max_bytes=300, backups=2)
+    log = ConversationLog(sink)
+    for number in range(10):
+        log.append(f"record {number} " + "x" * 50)
+    texts = [record.text.split()[1] for record in log.records(complete=True)]
+    assert (tmp_path / "log.jsonl.1").exists() and not (tmp_path / "log.jsonl.3").exists()
+    # The oldest records fell off the last backup; the rest come back in order
+    assert texts == [str(number) for number in range(10 - len(texts), 10)]
+    sink.close()
+
+
+def test_truncated_lines_are_skipped(tmp_path):
+    path = tmp_path / "log.jsonl"
+    sink = JsonlLogSink(str(path))
+    log = ConversationLog(sink, session="s")
+    log.append("kept")
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"text": "cut sh')
+    assert [record.text for record in sink.read("s")] == ["kept"]
+    sink.close()
+
+
+def test_write_to(tmp_path):
+    import io
+
+    log = ConversationLog()
+    log.append("one")
+    log.append("two")
+    out = io.StringIO()
+    log.write_to(out)
+    assert out.getvalue() == "one\ntwo"
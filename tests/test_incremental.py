@@ -0,0 +1,109 @@
+from incremental import IncrementalStore, ResumeItem, render_items, resume_items
+from resume_parser import KEY_SKILLS, WORK_EXPERIENCE, ParsedResume
+
+KEYWORDS = ["Python", "SQL"]
+
+
+def _parsed(bullet="Built data pipelines in Python"):
+    return ParsedResume("hash", {
+        KEY_SKILLS: ["Python • SQL"],
+        WORK_EXPERIENCE: ["Acme, Data Engineer", bullet, "Wrote SQL reports"],
+    }, subheadings=["Acme, Data Engineer"])
+
+
+def _tailored(items):
+    return {item.id: item.text.upper() for item in items}
+
+
+def test_items_and_rendering():
+    items, blocks = resume_items(_parsed())
+    assert [(item.id, item.kind) for item in items] == [("s0", "skill"), ("s1", "skill"), ("b2", "bullet"),
+                                                        ("b3", "bullet")]
+    assert items[2].employer == "Acme, Data Engineer"
+    outputs = {"b3": ""}
+    assert render_items(items, blocks, outputs) == ("Key Skills:\nPython\nSQL\n\nWork Experience:\n"
+                                                    "Acme, Data Engineer\nBuilt data pipelines in Python")
+
+
+def test_only_changed_items_are_sent_again():
+    store = IncrementalStore()
+    items, _ = resume_items(_parsed())
+    stored, changed = store.split(items, KEYWORDS, "m")
+    assert stored == {} and changed == items
+    store.store(changed, _tailored(changed), KEYWORDS, "m")
+
+    edited, _ = resume_items(_parsed("Built data pipelines in Python and Airflow"))
+    stored, changed = store.split(edited, KEYWORDS, "m")
+    assert [item.id for item in changed] == ["b2"]
+    assert stored["b3"] == "WROTE SQL REPORTS"
+
+
+def test_keyword_model_and_employer_changes_invalidate_outputs():
+    store = IncrementalStore()
+    items, _ = resume_items(_parsed())
+    store.store(items, _tailored(items), KEYWORDS, "m")
+
+    # Keyword case doesn't matter, but a different keyword set or model does
+    assert store.split(items, ["python", "sql"], "m")[1] == []
+    assert len(store.split(items, KEYWORDS + ["Airflow"], "m")[1]) == len(items)
+    assert len(store.split(items, KEYWORDS, "other-model")[1]) == len(items)
+
+    moved = ResumeItem("b2", "bullet", items[2].text, employer="Globex, Analyst")
+    assert store.split([moved], KEYWORDS, "m")[1] == [moved]
+
+
+def test_prior_fix_builds_on_the_closest_stored_output():
+    store = IncrementalStore()
+    store.store_fix("jd", "resume", "Led a migration", "m", "fixed with migration")
+    fixed, remaining = store.prior_fix("jd", "resume", "Led a migration\nMentored two analysts", "m")
+    assert fixed == "fixed with migration"
+    assert remaining == ["Mentored two analysts"]
+
+    # A different processed resume (or job description) can't reuse it
+    assert store.prior_fix("jd", "other resume", "Led a migration", "m") == (None, ["Led a migration"])
+    # Nor can a run that dropped one of the experiences the stored output covers
+    assert store.prior_fix("jd", "resume", "Mentored two analysts", "m") == (None, ["Mentored two analysts"])
+
+
+def test_store_is_kept_beside_the_cache_file(tmp_path):
+    from response_cache import ResponseCache
+
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    store = IncrementalStore.beside(cache)
+    items, _ = resume_items(_parsed())
+    store.store(items, _tailored(items), KEYWORDS, "m")
+    store.close()
+    reopened = IncrementalStore.beside(cache)
+    assert reopened.split(items, KEYWORDS, "m")[1] == []
+    assert cache.stats()["memory_entries"] == 0
+    reopened.close()
+    cache.close()
+
+
+def test_processor_escalates_when_a_cheap_reply_leaves_items_out(monkeypatch):
+    import json
+    from types import SimpleNamespace
+
+    import resume_app_class_only
+    from model_cascade import CascadeRouter
+    from resume_app_class_only import ResumeProcessor
+
+    def reply(ids):
+        content = json.dumps({"items": [{"id": item_id, "text": item_id.upper()} for item_id in ids]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+    replies = [reply(["s0", "s1", "b2"]), reply(["s0", "s1", "b2", "b3"])]
+    models = []
+
+    def create(**request):
+        models.append(request["model"])
+        return replies.pop(0)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(resume_app_class_only, "parse_resume", lambda path, headings=None: _parsed())
+    processor = ResumeProcessor(client, incremental=True, incremental_store=IncrementalStore(),
+                                cascade=CascadeRouter())
+    processed = processor.process_resume("resume.docx", KEYWORDS)
+    assert len(models) == 2 and models[0] != models[1]
+    assert "B3" in processed
+    assert any("ignoring structured_outputs" in text for text in processor.conversation_log)
@@ -0,0 +1,72 @@
+from jd_dedup import MinHasher, cluster_job_descriptions, jaccard, shingles
+
+BASE = ("We are hiring a senior data engineer to build batch and streaming pipelines in Python and SQL on AWS, "
+        "own our Airflow orchestration, and mentor two junior engineers on the analytics platform team.")
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("One, two THREE", size=2) == {"one two", "two three"}
+    assert shingles("too short", size=5) == {"too short"}
+
+
+def test_jaccard():
+    assert jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+    assert jaccard(set(), set()) == 1.0
+
+
+def test_minhash_estimates_jaccard():
+    first = shingles(BASE, 3)
+    second = shingles(BASE.replace("mentor two junior engineers", "mentor interns"), 3)
+    hasher = MinHasher(256)
+    estimate = (hasher.signature(first) == hasher.signature(second)).mean()
+    assert abs(estimate - jaccard(first, second)) < 0.15
+
+
+def test_clusters_near_duplicates_and_keeps_distinct_descriptions_apart():
+    job_descriptions = [
+        BASE,
+        "Nurse practitioner wanted for a busy family clinic; prescribe, diagnose and coordinate patient care.",
+        BASE + " Location: Denver.",
+        BASE,
+    ]
+    clusters = cluster_job_descriptions(job_descriptions, threshold=0.8)
+    assert [cluster.members for cluster in clusters] == [[0, 2, 3], [1]]
+    assert clusters[0].representative == 0
+    assert clusters[0].duplicates == [2, 3]
+    assert 0.8 <= clusters[0].similarity <= 1.0
+
+
+def test_threshold_one_only_groups_identical_descriptions():
+    clusters = cluster_job_descriptions([BASE, BASE + " Location: Denver.", BASE], threshold=1.0)
+    assert [cluster.members for cluster in clusters] == [[0, 2], [1]]
+
+
+def test_process_deduplicated_counts_only_its_own_calls_and_copies_results(monkeypatch):
+    from types import SimpleNamespace
+
+    import resume_app_class_only
+    from metrics import MetricsRegistry
+    from resume_app_class_only import ResumeProcessor
+    from resume_parser import KEY_SKILLS, WORK_EXPERIENCE, ParsedResume
+
+    def create(**request):
+        content = "```Python```" if "my resume:" in request["messages"][-1]["content"] else "Python, SQL"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+    parsed = ParsedResume("hash", {KEY_SKILLS: ["Python"], WORK_EXPERIENCE: ["Acme", "Wrote Python"]})
+    monkeypatch.setattr(resume_app_class_only, "parse_resume", lambda path, headings=None: parsed)
+    metrics = MetricsRegistry()
+    # Calls made by another run sharing the registry don't count towards this one
+    for _ in range(10):
+        metrics.record_call("other_run", "gpt-4o", 0.1)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    processor = ResumeProcessor(client, metrics=metrics)
+    results = sorted(processor.process_deduplicated([BASE, BASE + " Location: Denver."], "resume.docx",
+                                                    review=False), key=lambda result: result.index)
+    report = processor.dedup_report
+    assert (report.api_calls, report.calls_saved) == (2, 2)
+    assert results[1].duplicate_of == 0 and results[1].keywords == results[0].keywords
+    results[1].keywords.append("Airflow")
+    assert "Airflow" not in results[0].keywords
+    results[1].conversation_log.append("Only on the duplicate")
+    assert "Only on the duplicate" not in list(results[0].conversation_log)
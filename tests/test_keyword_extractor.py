@@ -0,0 +1,33 @@
+from keyword_extractor import KeywordExtractor, get_default_extractor, merge_keywords, normalize_keyword
+
+
+def test_find_prefers_leftmost_longest_match():
+    extractor = KeywordExtractor(["Machine Learning", "Learning", "Python"])
+    assert extractor.find("machine learning in python") == [(0, 16, "Machine Learning"), (20, 26, "Python")]
+
+
+def test_matches_only_on_word_boundaries():
+    extractor = KeywordExtractor(["Java", "SQL"])
+    assert extractor.extract("JavaScript and NoSQL") == []
+    assert extractor.extract("Java, SQL") == ["Java", "SQL"]
+
+
+def test_aliases_map_to_canonical_terms_without_duplicates():
+    extractor = KeywordExtractor({"k8s": "Kubernetes", "kubernetes": "Kubernetes", "Go": "Go"})
+    assert extractor.extract("Kubernetes (k8s) and Go; more K8S") == ["Kubernetes", "Go"]
+
+
+def test_unmatched_lines():
+    extractor = KeywordExtractor(["Python"])
+    assert extractor.unmatched_lines("Python required\n\nGreat team culture\n") == ["Great team culture"]
+
+
+def test_default_extractor_is_shared_and_finds_common_terms():
+    extractor = get_default_extractor()
+    assert extractor is get_default_extractor()
+    assert "Python" in extractor.extract("Experience with Python and SQL")
+
+
+def test_normalize_and_merge_keywords():
+    assert normalize_keyword("  - Data   Analysis.\n") == "Data Analysis"
+    assert merge_keywords([" python", "SQL"], ["Python", "", "•  sql", "Docker"]) == ["python", "SQL", "Docker"]
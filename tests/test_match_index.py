@@ -0,0 +1,127 @@
+import sqlite3
+import threading
+
+import pytest
+
+from match_index import MatchIndex
+from resume_parser import ParsedResume
+
+RESUMES = {
+    "ada": "Python, SQL and Airflow pipelines on AWS",
+    "grace": "Java and Kubernetes services",
+    "linus": "C and Linux kernel work, some Python",
+}
+JOBS = {
+    "data": ["Python", "SQL", "Airflow"],
+    "platform": ["Kubernetes", "Java", "Go"],
+}
+
+
+def _fill(index):
+    for candidate_id, text in RESUMES.items():
+        index.add_resume_text(candidate_id, text)
+    for job_id, keywords in JOBS.items():
+        index.add_job(job_id, keywords, f"{job_id} job")
+
+
+def test_top_jobs_and_candidates():
+    index = MatchIndex()
+    _fill(index)
+
+    best = index.top_jobs("ada", k=1)[0]
+    assert (best.job_id, best.score, best.missing) == ("data", 100, [])
+    assert [match.candidate_id for match in index.top_candidates("data", k=2)] == ["ada", "linus"]
+    platform = index.top_candidates("platform", k=1)[0]
+    assert platform.candidate_id == "grace" and platform.missing == ["Go"]
+
+
+def test_scores_agree_with_match_scorer():
+    from match_scoring import MatchScorer
+
+    index = MatchIndex()
+    _fill(index)
+    scorer = MatchScorer(list(JOBS.values()))
+    for candidate_id, text in RESUMES.items():
+        expected = {job_id: score for job_id, score in zip(JOBS, scorer.score(text))}
+        for match in index.top_jobs(candidate_id, k=len(JOBS)):
+            score = expected[match.job_id]
+            assert match.coverage == pytest.approx(score.coverage) and match.cosine == pytest.approx(score.cosine)
+            assert (match.matched, match.missing) == (score.matched, score.missing)
+
+
+def test_shortlist():
+    index = MatchIndex()
+    _fill(index)
+    assert len(index.shortlist(k=1, by="candidate")) == 3
+    assert len(index.shortlist(k=2, by="job")) == 4
+    with pytest.raises(ValueError):
+        index.shortlist(by="nobody")
+
+
+def test_updates_are_seen_by_later_queries():
+    index = MatchIndex()
+    _fill(index)
+    assert index.top_jobs("grace", k=1)[0].score == 67
+    index.add_resume_text("grace", "Java, Kubernetes and Go")
+    assert index.top_jobs("grace", k=1)[0].score == 100
+    index.add_job("platform", ["Rust"])
+    assert index.top_candidates("platform", k=1)[0].score == 0
+
+
+def test_queries_run_alongside_writes():
+    index = MatchIndex()
+    _fill(index)
+    errors = []
+
+    def query():
+        try:
+            for _ in range(200):
+                index.shortlist(k=2)
+        except Exception as exc:
+            errors.append(exc)
+
+    reader = threading.Thread(target=query)
+    reader.start()
+    for step in range(200):
+        index.add_resume_text(f"extra-{step % 5}", "Go and Rust services")
+        if step % 10 == 0:
+            index.add_job(f"job-{step}", ["Go", "Rust"])
+    reader.join()
+    assert errors == []
+
+
+def test_store_survives_reopening(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    index = MatchIndex(path)
+    _fill(index)
+    index.add_parsed_resumes([("parsed", ParsedResume("hash", {"Key Skills": ["Go", "Kubernetes"]}), None)])
+    index.close()
+
+    reopened = MatchIndex(path)
+    assert sorted(reopened.candidates) == sorted(list(RESUMES) + ["parsed"])
+    assert reopened.job_description("data") == "data job"
+    assert reopened.parsed_resume("parsed").sections == {"Key Skills": ["Go", "Kubernetes"]}
+    assert reopened.top_candidates("platform", k=1)[0].candidate_id in ("grace", "parsed")
+    reopened.close()
+
+
+def test_index_without_the_parsed_column_is_upgraded(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE resumes (candidate_id TEXT PRIMARY KEY, resume_file_path TEXT, text TEXT NOT NULL)")
+    db.execute("CREATE TABLE jobs (job_id TEXT PRIMARY KEY, job_description TEXT, keywords TEXT NOT NULL)")
+    db.execute("INSERT INTO resumes VALUES ('old', NULL, 'Python and SQL')")
+    db.commit()
+    db.close()
+
+    index = MatchIndex(path)
+    index.add_resume_text("new", "Java")
+    index.add_parsed_resumes([("parsed", ParsedResume("hash", {"Key Skills": ["Python"]}), None)])
+    index.add_job("data", ["Python", "SQL"])
+    assert index.top_candidates("data", k=1)[0].candidate_id == "old"
+    assert index.parsed_resume("old") is None
+    assert index.parsed_resume("parsed").sections == {"Key Skills": ["Python"]}
+    index.close()
+
+    columns = [row[1] for row in sqlite3.connect(path).execute("PRAGMA table_info(resumes)")]
+    assert columns == ["candidate_id", "resume_file_path", "text", "parsed"]
@@ -0,0 +1,25 @@
+import pytest
+
+from match_scoring import MatchScorer, rank_matches
+
+RESUME = "Built Python and SQL pipelines; Python dashboards in Tableau."
+
+
+def test_coverage_cosine_and_missing_keywords():
+    scores = MatchScorer([["Python", "SQL", "Airflow"], ["Java"], []]).score(RESUME)
+    assert scores[0].coverage == pytest.approx(2 / 3) and scores[0].score == 67
+    assert scores[0].matched == ["Python", "SQL"] and scores[0].missing == ["Airflow"]
+    # Term counts (Python twice, SQL once) against the job's unit vector
+    assert scores[0].cosine == pytest.approx(3 / (5 ** 0.5 * 3 ** 0.5))
+    assert scores[1].coverage == 0 and scores[1].cosine == 0
+    assert scores[2].coverage == 0 and scores[2].missing == []
+
+
+def test_keywords_are_merged_case_insensitively():
+    scores = MatchScorer([["python", "Python", "SQL"]]).score(RESUME)
+    assert scores[0].matched == ["python", "SQL"] and scores[0].coverage == 1.0
+
+
+def test_rank_matches_orders_by_coverage_then_cosine():
+    ranked = rank_matches(RESUME, [["Java"], ["Python", "Airflow"], ["Python", "SQL"], ["SQL", "Airflow"]], top_k=3)
+    assert [match.index for match in ranked] == [2, 1, 3]
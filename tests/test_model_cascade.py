@@ -0,0 +1,21 @@
+import pytest
+
+from model_cascade import parse_score
+
+
+@pytest.mark.parametrize("text, score", [
+    ("Score: 85/100", 85),
+    ("I would give it a score of 72", 72),
+    ("Score: 8/10", 80),
+    ("Rating: 7.5 / 10", 75),
+    ("4 out of 5 for the skills match", 80),
+    ("It covers 2/3 of the skills, score 70", 70),
+    ("Score: 75\nOnly 2 out of 5 certifications listed", 75),
+])
+def test_parse_score(text, score):
+    assert parse_score(text) == score
+
+
+@pytest.mark.parametrize("text", ["No score here", "Score: 12/10", "Score: 0/0", "Score: 250"])
+def test_parse_score_without_a_valid_score(text):
+    assert parse_score(text) is None
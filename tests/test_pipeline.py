@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from pipeline import Pipeline, StageTimings
+
+
+def test_timings():
+    timings = StageTimings()
+    with timings.measure("parse"):
+        pass
+    timings.start("keywords")
+    timings.stop("never started")
+    assert list(timings.durations()) == ["parse"]
+    assert "keywords: running" in timings.summary()
+
+
+def test_stages_wait_only_on_their_dependencies():
+    release = threading.Event()
+    with Pipeline(max_workers=3) as pipeline:
+        slow = pipeline.submit("slow", release.wait, 5)
+        fast = pipeline.submit("fast", lambda: "fast")
+        dependent = pipeline.submit("dependent", lambda: "after fast", after=(fast,))
+        assert dependent.result(timeout=5) == "after fast"
+        assert not slow.done()
+        release.set()
+    assert set(pipeline.timings.durations()) == {"slow", "fast", "dependent"}
+
+
+def test_failed_dependency_fails_the_stage():
+    def fail():
+        raise ValueError("parse failed")
+
+    with Pipeline(max_workers=2) as pipeline:
+        failed = pipeline.submit("parse", fail)
+        dependent = pipeline.submit("process", lambda: "never", after=(failed,))
+        with pytest.raises(ValueError):
+            dependent.result(timeout=5)
+    assert "process" not in pipeline.timings.stages
+
+
+def test_run_pipeline_parses_the_resume_once(monkeypatch):
+    from types import SimpleNamespace
+
+    import resume_app_class_only
+    from resume_app_class_only import ResumeProcessor
+    from resume_parser import KEY_SKILLS, WORK_EXPERIENCE, ParsedResume
+
+    replies = {"process_job_description": "Python, SQL", "process_resume": "```Key Skills: Python```"}
+
+    def create(**request):
+        stage = "process_resume" if "my resume:" in request["messages"][-1]["content"] else "process_job_description"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=replies[stage]))],
+                               usage=None)
+
+    parsed = ParsedResume("hash", {KEY_SKILLS: ["Python • SQL"], WORK_EXPERIENCE: ["Acme", "Wrote SQL"]})
+    monkeypatch.setattr(resume_app_class_only, "parse_resume", lambda path, headings=None: parsed)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    processor = ResumeProcessor(client)
+    result = processor.run_pipeline("We need Python and SQL", "resume.docx", review=False)
+    assert result.ok and result.processed_resume == "Key Skills: Python"
+    assert processor.metrics.stages["docx_parse"].count == 1
@@ -0,0 +1,42 @@
+from prompt_compaction import compact_job_description, compact_resume, count_tokens, format_keywords
+from resume_parser import KEY_SKILLS, WORK_EXPERIENCE, ParsedResume
+
+PARSED = ParsedResume("hash", {
+    KEY_SKILLS: ["Python • SQL • Excel"],
+    WORK_EXPERIENCE: ["Acme, Data Engineer", "Built Python pipelines", "Organised the team offsite",
+                      "Globex, Analyst", "Answered phones", "Wrote SQL reports in Excel"],
+}, subheadings=["Acme, Data Engineer", "Globex, Analyst"])
+
+
+def test_format_keywords():
+    assert format_keywords(["Python", "python", " SQL"]) == "Python, SQL"
+    assert format_keywords("already a string") == "already a string"
+
+
+def test_bullets_without_keywords_are_left_out():
+    result = compact_resume(PARSED, ["Python", "SQL"])
+    assert "Organised the team offsite" not in result.text and "Answered phones" not in result.text
+    assert "Acme, Data Engineer\nBuilt Python pipelines" in result.text
+    assert result.dropped == ["Organised the team offsite", "Answered phones"]
+    assert result.tokens_after == count_tokens(result.text)
+
+
+def test_every_bullet_is_kept_when_none_match():
+    result = compact_resume(PARSED, ["Kubernetes"])
+    assert result.dropped == [] and "Answered phones" in result.text
+
+
+def test_token_budget_drops_the_weakest_bullets():
+    full = compact_resume(PARSED, ["Python", "SQL", "Excel"])
+    budget = count_tokens(full.text) - 1
+    result = compact_resume(PARSED, ["Python", "SQL", "Excel"], token_budget=budget)
+    assert "Built Python pipelines" not in result.text and "Wrote SQL reports in Excel" in result.text
+    assert result.dropped == ["Organised the team offsite", "Answered phones", "Built Python pipelines"]
+    assert result.tokens_after <= budget
+
+
+def test_job_description_is_only_trimmed_to_a_budget():
+    job_description = "Data Engineer\nWe like ping pong\nPython and SQL required"
+    assert compact_job_description(job_description, ["Python"]).text == job_description
+    result = compact_job_description(job_description, ["Python"], token_budget=count_tokens(job_description) - 1)
+    assert result.text.startswith("Data Engineer") and result.dropped == ["We like ping pong"]
@@ -0,0 +1,42 @@
+import pytest
+
+from prompt_templates import (PROMPTS, PROCESS_RESUME, PromptField, PromptTemplate, REVIEW_RESUME, SPECIAL_GPT_LOG,
+                              get_prompt)
+
+
+def test_stable_fields_come_first_in_every_template():
+    for template in PROMPTS.values():
+        stable = [field.stable for field in template.fields]
+        assert stable == sorted(stable, reverse=True), template.name
+
+
+def test_stable_field_after_variable_content_is_rejected():
+    with pytest.raises(ValueError):
+        PromptTemplate("bad", "system", [PromptField("job", "job:"), PromptField("resume", "resume:", stable=True)])
+
+
+def test_user_content_and_messages():
+    content = REVIEW_RESUME.user_content(resume="RESUME", job_description="JD")
+    assert content == "my resume: RESUME\n\njob description: JD"
+    assert REVIEW_RESUME.messages(resume="RESUME", job_description="JD") == [
+        {"role": "system", "content": REVIEW_RESUME.system}, {"role": "user", "content": content}]
+
+
+def test_separator():
+    content = SPECIAL_GPT_LOG.user_content(resume="R", job_description="J", recommendations="C", experiences="E")
+    assert content.startswith("my resume:\nR\n\njob description:\nJ")
+
+
+def test_only_the_original_resume_is_stable():
+    stable = {name: [field.name for field in template.fields if field.stable] for name, template in PROMPTS.items()}
+    assert stable.pop("process_resume") == stable.pop("process_resume_structured") == ["resume"]
+    assert not any(stable.values())
+    first = PROCESS_RESUME.user_content(resume="RESUME", keywords="first")
+    second = PROCESS_RESUME.user_content(resume="RESUME", keywords="second")
+    assert first.startswith("my resume: RESUME\n\n") and second.startswith("my resume: RESUME\n\n")
+
+
+def test_get_prompt():
+    assert get_prompt("review_resume") is REVIEW_RESUME
+    with pytest.raises(KeyError):
+        get_prompt("missing")
@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+import pytest
+
+from rate_limiting import (RATE_LIMITS, RateLimitedClient, RateLimiter, TokenBucket, is_retryable,
+                           without_client_retries)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": retry_after} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+class FlakyClient:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "reply"
+
+
+def test_bucket_allows_a_burst_then_waits_for_the_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire(60) == 0.0
+    assert bucket.acquire(1) == pytest.approx(1.0)
+    clock.now += 30
+    assert bucket.acquire(30) == 0.0
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_bucket_refill_is_capped_and_oversized_requests_go_through():
+    clock = FakeClock()
+    bucket = TokenBucket(60, capacity=10, clock=clock, sleep=clock.sleep)
+    clock.now += 600
+    assert bucket.acquire(1000) == 0.0
+    assert bucket.available == 0
+    assert bucket.acquire(10) == pytest.approx(10.0)
+
+
+def test_backoff_is_jittered_exponential_and_honours_retry_after():
+    limiter = RateLimiter(base_delay=1.0, max_delay=8.0)
+    for attempt in range(6):
+        assert 0.0 <= limiter.backoff(attempt) <= min(8.0, 2 ** attempt)
+    assert limiter.backoff(0, StatusError(429, retry_after="5")) >= 5.0
+    assert limiter.backoff(0, StatusError(429, retry_after="9999")) == 120.0
+
+
+def test_limits_fall_back_to_the_model_family():
+    limiter = RateLimiter(rate_limits={"gpt-4o": (10, 100), "gpt-4o-mini": (20, 200)})
+    assert limiter.limits_for("gpt-4o-2024-08-06") == (10, 100)
+    assert limiter.limits_for("gpt-4o-mini-2024-07-18") == (20, 200)
+    assert limiter.limits_for("other") is None
+
+
+def test_throttling_is_opt_in():
+    assert RateLimiter().limits_for("gpt-4o") is None
+    assert RateLimiter(rate_limits=RATE_LIMITS).limits_for("gpt-4o-2024-08-06") == RATE_LIMITS["gpt-4o"]
+
+
+def test_retryable_errors_are_retried_with_backoff():
+    sleeps = []
+    limiter = RateLimiter(rate_limits={}, max_retries=3, sleep=sleeps.append)
+    client = FlakyClient([StatusError(429), StatusError(503)])
+    assert RateLimitedClient(client, limiter).chat.completions.create(model="m", messages=[]) == "reply"
+    assert client.calls == 3
+    assert limiter.retries == 2 and len(sleeps) == 2
+
+
+def test_other_errors_and_exhausted_retries_are_raised():
+    limiter = RateLimiter(rate_limits={}, max_retries=1, sleep=lambda seconds: None)
+    client = FlakyClient([StatusError(400)])
+    with pytest.raises(StatusError):
+        RateLimitedClient(client, limiter).chat.completions.create(model="m", messages=[])
+    assert client.calls == 1
+
+    client = FlakyClient([StatusError(500), StatusError(500)])
+    with pytest.raises(StatusError):
+        RateLimitedClient(client, limiter).chat.completions.create(model="m", messages=[])
+    assert client.calls == 2
+
+
+def test_is_retryable():
+    assert is_retryable(StatusError(429)) and is_retryable(StatusError(502)) and is_retryable(StatusError(408))
+    assert not is_retryable(StatusError(401))
+    assert not is_retryable(ValueError("bad"))
+
+
+def test_openai_clients_lose_their_own_retries():
+    openai = pytest.importorskip("openai")
+    client = openai.OpenAI(api_key="test", max_retries=2)
+    assert without_client_retries(client).max_retries == 0
+    fake = FlakyClient([])
+    assert without_client_retries(fake) is fake
@@ -0,0 +1,98 @@
+import pytest
+
+from response_cache import CachedClient, ResponseCache, make_cache_key
+
+ChatCompletion = pytest.importorskip("openai.types.chat").ChatCompletion
+
+
+def test_cache_key_ignores_parameter_order():
+    messages = [{"role": "user", "content": "hi"}]
+    assert make_cache_key("m", messages, temperature=0, top_p=1) == make_cache_key("m", messages, top_p=1, temperature=0)
+    assert make_cache_key("m", messages) != make_cache_key("other", messages)
+
+
+def test_memory_tier_is_an_lru():
+    cache = ResponseCache(max_memory_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_disk_tier_survives_reopening(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path)
+    cache.set("key", "value")
+    cache.close()
+
+    reopened = ResponseCache(path)
+    assert reopened.get("key") == "value"
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.get("key") == "value"
+    assert reopened.stats()["memory_hits"] == 1
+    reopened.close()
+
+
+def test_expired_entries_miss():
+    cache = ResponseCache(ttl=-1)
+    cache.set("key", "value")
+    assert cache.get("key") is None
+
+
+def test_disk_tier_is_bounded(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"), max_memory_entries=1, max_disk_entries=2)
+    for key in "abc":
+        cache.set(key, key)
+    assert cache.get("a") is None
+    assert cache.get("c") == "c"
+    cache.close()
+
+
+def _completion(content):
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "m",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+    })
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return _completion(f"reply {len(self.calls)}")
+
+
+class _FakeClient:
+    def __init__(self):
+        self.completions = _FakeCompletions()
+        self.chat = self
+        self.api_key = "test"
+
+
+def test_cached_client_answers_repeated_requests_from_the_cache():
+    client = _FakeClient()
+    cached = CachedClient(client, ResponseCache())
+    messages = [{"role": "user", "content": "hi"}]
+
+    first = cached.chat.completions.create(model="m", messages=messages, timeout=5)
+    second = cached.chat.completions.create(model="m", messages=messages)
+    assert first.choices[0].message.content == second.choices[0].message.content == "reply 1"
+    assert len(client.completions.calls) == 1
+    assert cached.api_key == "test"
+
+
+def test_cached_client_replays_a_cached_reply_as_a_stream():
+    client = _FakeClient()
+    cached = CachedClient(client, ResponseCache())
+    messages = [{"role": "user", "content": "hi"}]
+    cached.chat.completions.create(model="m", messages=messages)
+
+    chunks = list(cached.chat.completions.create(model="m", messages=messages, stream=True))
+    assert [chunk.choices[0].delta.content for chunk in chunks] == ["reply 1"]
+    assert len(client.completions.calls) == 1
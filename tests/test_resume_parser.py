@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+import resume_parser
+from resume_parser import KEY_SKILLS, SIDECAR_SUFFIX, WORK_EXPERIENCE, clear_cache, parse_resume
+from synthetic import save_resume
+
+docx = pytest.importorskip("docx")
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+@pytest.fixture
+def resume_path(tmp_path):
+    return save_resume(str(tmp_path / "resume.docx"), pages=1)
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    # Counts the documents actually opened, i.e. the parses neither the memo nor a sidecar could answer
+    paths = []
+    document = docx.Document
+
+    def counting(path=None):
+        if path is not None:
+            paths.append(path)
+        return document(path)
+
+    monkeypatch.setattr(docx, "Document", counting)
+    return paths
+
+
+def test_sections_and_memo(resume_path, opened):
+    parsed = parse_resume(resume_path)
+    assert parsed.sections[KEY_SKILLS] and parsed.sections[WORK_EXPERIENCE]
+    assert parsed.skills and parsed.bullets
+    assert parse_resume(resume_path) is parsed
+    assert len(opened) == 1
+
+
+def test_sidecar_is_reused_by_a_fresh_process(resume_path, opened):
+    parsed = parse_resume(resume_path, save=True)
+    clear_cache()
+    reloaded = parse_resume(resume_path)
+    assert len(opened) == 1
+    assert reloaded.sections == parsed.sections and reloaded.subheadings == parsed.subheadings
+
+
+@pytest.mark.parametrize("field, value", [("version", resume_parser.PARSER_VERSION - 1), ("file_hash", "0" * 64)])
+def test_stale_sidecar_is_ignored(resume_path, opened, field, value):
+    parse_resume(resume_path, save=True)
+    sidecar_path = resume_path + SIDECAR_SUFFIX
+    with open(sidecar_path, encoding="utf-8") as file:
+        data = json.load(file)
+    data[field] = value
+    with open(sidecar_path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    clear_cache()
+    parse_resume(resume_path)
+    assert len(opened) == 2
+
+
+def test_sidecar_for_other_headings_is_ignored(resume_path, opened):
+    parse_resume(resume_path, save=True)
+    clear_cache()
+    parse_resume(resume_path, headings={"Professional Experience": WORK_EXPERIENCE, KEY_SKILLS: KEY_SKILLS})
+    assert len(opened) == 2
+
+
+def test_corrupt_sidecar_is_ignored(resume_path, opened):
+    with open(resume_path + SIDECAR_SUFFIX, "w", encoding="utf-8") as file:
+        file.write("{not json")
+    assert parse_resume(resume_path).sections
+    assert len(opened) == 1
+
+
+def test_memo_drops_the_least_recently_used(tmp_path, opened, monkeypatch):
+    monkeypatch.setattr(resume_parser, "MEMO_MAX_ENTRIES", 2)
+    paths = [save_resume(str(tmp_path / f"resume{seed}.docx"), pages=1, seed=seed) for seed in range(3)]
+    first = parse_resume(paths[0])
+    parse_resume(paths[1])
+    assert parse_resume(paths[0]) is first
+    parse_resume(paths[2])
+    assert len(resume_parser._memo) == 2
+    assert parse_resume(paths[0]) is first
+    parse_resume(paths[1])
+    assert len(opened) == 4
@@ -0,0 +1,26 @@
+import pytest
+
+from speculative_review import CHECKED, REFRESHED, REUSED, review_delta
+
+ORIGINAL = "Key Skills: Python, SQL\nBuilt dashboards"
+KEYWORDS = ["Python", "SQL", "Airflow", "Tableau"]
+
+
+def test_rewording_without_keyword_changes_keeps_the_review():
+    delta = review_delta(ORIGINAL, "Key Skills: Python, SQL\nDesigned reporting dashboards", KEYWORDS)
+    assert delta.divergence == 0 and delta.decide() == REUSED
+
+
+def test_keyword_changes_are_measured():
+    delta = review_delta(ORIGINAL, "Key Skills: Python, SQL, Airflow\nBuilt dashboards", KEYWORDS)
+    assert delta.gained == ["Airflow"] and delta.lost == []
+    assert delta.divergence == pytest.approx(0.25) and delta.decide() == CHECKED
+    assert "now covered: Airflow" in delta.describe()
+
+    delta = review_delta(ORIGINAL, "Key Skills: Airflow, Tableau", KEYWORDS)
+    assert delta.divergence == 1.0 and delta.decide() == REFRESHED
+
+
+def test_without_keywords_the_words_are_compared():
+    assert review_delta("a b c", "a b c", "verbose keyword reply").divergence == 0
+    assert review_delta("a b", "c d", []).divergence == 1.0
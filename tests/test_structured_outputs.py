@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+from rate_limiting import RateLimiter
+from resume_app_class_only import ResumeProcessor
+from structured_outputs import (KeywordResult, ResumeReview, StructuredOutputError, parse_structured,
+                                repair_request, structured_request)
+
+ChatCompletion = pytest.importorskip("openai.types.chat").ChatCompletion
+
+
+class ScriptedClient:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return ChatCompletion.model_validate({
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": kwargs["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": self.replies.pop(0)}}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+        })
+
+
+def test_parse_structured_accepts_fenced_json():
+    result = parse_structured('```json\n{"keywords": ["Python", "SQL"]}\n```', KeywordResult)
+    assert result.keywords == ["Python", "SQL"]
+
+
+@pytest.mark.parametrize("reply", ["Python, SQL", "[1, 2]", '{"keywords": "Python"}', ""])
+def test_parse_structured_rejects_malformed_replies(reply):
+    with pytest.raises(StructuredOutputError):
+        parse_structured(reply, KeywordResult)
+
+
+def test_review_schema_is_validated():
+    review = parse_structured('{"score": 80, "explanation": "ok", "missing_skills": [], "suggestions": []}',
+                              ResumeReview)
+    assert review.score == 80
+    with pytest.raises(StructuredOutputError):
+        parse_structured('{"score": "high", "explanation": "ok", "missing_skills": [], "suggestions": []}',
+                         ResumeReview)
+
+
+def test_request_format_depends_on_the_model():
+    strict = structured_request(KeywordResult, "gpt-4o", "instructions", "content")
+    assert strict["response_format"]["type"] == "json_schema"
+    assert structured_request(KeywordResult, "gpt-3.5-turbo", "instructions", "content")["response_format"] == {
+        "type": "json_object"}
+    repair = repair_request(KeywordResult, "Python, SQL", "reply is not valid JSON")
+    assert "Python, SQL" in repair["messages"][-1]["content"]
+
+
+def test_malformed_reply_is_repaired_by_a_cheap_call_instead_of_rerunning():
+    client = ScriptedClient(["Python, SQL", '{"keywords": ["Python", "SQL"]}'])
+    processor = ResumeProcessor(client, structured_outputs=True, rate_limiter=RateLimiter(rate_limits={}))
+    assert processor.process_job_description("Python and SQL", verbose=False) == ["Python", "SQL"]
+    assert len(client.requests) == 2
+    assert "reply:\nPython, SQL" in client.requests[1]["messages"][-1]["content"]
+    assert ("process_job_description_repair", client.requests[1]["model"]) in processor.metrics.calls
+
+
+def test_failed_repair_is_raised():
+    client = ScriptedClient(["Python, SQL", "still not JSON"])
+    processor = ResumeProcessor(client, structured_outputs=True, rate_limiter=RateLimiter(rate_limits={}))
+    with pytest.raises(StructuredOutputError):
+        processor.process_job_description("Python and SQL", verbose=False)
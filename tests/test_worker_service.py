@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from resume_app_class_only import JobResult
+from uploads import UploadStore
+from worker_service import DONE, FAILED, TailoringService
+
+
+class StubProcessor:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+
+    def process_job(self, job_description, resume_file_path, review=True):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def resume_dir(tmp_path):
+    directory = tmp_path / "resumes"
+    (directory / "team").mkdir(parents=True)
+    (directory / "team" / "ada.docx").write_bytes(b"resume")
+    (tmp_path / "secret.txt").write_text("secret")
+    return directory
+
+
+def test_resume_paths_are_refused_without_a_resume_dir():
+    with pytest.raises(PermissionError):
+        TailoringService(StubProcessor([])).resolve_resume_path("ada.docx")
+
+
+def test_resume_paths_resolve_inside_the_resume_dir(resume_dir):
+    service = TailoringService(StubProcessor([]), resume_dir=str(resume_dir))
+    assert service.resolve_resume_path("team/ada.docx") == os.path.realpath(resume_dir / "team" / "ada.docx")
+    assert service.resolve_resume_path("team/../team/ada.docx").endswith("ada.docx")
+
+
+@pytest.mark.parametrize("path", ["../secret.txt", "team/../../secret.txt", "/etc/passwd", "..", "../resumes-other"])
+def test_resume_paths_outside_the_resume_dir_are_refused(resume_dir, path):
+    service = TailoringService(StubProcessor([]), resume_dir=str(resume_dir))
+    with pytest.raises(PermissionError):
+        service.resolve_resume_path(path)
+
+
+def test_symlinks_out_of_the_resume_dir_are_refused(resume_dir, tmp_path):
+    os.symlink(tmp_path / "secret.txt", resume_dir / "link.docx")
+    service = TailoringService(StubProcessor([]), resume_dir=str(resume_dir))
+    with pytest.raises(PermissionError):
+        service.resolve_resume_path("link.docx")
+
+
+def test_failing_jobs_are_recorded_and_the_worker_keeps_going(tmp_path):
+    finished = JobResult(0, "jd")
+    service = TailoringService(StubProcessor([RuntimeError("boom"), None, finished]), workers=1,
+                               uploads=UploadStore(str(tmp_path / "uploads"))).start()
+    jobs = [service.submit("jd", "resume.docx") for _ in range(3)]
+    for job in jobs:
+        assert job.done.wait(5)
+    assert [job.status for job in jobs] == [FAILED, FAILED, DONE]
+    assert str(jobs[0].result.error) == "boom"
+    assert jobs[2].result is finished
+    assert service.stats()["workers"] == 1
+    service.stop()
+
+
+def test_uploads_are_deleted_when_their_jobs_finish(tmp_path):
+    uploads = UploadStore(str(tmp_path / "uploads"))
+    service = TailoringService(StubProcessor([RuntimeError("boom"), JobResult(0, "jd")]), workers=1,
+                               uploads=uploads).start()
+    jobs = [service.submit("jd", uploads.save(b"same resume"), uploaded=True) for _ in range(2)]
+    for job in jobs:
+        assert job.done.wait(5)
+    assert os.listdir(uploads.upload_dir) == []
+    service.stop()
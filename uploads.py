@@ -0,0 +1,65 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+from resume_parser import SIDECAR_SUFFIX
+
+UPLOAD_DIR = os.path.join(tempfile.gettempdir(), "resume_fix_app_uploads")
+
+
+def save_upload(data, upload_dir=UPLOAD_DIR):
+    """
+    Saves an uploaded .docx under its content hash, so re-uploads of the same resume reuse one file (and its
+    memoized parse).
+    Returns:
+        The path of the saved file.
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    path = os.path.join(upload_dir, hashlib.sha256(data).hexdigest() + ".docx")
+    if not os.path.exists(path):
+        with open(path, "wb") as file:
+            file.write(data)
+    return path
+
+
+class UploadStore:
+    def __init__(self, upload_dir=UPLOAD_DIR):
+        """
+        Keeps uploaded resumes on disk only while jobs use them. Uploads of the same content share one file, which is
+        deleted (with its parse sidecar) when the last job using it releases it.
+        Args:
+            upload_dir: The directory to save the uploads in.
+        """
+        self.upload_dir = upload_dir
+        self._references = {}
+        self._lock = threading.Lock()
+
+    def save(self, data):
+        """
+        Saves an upload for one job; release the returned path when the job is done.
+        """
+        with self._lock:
+            path = save_upload(data, self.upload_dir)
+            self._references[path] = self._references.get(path, 0) + 1
+            return path
+
+    def release(self, path):
+        """
+        Drops one job's reference to an upload, deleting the file once no job uses it.
+        """
+        with self._lock:
+            remaining = self._references.get(path, 0) - 1
+            if remaining > 0:
+                self._references[path] = remaining
+                return
+            self._references.pop(path, None)
+            for stale in (path, path + SIDECAR_SUFFIX):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+    def __len__(self):
+        with self._lock:
+            return len(self._references)
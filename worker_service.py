@@ -0,0 +1,248 @@
+import base64
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from resume_app_class_only import JobResult
+from uploads import UploadStore
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ServiceBusy(RuntimeError):
+    """
+    Raised when a job is submitted while the service's queue is full.
+    """
+
+
+class TailoringJob:
+    def __init__(self, job_id, job_description, resume_file_path, review, uploaded=False):
+        """
+        Holds one queued resume + job description request and, once it has run, its JobResult.
+        uploaded is True when the resume file is an upload to release once the job is done.
+        """
+        self.id = job_id
+        self.job_description = job_description
+        self.resume_file_path = resume_file_path
+        self.review = review
+        self.uploaded = uploaded
+        self.status = QUEUED
+        self.result = None
+        self.submitted = time.time()
+        self.done = threading.Event()
+
+    def to_dict(self):
+        data = {"id": self.id, "status": self.status, "submitted": self.submitted}
+        if self.result is not None:
+            data["result"] = self.result.to_dict()
+        return data
+
+
+class TailoringService:
+    def __init__(self, processor, workers=4, max_queued=100, max_finished=1000, resume_dir=None, uploads=None):
+        """
+        A long-running pool of worker threads tailoring resumes to job descriptions from a bounded queue.
+        Every job runs on ResumeProcessor.process_job, so the OpenAI client, connection pool, rate limiter,
+        response cache, parsed-resume memo and metrics all stay warm across jobs.
+        Args:
+            processor: The configured ResumeProcessor the jobs run on.
+            workers: The number of jobs processed at once.
+            max_queued: The maximum number of jobs waiting to run; submit raises ServiceBusy past it.
+            max_finished: The number of finished jobs kept for lookup, oldest dropped first.
+            resume_dir: Optional; the directory requests may name resumes in with "resume_path". Without it, resumes
+                        can only be uploaded.
+            uploads: Optional; the uploads.UploadStore uploaded resumes are kept in while their jobs run. Defaults
+                     to one in uploads.UPLOAD_DIR.
+        """
+        self.processor = processor
+        self.workers = workers
+        self.max_finished = max_finished
+        self.resume_dir = os.path.realpath(resume_dir) if resume_dir is not None else None
+        self.uploads = uploads if uploads is not None else UploadStore()
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._finished = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"tailoring-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, wait=True):
+        """
+        Lets the workers finish the queued jobs and stops them.
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def submit(self, job_description, resume_file_path, review=True, uploaded=False):
+        """
+        Queues a job.
+        Args:
+            uploaded: True if resume_file_path came from uploads.save; it is released when the job is done, or
+                      right away if the queue is full.
+        Returns:
+            The TailoringJob; wait on its done event or look it up later with get().
+        Raises:
+            ServiceBusy: If the queue is full.
+        """
+        job = TailoringJob(str(next(self._ids)), job_description, resume_file_path, review, uploaded)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            if uploaded:
+                self.uploads.release(resume_file_path)
+            raise ServiceBusy(f"{self._queue.maxsize} jobs are already queued") from None
+        return job
+
+    def resolve_resume_path(self, path):
+        """
+        Resolves a requested resume path against resume_dir, following symlinks and "..".
+        Raises:
+            PermissionError: If there is no resume_dir or the path resolves outside it.
+        """
+        if self.resume_dir is None:
+            raise PermissionError("resume_path is not accepted; upload the resume as resume_base64")
+        resolved = os.path.realpath(os.path.join(self.resume_dir, path))
+        if os.path.commonpath([self.resume_dir, resolved]) != self.resume_dir:
+            raise PermissionError("resume_path is outside the resume directory")
+        return resolved
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {"workers": len(self._threads), "queued": statuses.count(QUEUED), "running": statuses.count(RUNNING),
+                "done": statuses.count(DONE), "failed": statuses.count(FAILED)}
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            job.status = RUNNING
+            try:
+                job.result = self.processor.process_job(job.job_description, job.resume_file_path, job.review)
+                if job.result is None:
+                    raise RuntimeError("process_job returned no result")
+            except Exception as exc:
+                # Record the failure on the job and keep this worker in the pool for the jobs still queued
+                job.result = JobResult(0, job.job_description)
+                job.result.error = exc
+            finally:
+                if job.uploaded:
+                    self.uploads.release(job.resume_file_path)
+            job.status = DONE if job.result.ok else FAILED
+            job.done.set()
+            self._forget_old_jobs()
+
+    def _forget_old_jobs(self):
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.done.is_set()]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job_id]
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    The HTTP interface of a TailoringService:
+        POST /jobs        {"job_description": ..., "resume_base64": ... or "resume_path": ..., "review": true,
+                           "wait": false}
+                          queues a job; answers 202 with the job (or 200 with its result when "wait" is true).
+                          "resume_path" is only accepted inside the service's resume_dir (403 otherwise).
+        GET  /jobs/<id>   the job's status, and its result once done.
+        GET  /health      worker and queue counts.
+        GET  /metrics     the processor's metrics in the Prometheus text format.
+    """
+    service = None
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.service.stats())
+        elif self.path == "/metrics":
+            self._send(200, self.service.processor.export_metrics("prometheus"), "text/plain; version=0.0.4")
+        elif self.path.startswith("/jobs/"):
+            job = self.service.get(self.path[len("/jobs/"):])
+            if job is None:
+                self._send_json(404, {"error": "unknown job"})
+            else:
+                self._send_json(200, job.to_dict())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            job_description = request["job_description"]
+            uploaded = "resume_base64" in request
+            if uploaded:
+                data = base64.b64decode(request["resume_base64"])
+            else:
+                resume_file_path = self.service.resolve_resume_path(request["resume_path"])
+        except PermissionError as exc:
+            self._send_json(403, {"error": str(exc)})
+            return
+        except (ValueError, KeyError, TypeError) as exc:
+            self._send_json(400, {"error": f"bad request: {exc!r}"})
+            return
+        if uploaded:
+            resume_file_path = self.service.uploads.save(data)
+        try:
+            job = self.service.submit(job_description, resume_file_path, request.get("review", True), uploaded)
+        except ServiceBusy as exc:
+            self._send_json(503, {"error": str(exc)})
+            return
+        if request.get("wait"):
+            job.done.wait()
+            self._send_json(200, job.to_dict())
+        else:
+            self._send_json(202, job.to_dict())
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data), "application/json")
+
+    def _send(self, status, body, content_type):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(service, host="127.0.0.1", port=8080):
+    """
+    Builds the HTTP server for a started TailoringService; call serve_forever() on it.
+    """
+    handler = type("BoundServiceRequestHandler", (ServiceRequestHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)